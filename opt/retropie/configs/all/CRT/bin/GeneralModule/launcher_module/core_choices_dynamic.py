@@ -50,6 +50,7 @@ from .core_paths import CRT_MEDIA_PATH, CRT_ES_RES_PATH, ROTMODES_TATE1_FILE, \
                         ROTMODES_TATE3_FILE
 from .screen import CRT
 from .core_controls import joystick, CRT_UP, CRT_DOWN, CRT_BUTTON
+from .text_cache import TEXT_CACHE
 
 # BASE COLORS
 BG_COLOR = (128, 120, 211)
@@ -120,11 +121,13 @@ class choices(object):
             self.dCFG['font']),
             self.dCFG['font_size'])
         self.dCFG['font_line'] = self.m_oFontText.get_linesize()
+        self.m_tFontKey = (self.m_sSkinPath, self.dCFG['font'], self.dCFG['font_size'])
 
         self.be = pygame.image.load(os.path.join(self.m_sSkinPath, self.dCFG['border_corner']))
         self.b = pygame.image.load(os.path.join(self.m_sSkinPath, self.dCFG['border']))
         self.c = pygame.image.load(os.path.join(self.m_sSkinPath, self.dCFG['cursor']))
         self.c = pygame.transform.rotate(self.c, self.m_iRotate)
+        self._prepare_border_tiles()
 
         # screen
         self.m_lResolutionXY = CRT.get_screen_resolution()
@@ -185,30 +188,55 @@ class choices(object):
         bottom = self.m_oTable.img.get_height() - self.be.get_height()
         self._draw_border(top, bottom)
 
+    def _prepare_border_tiles(self):
+        """ Rotated border pieces, done once instead of on every draw """
+        self.m_dBorder = {'top': self.b,
+                          'bottom': pygame.transform.flip(self.b, 0, 1),
+                          'left': pygame.transform.rotate(self.b, 90),
+                          'right': pygame.transform.rotate(self.b, -90),
+                          'corner_tl': self.be,
+                          'corner_tr': pygame.transform.rotate(self.be, -90),
+                          'corner_br': pygame.transform.rotate(self.be, 180),
+                          'corner_bl': pygame.transform.rotate(self.be, 90)}
+        self.m_dBorderStrips = {}
+
+    def _border_strip(self, p_sEdge, p_iLength):
+        """
+        Border edge of p_iLength pixels: the one pixel tile is stretched
+        with a nearest neighbour scale, same output as blitting it once
+        per pixel but done in a single call and cached by length.
+        """
+        key = (p_sEdge, p_iLength)
+        if not key in self.m_dBorderStrips:
+            tile = self.m_dBorder[p_sEdge]
+            w, h = tile.get_size()
+            if p_sEdge in ('top', 'bottom'):
+                strip = tile.subsurface((0, 0, 1, h))
+                size = (p_iLength, h)
+            else:
+                strip = tile.subsurface((0, 0, w, 1))
+                size = (w, p_iLength)
+            self.m_dBorderStrips[key] = pygame.transform.scale(strip, size)
+        return self.m_dBorderStrips[key]
+
     def _draw_border(self, top, bottom):
         w = self.be.get_width()
         h = self.be.get_height()
         right = self.m_oTable.img.get_width() - w
 
         # edges
-        tmp = pygame.transform.flip(self.b, 0, 1)
-        for x in range(w, right):
-            self.m_oTable.img.blit(self.b, (x, top))
-            self.m_oTable.img.blit(tmp, (x, bottom))
-        tmp = pygame.transform.rotate(self.b, 90)
-        tmp2 = pygame.transform.rotate(self.b, -90)
-        for y in range(h + top, bottom):
-            self.m_oTable.img.blit(tmp, (0, y))
-            self.m_oTable.img.blit(tmp2, (right, y))
+        if right > w:
+            self.m_oTable.img.blit(self._border_strip('top', right - w), (w, top))
+            self.m_oTable.img.blit(self._border_strip('bottom', right - w), (w, bottom))
+        if bottom > h + top:
+            self.m_oTable.img.blit(self._border_strip('left', bottom - h - top), (0, h + top))
+            self.m_oTable.img.blit(self._border_strip('right', bottom - h - top), (right, h + top))
 
         # corners
-        self.m_oTable.img.blit(self.be, (0, top))
-        tmp = pygame.transform.rotate(self.be, -90)
-        self.m_oTable.img.blit(tmp, (right, top))
-        tmp = pygame.transform.rotate(self.be, 180)
-        self.m_oTable.img.blit(tmp, (right, bottom))
-        tmp = pygame.transform.rotate(self.be, 90)
-        self.m_oTable.img.blit(tmp, (0, bottom))
+        self.m_oTable.img.blit(self.m_dBorder['corner_tl'], (0, top))
+        self.m_oTable.img.blit(self.m_dBorder['corner_tr'], (right, top))
+        self.m_oTable.img.blit(self.m_dBorder['corner_br'], (right, bottom))
+        self.m_oTable.img.blit(self.m_dBorder['corner_bl'], (0, bottom))
 
     def _table_render(self):
         self._table_create()
@@ -237,17 +265,8 @@ class choices(object):
         self.m_oTable.position = rect
 
     def text_render(self, p_sText, p_lTextColor, p_lShadowColor = None, p_iShadowDrop = 1, p_bUseBiggerFont = True):
-        img = self.m_oFontText.render(p_sText, False, p_lTextColor)
-        rect = img.get_rect()
-        sf = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-        if p_lShadowColor:
-            shadow = self.m_oFontText.render(p_sText, False, p_lShadowColor)
-            shadow_rect = img.get_rect()
-            shadow_rect.x += p_iShadowDrop
-            shadow_rect.y += p_iShadowDrop
-            sf.blit(shadow, shadow_rect)
-        sf.blit(img, rect)
-        return sf
+        return TEXT_CACHE.render(self.m_oFontText, self.m_tFontKey, p_sText,
+                                 p_lTextColor, p_lShadowColor, p_iShadowDrop)
 
     def cleanup(self):
         self._clean_on_finish()
@@ -371,6 +390,7 @@ class Table(object):
     height = 0
     width = 0
     position = 0
+    m_dGradients = {} # (w, h, color): surface, shared by all tables
 
     def __init__(self, w, h):
         self.height = h
@@ -386,10 +406,19 @@ class Table(object):
         if p_iType == BG_FLAT:
             self.img.fill(p_lBaseColor)
             return
+        key = (self.width, self.height, tuple(p_lBaseColor))
+        if not key in self.m_dGradients:
+            self.m_dGradients[key] = self._gradient(p_lBaseColor)
+        self.img.blit(self.m_dGradients[key], (0, 0))
+
+    def _gradient(self, p_lBaseColor):
+        """ Degrade bands drawn on a one pixel column, then stretched """
+        column = pygame.Surface((1, self.height), 0, self.img)
         ndeg = int(min(p_lBaseColor)/8)
         height = int(self.height/ndeg) + 1
         cont = 0
         for y in range(0, self.height, height):
             color = tuple(map(lambda x: x - (8 * cont), p_lBaseColor))
-            pygame.draw.rect(self.img, color, (0,y, self.width, height) )
+            column.fill(color, (0, y, 1, height))
             cont += 1
+        return pygame.transform.scale(column, (self.width, self.height))
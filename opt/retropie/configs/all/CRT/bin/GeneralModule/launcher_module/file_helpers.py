@@ -22,8 +22,9 @@ with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 """
 
-import os, logging
+import os, logging, time
 import hashlib, shutil, random, re
+import select, struct, ctypes, ctypes.util
 import xml.etree.ElementTree as ET
 
 from launcher_module.core_paths import TMP_LAUNCHER_PATH, CRT_ROOT_PATH, ES_CFG_FILE
@@ -221,3 +222,118 @@ def remove_file(p_sFile):
 def touch_file(fname, times=None):
     with open(fname, 'a'):
         os.utime(fname, times)
+
+class file_watcher(object):
+    """
+    Watch a list of files for changes without reading them. Parent
+    folders are watched with inotify so files replaced by 'cp' or 'mv'
+    are also detected. If inotify is not available, falls back to
+    compare mtime, size and inode of each file on every check.
+    """
+    IN_NONBLOCK = 0o4000
+    IN_MASK = 0x002 | 0x004 | 0x008 | 0x040 | 0x080 | 0x100 | 0x200
+    # IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+    # IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT_HEADER = struct.calcsize("iIII")
+    POLL_TIME = 1 # seconds between stats for fallback mode
+
+    def __init__(self, p_lFiles):
+        self.m_lFiles = [os.path.abspath(f) for f in p_lFiles]
+        self.m_dWatches = {}
+        self.m_iFD = -1
+        self.m_dStats = {}
+        self._inotify_init()
+        if self.m_iFD < 0:
+            for file in self.m_lFiles:
+                self.m_dStats[file] = self._stat(file)
+
+    def _inotify_init(self):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                               use_errno = True)
+            fd = libc.inotify_init1(self.IN_NONBLOCK)
+            if fd < 0: raise OSError(ctypes.get_errno(), "inotify_init1")
+            for path in set(os.path.dirname(f) for f in self.m_lFiles):
+                wd = libc.inotify_add_watch(fd, path.encode('utf-8'),
+                                            self.IN_MASK)
+                if wd < 0:
+                    os.close(fd)
+                    raise OSError(ctypes.get_errno(), path)
+                self.m_dWatches[wd] = path
+            self.m_iFD = fd
+        except Exception as e:
+            logging.info("WARNING: inotify not available (%s), " % e + \
+                         "watching files by mtime")
+            self.m_dWatches = {}
+            self.m_iFD = -1
+
+    def _stat(self, p_sFile):
+        try:
+            st = os.stat(p_sFile)
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return None
+
+    def _read_events(self):
+        p_lChanged = []
+        while True:
+            try: data = os.read(self.m_iFD, 4096)
+            except (BlockingIOError, InterruptedError): break
+            if not data: break
+            pos = 0
+            while pos + self.EVENT_HEADER <= len(data):
+                wd, mask, cookie, size = struct.unpack_from("iIII", data, pos)
+                pos += self.EVENT_HEADER
+                name = data[pos:pos + size].split(b'\0', 1)[0].decode('utf-8')
+                pos += size
+                if wd not in self.m_dWatches: continue
+                path = os.path.join(self.m_dWatches[wd], name)
+                if path in self.m_lFiles and path not in p_lChanged:
+                    p_lChanged.append(path)
+        return p_lChanged
+
+    def _compare_stats(self):
+        p_lChanged = []
+        for file in self.m_lFiles:
+            stat = self._stat(file)
+            if stat != self.m_dStats[file]:
+                self.m_dStats[file] = stat
+                p_lChanged.append(file)
+        return p_lChanged
+
+    def changed(self):
+        """ Return list of changed files since last call, never blocks """
+        if self.m_iFD >= 0: return self._read_events()
+        return self._compare_stats()
+
+    def wait(self, p_iTimeout = None):
+        """
+        Sleep until any file changes or timeout (seconds, None for
+        forever) is reached. Return list of changed files.
+        """
+        p_iStart = time.time()
+        while True:
+            p_iLeft = None
+            if p_iTimeout is not None:
+                p_iLeft = max(0, p_iTimeout - (time.time() - p_iStart))
+            if self.m_iFD >= 0:
+                try: select.select([self.m_iFD], [], [], p_iLeft)
+                except InterruptedError: pass
+                p_lChanged = self._read_events()
+            else:
+                p_lChanged = self._compare_stats()
+                if not p_lChanged:
+                    p_iSleep = self.POLL_TIME
+                    if p_iLeft is not None: p_iSleep = min(p_iSleep, p_iLeft)
+                    time.sleep(p_iSleep)
+            if p_lChanged: return p_lChanged
+            if p_iTimeout is not None and \
+               time.time() - p_iStart >= p_iTimeout: return []
+
+    def fileno(self):
+        return self.m_iFD
+
+    def close(self):
+        if self.m_iFD >= 0:
+            os.close(self.m_iFD)
+            self.m_iFD = -1
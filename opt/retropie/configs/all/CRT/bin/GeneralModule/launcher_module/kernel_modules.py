@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+kernel_modules.py.
+
+https://github.com/krahsdevil/crt-for-retropie/
+
+Copyright (C)  2018/2020 -krahs- - https://github.com/krahsdevil/
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 2 of the License, or (at your option) any
+later version.
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import os, logging, threading
+
+PROC_MODULES_PATH = "/proc/modules"
+MODULES_ROOT_PATH = "/lib/modules"
+MODPROBE = "sudo modprobe"
+
+def _norm(p_sModule):
+    """ Kernel treats '-' and '_' in module names as the same """
+    return p_sModule.strip().replace('-', '_')
+
+def _module_name(p_sPath):
+    """ 'kernel/drivers/x/mk_arcade_joystick_rpi.ko.xz' to module name """
+    name = os.path.basename(p_sPath.strip())
+    return _norm(name.split('.ko')[0])
+
+class kernel_modules(object):
+    """
+    Kernel modules state without lsmod, grep or modinfo. Loaded ones
+    are read from /proc/modules on every query, installed ones are
+    indexed from modules.dep and modules.builtin once per kernel
+    release, again only if depmod rebuilds them. modprobe is launched
+    only if wanted state is not current one.
+    """
+    def __init__(self, p_sProcModules = PROC_MODULES_PATH,
+                 p_sModulesRoot = MODULES_ROOT_PATH, p_sRelease = None,
+                 p_oRun = os.system):
+        self.m_sProcModules = p_sProcModules
+        self.m_sModulesRoot = p_sModulesRoot
+        self.m_sRelease = p_sRelease
+        self.m_oRun = p_oRun        # runs modprobe command lines
+        self.m_oLock = threading.Lock()
+        self.m_dIndex = {}          # release: (modules.dep stamp, names)
+
+    def release(self):
+        return self.m_sRelease or os.uname().release
+
+    def loaded(self, p_sModule):
+        """ Return True if module is loaded """
+        p_sModule = _norm(p_sModule)
+        try:
+            with open(self.m_sProcModules, "r") as f:
+                for line in f:
+                    if _norm(line.split(' ', 1)[0]) == p_sModule: return True
+        except Exception as e:
+            logging.info("WARNING: can't read %s: %s" % (self.m_sProcModules, e))
+        return False
+
+    def exists(self, p_sModule):
+        """ Return True if module is installed for running kernel """
+        return _norm(p_sModule) in self._index()
+
+    def load(self, p_sModule, p_sArgs = ""):
+        """ modprobe module if not loaded, return True if loaded """
+        if self.loaded(p_sModule): return True
+        command = "%s %s %s" % (MODPROBE, p_sModule, p_sArgs)
+        self.m_oRun(command.strip())
+        return self.loaded(p_sModule)
+
+    def unload(self, p_sModule):
+        """ modprobe -r module if loaded, return True if not loaded """
+        if not self.loaded(p_sModule): return True
+        self.m_oRun("%s -r %s" % (MODPROBE, p_sModule))
+        return not self.loaded(p_sModule)
+
+    def _index(self):
+        path = os.path.join(self.m_sModulesRoot, self.release())
+        p_sDep = os.path.join(path, "modules.dep")
+        try:
+            st = os.stat(p_sDep)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError: stamp = None
+        with self.m_oLock:
+            cache = self.m_dIndex.get(self.release())
+            if cache and cache[0] == stamp: return cache[1]
+        names = set()
+        for file in (p_sDep, os.path.join(path, "modules.builtin")):
+            try:
+                with open(file, "r") as f:
+                    for line in f:
+                        module = line.split(':', 1)[0]
+                        if module.strip(): names.add(_module_name(module))
+            except OSError: pass
+        with self.m_oLock:
+            self.m_dIndex[self.release()] = (stamp, names)
+        return names
+
+KMODS = kernel_modules()
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+net_info.py.
+
+https://github.com/krahsdevil/crt-for-retropie/
+
+Copyright (C)  2018/2020 -krahs- - https://github.com/krahsdevil/
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 2 of the License, or (at your option) any
+later version.
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import os, time, logging, threading
+import socket, fcntl, struct
+import urllib.request
+
+SIOCGIFADDR = 0x8915
+SYS_NET_PATH = "/sys/class/net"
+PUBLIC_IP_URL = "http://ipecho.net/plain"
+
+def public_ip_http(p_iTimeout = 0.8):
+    """ Default public IP resolver, return IP string or None """
+    try:
+        with urllib.request.urlopen(PUBLIC_IP_URL, timeout = p_iTimeout) as r:
+            addr = r.read(64).decode("utf-8").strip()
+    except Exception as e:
+        logging.info("WARNING: can't get public IP: %s" % e)
+        return None
+    try: socket.inet_aton(addr)
+    except: return None
+    return addr
+
+class network_info(object):
+    """
+    Cached network information shared by OLED service and Configuration
+    Utility. Local addresses are taken with ioctl, link state from sysfs
+    and public IP with a pluggable resolver called on a background
+    thread, so readers never wait for the network.
+    """
+    TTL_LOCAL = 3      # seconds for interface address and link
+    TTL_PUBLIC = 120   # seconds for public IP when resolved
+    TTL_PUBLIC_ERR = 15 # seconds to retry if resolver failed
+
+    def __init__(self, p_oResolver = public_ip_http):
+        self.m_oResolver = p_oResolver
+        self.m_oLock = threading.Lock()
+        self.m_dLocal = {}   # ifname: (time, addr)
+        self.m_dLink = {}    # ifname: (time, state)
+        self.m_sPublic = None
+        self.m_iPublicTime = 0
+        self.m_bPublicDone = False # at least one lookup finished
+        self.m_oPublicThread = None
+
+    def set_resolver(self, p_oResolver):
+        with self.m_oLock:
+            self.m_oResolver = p_oResolver
+        self.invalidate()
+
+    def invalidate(self):
+        with self.m_oLock:
+            self.m_dLocal = {}
+            self.m_dLink = {}
+            self.m_iPublicTime = 0
+
+    def local_ip(self, p_sIFname):
+        """ Return IPv4 address of interface or None """
+        now = time.time()
+        with self.m_oLock:
+            cache = self.m_dLocal.get(p_sIFname)
+            if cache and now - cache[0] < self.TTL_LOCAL: return cache[1]
+        addr = self._ioctl_ip(p_sIFname)
+        with self.m_oLock:
+            self.m_dLocal[p_sIFname] = (now, addr)
+        return addr
+
+    def link(self, p_sIFname):
+        """ Return True if interface has carrier/is associated """
+        now = time.time()
+        with self.m_oLock:
+            cache = self.m_dLink.get(p_sIFname)
+            if cache and now - cache[0] < self.TTL_LOCAL: return cache[1]
+        state = False
+        try:
+            with open(os.path.join(SYS_NET_PATH, p_sIFname, "carrier")) as f:
+                state = f.read().strip() == "1"
+        except: pass # interface down or not present
+        with self.m_oLock:
+            self.m_dLink[p_sIFname] = (now, state)
+        return state
+
+    def public_ip(self):
+        """
+        Return last known public IP or None. If cache is stale a
+        refresh is started on background and old value returned.
+        """
+        with self.m_oLock:
+            ttl = self.TTL_PUBLIC if self.m_sPublic else self.TTL_PUBLIC_ERR
+            stale = time.time() - self.m_iPublicTime >= ttl
+            running = self.m_oPublicThread and self.m_oPublicThread.is_alive()
+            if stale and not running:
+                self.m_oPublicThread = threading.Thread(target=self._dmn_public)
+                self.m_oPublicThread.setDaemon(True)
+                self.m_oPublicThread.start()
+            return self.m_sPublic
+
+    def public_ip_pending(self):
+        """ True while first public IP lookup is not finished """
+        with self.m_oLock:
+            return not self.m_bPublicDone
+
+    def _dmn_public(self):
+        with self.m_oLock: resolver = self.m_oResolver
+        try: addr = resolver()
+        except Exception as e:
+            logging.info("ERROR: public IP resolver: %s" % e)
+            addr = None
+        with self.m_oLock:
+            self.m_sPublic = addr
+            self.m_iPublicTime = time.time()
+            self.m_bPublicDone = True
+
+    def _ioctl_ip(self, p_sIFname):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            return socket.inet_ntoa(fcntl.ioctl(s.fileno(), SIOCGIFADDR,
+                   struct.pack('256s', p_sIFname[:15].encode('utf-8')))[20:24])
+        except: return None
+        finally: s.close()
+
+NETINFO = network_info()
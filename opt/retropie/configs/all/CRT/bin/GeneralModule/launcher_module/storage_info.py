@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+storage_info.py.
+
+https://github.com/krahsdevil/crt-for-retropie/
+
+Copyright (C)  2018/2020 -krahs- - https://github.com/krahsdevil/
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 2 of the License, or (at your option) any
+later version.
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import os, time, math, threading
+
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+ROOT_DEVICE = "/dev/root"
+
+def human_size(p_iBytes):
+    """ Size string like 'df -h': 1024 based, rounded up """
+    value = float(p_iBytes)
+    for unit in ("", "K", "M", "G", "T", "P"):
+        if value < 1024 or unit == "P": break
+        value /= 1024
+    if not unit: return "%i" % p_iBytes
+    if value < 10:
+        value = math.ceil(value * 10) / 10
+        if value < 10: return "%.1f%s" % (value, unit)
+    return "%i%s" % (math.ceil(value), unit)
+
+def _unescape(p_sPath):
+    """ Mount points in mountinfo have spaces and others as \\ooo """
+    if not '\\' in p_sPath: return p_sPath
+    return p_sPath.encode('utf-8').decode('unicode_escape')
+
+class storage_info(object):
+    """
+    Disk usage of mounted devices without launching 'df'. Mounts are
+    read from mountinfo and usage from os.statvfs, both are cached for
+    TTL seconds.
+    """
+    TTL = 3 # seconds
+
+    def __init__(self, p_sMountInfo = MOUNTINFO_PATH):
+        self.m_sMountInfo = p_sMountInfo
+        self.m_oLock = threading.Lock()
+        self.m_lMounts = []
+        self.m_iMountsTime = 0
+        self.m_dUsage = {}  # mount point: (time, usage)
+
+    def invalidate(self):
+        with self.m_oLock:
+            self.m_iMountsTime = 0
+            self.m_dUsage = {}
+
+    def mounts(self):
+        """ Return list of (device, mount point, fs type) """
+        now = time.time()
+        with self.m_oLock:
+            if now - self.m_iMountsTime < self.TTL: return self.m_lMounts
+        p_lMounts = []
+        try:
+            with open(self.m_sMountInfo, "r") as f:
+                for line in f:
+                    # id parent maj:min root mount opts [tags] - type source sopts
+                    fields, sep, fs = line.partition(" - ")
+                    fields = fields.split()
+                    fs = fs.split()
+                    if not sep or len(fields) < 5 or len(fs) < 2: continue
+                    p_lMounts.append((_unescape(fs[1]),
+                                      _unescape(fields[4]), fs[0]))
+        except: pass
+        with self.m_oLock:
+            self.m_lMounts = p_lMounts
+            self.m_iMountsTime = now
+        return p_lMounts
+
+    def find(self, p_sDisk):
+        """ Return mount point of a device or mount point path """
+        p_sMount = None
+        for dev, mount, fstype in self.mounts():
+            if p_sDisk in (dev, mount): p_sMount = mount # last one wins
+        if not p_sMount and p_sDisk == ROOT_DEVICE: p_sMount = "/"
+        return p_sMount
+
+    def usage(self, p_sDisk):
+        """ Return dict with size, used and avail bytes, or None """
+        p_sMount = self.find(p_sDisk)
+        if not p_sMount: return None
+        now = time.time()
+        with self.m_oLock:
+            cache = self.m_dUsage.get(p_sMount)
+            if cache and now - cache[0] < self.TTL: return cache[1]
+        try:
+            st = os.statvfs(p_sMount)
+            size = st.f_blocks * st.f_frsize
+            used = (st.f_blocks - st.f_bfree) * st.f_frsize
+            avail = st.f_bavail * st.f_frsize
+            usage = {'size': size, 'used': used, 'avail': avail}
+        except OSError: usage = None
+        with self.m_oLock:
+            self.m_dUsage[p_sMount] = (now, usage)
+        return usage
+
+    def space(self, p_sDisk):
+        """ Return 'avail/size(free%)' string or None """
+        usage = self.usage(p_sDisk)
+        if not usage or not usage['size']: return None
+        total = usage['used'] + usage['avail']
+        p_iUsed = int(math.ceil(usage['used'] * 100.0 / total)) if total else 0
+        return "%s/%s(%i%%)" % (human_size(usage['avail']),
+                                human_size(usage['size']), 100 - p_iUsed)
+
+STORAGE = storage_info()
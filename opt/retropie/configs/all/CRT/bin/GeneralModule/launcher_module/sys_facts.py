@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+sys_facts.py.
+
+https://github.com/krahsdevil/crt-for-retropie/
+
+Copyright (C)  2018/2020 -krahs- - https://github.com/krahsdevil/
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 2 of the License, or (at your option) any
+later version.
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import os, json, logging, threading
+
+from launcher_module.core_paths import TMP_LAUNCHER_PATH
+
+MODEL_PATH = "/proc/device-tree/model"
+CPUINFO_PATH = "/proc/cpuinfo"
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+SYSFACTS_CACHE = os.path.join(TMP_LAUNCHER_PATH, "CRT_SysFacts.json")
+
+def file_stamp(p_sFile):
+    """ Return (mtime, size) of a file to detect changes, None if missing """
+    try: st = os.stat(p_sFile)
+    except OSError: return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _read(p_sFile):
+    try:
+        with open(p_sFile, "r") as f: return f.read()
+    except Exception: return ""
+
+class system_facts(object):
+    """
+    Hardware facts that never change while the system is running.
+    They are parsed once per boot and shared between processes through
+    a small json file in /dev/shm, checked against kernel boot_id.
+    Values read from config files should be reloaded only when their
+    file_stamp() changes.
+    """
+    def __init__(self, p_sModel = MODEL_PATH, p_sCPUInfo = CPUINFO_PATH,
+                 p_sCache = SYSFACTS_CACHE, p_sBootID = BOOT_ID_PATH):
+        self.m_sModel = p_sModel
+        self.m_sCPUInfo = p_sCPUInfo
+        self.m_sCache = p_sCache
+        self.m_sBootID = p_sBootID
+        self.m_oLock = threading.Lock()
+        self.m_dFacts = None
+
+    def model(self):
+        """ Full model string like 'Raspberry Pi 3 Model B Plus Rev 1.3' """
+        return self._facts()['model']
+
+    def revision(self):
+        """ Board revision code from cpuinfo like 'a020d3' """
+        return self._facts()['revision']
+
+    def hardware(self):
+        return self._facts()['hardware']
+
+    def _facts(self):
+        with self.m_oLock:
+            if self.m_dFacts: return self.m_dFacts
+            boot = _read(self.m_sBootID).strip()
+            facts = self._load_cache(boot)
+            if not facts:
+                facts = self._parse()
+                facts['boot_id'] = boot
+                self._save_cache(facts)
+            self.m_dFacts = facts
+            return facts
+
+    def _parse(self):
+        facts = {'model': "", 'revision': "Not Found", 'hardware': ""}
+        facts['model'] = _read(self.m_sModel).replace('\00', '').strip()
+        for line in _read(self.m_sCPUInfo).splitlines():
+            key, sep, value = line.partition(':')
+            if not sep: continue
+            key = key.strip().lower()
+            value = value.replace('\00', '').strip()
+            if key == 'revision' and value: facts['revision'] = value
+            elif key == 'hardware': facts['hardware'] = value
+        return facts
+
+    def _load_cache(self, p_sBoot):
+        if not p_sBoot: return None
+        try:
+            with open(self.m_sCache, "r") as f: facts = json.load(f)
+        except Exception: return None
+        if facts.get('boot_id') != p_sBoot: return None
+        return facts
+
+    def _save_cache(self, p_dFacts):
+        if not p_dFacts['boot_id']: return
+        p_sTemp = self.m_sCache + ".%i" % os.getpid()
+        try:
+            with open(p_sTemp, "w") as f: json.dump(p_dFacts, f)
+            os.replace(p_sTemp, self.m_sCache)
+        except Exception as e:
+            logging.info("WARNING: can't save system facts: %s" % e)
+            try: os.remove(p_sTemp)
+            except OSError: pass
+
+SYSFACTS = system_facts()
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+text_cache.py.
+
+https://github.com/krahsdevil/crt-for-retropie/
+
+Copyright (C)  2018/2020 -krahs- - https://github.com/krahsdevil/
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 2 of the License, or (at your option) any
+later version.
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import threading, collections
+import pygame
+
+def _color_key(p_lColor):
+    """ pygame.Color and (r, g, b) tuples of same color give same key """
+    p_lColor = tuple(p_lColor)
+    if len(p_lColor) == 3: p_lColor += (255,)
+    return p_lColor
+
+class text_cache(object):
+    """
+    LRU of rendered text surfaces with optional drop shadow, shared by
+    the configuration utility and the dynamic choices selector. The
+    key is (font, text, color, shadow, drop), where font identifies
+    file and size. Returned surfaces are shared, only blit from them.
+    """
+    MAX_ITEMS = 256
+
+    def __init__(self, p_iMaxItems = MAX_ITEMS):
+        self.m_iMaxItems = p_iMaxItems
+        self.m_dCache = collections.OrderedDict()
+        self.m_oLock = threading.Lock()
+        self.m_iHits = 0
+        self.m_iMiss = 0
+
+    def render(self, p_oFont, p_tFontKey, p_sText, p_lTextColor,
+               p_lShadowColor = None, p_iShadowDrop = 1):
+        shadow = _color_key(p_lShadowColor) if p_lShadowColor else None
+        key = (p_tFontKey, p_sText, _color_key(p_lTextColor), shadow, p_iShadowDrop)
+        with self.m_oLock:
+            sf = self.m_dCache.get(key)
+            if sf:
+                self.m_dCache.move_to_end(key)
+                self.m_iHits += 1
+                return sf
+            self.m_iMiss += 1
+
+        img = p_oFont.render(p_sText, False, p_lTextColor)
+        rect = img.get_rect()
+        sf = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
+        if p_lShadowColor:
+            shadow = p_oFont.render(p_sText, False, p_lShadowColor)
+            shadow_rect = img.get_rect()
+            shadow_rect.x += p_iShadowDrop
+            shadow_rect.y += p_iShadowDrop
+            sf.blit(shadow, shadow_rect)
+        sf.blit(img, rect)
+
+        with self.m_oLock:
+            self.m_dCache[key] = sf
+            while len(self.m_dCache) > self.m_iMaxItems:
+                self.m_dCache.popitem(last = False)
+        return sf
+
+    def stats(self):
+        """ Return (hits, misses) since start """
+        return (self.m_iHits, self.m_iMiss)
+
+    def clear(self):
+        with self.m_oLock:
+            self.m_dCache.clear()
+
+TEXT_CACHE = text_cache()
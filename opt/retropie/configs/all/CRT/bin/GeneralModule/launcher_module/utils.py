@@ -28,6 +28,7 @@ from launcher_module.core_paths import CRT_ROOT_PATH, RETROPIE_EMULATORS_PATH, \
                                        ROTMODES_TATE1_FILE, ROTMODES_TATE3_FILE
 from launcher_module.file_helpers import md5_file, ini_get, touch_file, \
                                          add_line, ini_set
+from launcher_module.kernel_modules import KMODS
 from launcher_module.core_choices_dynamic import choices
 from distutils.version import LooseVersion
 
@@ -163,21 +164,11 @@ def wait_process(p_sProcess, p_sState = 'stop', p_iTimes = 1, p_iWaitScs = 1):
 
 def module_loaded(p_sModule):
     """ Return True if module is loaded """
-    command = 'lsmod | grep %s' % p_sModule
-    try: sOutput = subprocess.check_output(command, shell=True).decode("utf-8")
-    except: sOutput = ""
-    if p_sModule in sOutput:
-        return True
-    return False
+    return KMODS.loaded(p_sModule)
 
 def module_exists(p_sModule):
     """ Return True if module exists/installed """
-    command = 'modinfo %s' % p_sModule
-    try: sOutput = subprocess.check_output(command, shell=True).decode("utf-8")
-    except: sOutput = ""
-    if not 'error' or not 'ERROR' in sOutput:
-        return True
-    return False
+    return KMODS.exists(p_sModule)
 
 def get_side():
     """ Check current side of EmulatioStation """
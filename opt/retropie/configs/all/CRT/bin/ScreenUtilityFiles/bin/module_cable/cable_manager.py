@@ -39,9 +39,7 @@ from module_cable.controls_mapping import CTRLSMgmt
 from module_cable.cable_utils import *
 from launcher_module.core_paths import TMP_LAUNCHER_PATH, RASP_BOOTCFG_FILE, \
                                        CRT_UTILITY_FILE
-from launcher_module.file_helpers import ini_getlist, generate_random_temp_filename, \
-                                         add_line, remove_file, touch_file, ini_get, \
-                                         md5_file
+from launcher_module.file_helpers import ini_getlist, ini_get, remove_file
 from launcher_module.utils import check_process, wait_process, \
                                   show_info, menu_options
 
@@ -58,7 +56,6 @@ class CableMNGR(object):
     m_lCableLab  = []   # list of cable labels, ids and descriptions
     m_iCableID = None   # current id of the cable
     m_bNeedFix = False  # wrong config for current cable
-    m_sTemp = ""        # temp file
     m_lBaseCfg = {'CRT-BASE'    : [['disable_overscan', '1'],
                                    ['overscan_scale', '1'],
                                    ['framebuffer_depth', '32'],
@@ -154,10 +151,11 @@ class CableMNGR(object):
         p_lProfile['config'].update(p_lCfg04)
         return p_lProfile
         
-    def check_current_cableID(self):
+    def check_current_cableID(self, p_oDoc = None):
         """ get current cable configured on the system (config.txt) """
         try:
-            id = int(ini_sect_get_key(RASP_BOOTCFG_FILE, 'CRT-CABLE', 'crt_cable_type'))
+            if not p_oDoc: p_oDoc = ini_document(RASP_BOOTCFG_FILE)
+            id = int(p_oDoc.get_key('CRT-CABLE', 'crt_cable_type'))
             self.m_iCableID = id
             return self.m_iCableID
         except: self.m_iCableID = None
@@ -211,18 +209,19 @@ class CableMNGR(object):
 
     def check_cable(self):
         p_bCheck = False # false if config is wrong
-        p_iCableID = self.check_current_cableID()
+        p_oDoc = ini_document(RASP_BOOTCFG_FILE)
+        p_iCableID = self.check_current_cableID(p_oDoc)
         if p_iCableID == None or (not p_iCableID and type(p_iCableID) == type(False)):
             logging.info("WARNING: was not possible to check")
             return False
-        if not os.path.exists(RASP_BOOTCFG_FILE): return False
+        if not p_oDoc.exists(): return False
         for id in self.m_lCableList:
             if id == p_iCableID:
                 desc = self.m_lCableList[id]['desc']
                 logging.info("INFO: Comparing configs on boot.txt for %s" % desc)
                 for section in self.m_lCableList[id]['config']:
                     list = self.m_lCableList[id]['config'][section]
-                    comp = compare_section(RASP_BOOTCFG_FILE, section, list)
+                    comp = p_oDoc.compare_section(section, list)
                     if not comp:
                         p_bCheck = True
                         break
@@ -231,15 +230,12 @@ class CableMNGR(object):
 
     def change_cable(self, p_iCableID):
         """ change cable config on system: config.txt """
-        p_bCheck = False
         p_iCableID = self.get_cable_id(p_iCableID)
-        self.m_sTemp = generate_random_temp_filename(RASP_BOOTCFG_FILE)
-        os.system('cp %s %s' % (RASP_BOOTCFG_FILE, self.m_sTemp))
-        self.set_cable(self.m_sTemp, p_iCableID)
-        os.system('sudo cp %s %s' % (self.m_sTemp, RASP_BOOTCFG_FILE))
-        if md5_file(self.m_sTemp) == md5_file(RASP_BOOTCFG_FILE):
-            p_bCheck = True
-        self.__clean()
+        p_oDoc = ini_document(RASP_BOOTCFG_FILE)
+        self.set_cable(p_oDoc, p_iCableID)
+        if not p_oDoc.changed():
+            logging.info("INFO: config.txt already set for this cable")
+        p_bCheck = p_oDoc.write(p_bSudo = True)
         value = self.m_oKeyboardMNGR.check_keyboard_enabled()
         if self.m_lCableList[p_iCableID]['kbd']:
             if not value: self.m_oKeyboardMNGR.pi2jamma_enable_controls()
@@ -253,29 +249,32 @@ class CableMNGR(object):
         self.check_cable()
         return p_bCheck
 
-    def set_cable(self, p_sFile, p_iCableID):
-        """ clean and add cable configuration to a file with cable ID """
+    def set_cable(self, p_oDoc, p_iCableID):
+        """
+        Set cable configuration in a ini_document with cable ID. Only
+        sections whose keys differ from the profile are rewritten.
+        """
         if p_iCableID not in self.m_lCableList:
             logging.info("WARNING: id %s is not a valid cable" % p_iCableID)
             return False
-        if not os.path.exists(p_sFile): return False
+        if not p_oDoc.exists(): return False
         logging.info("INFO: changing to cable type %s: %s" % \
                     (p_iCableID, self.m_lCableList[p_iCableID]['desc']))
         for id in self.m_lCableList:
             if id == p_iCableID:
                 for section in self.m_lCableList[id]['config']:
-                    ini_sect_empty_section(p_sFile, section)
                     list = self.m_lCableList[id]['config'][section]
+                    if p_oDoc.has_section(section) and \
+                       not p_oDoc.diff_section(section, list):
+                        continue # section is already as in profile
+                    p_oDoc.empty_section(section)
                     if not list:
-                        ini_sect_create_section(p_sFile, section)
+                        p_oDoc.create_section(section)
                     for key, value in list:
-                        ini_sect_add_key(p_sFile, section, key, value)
+                        p_oDoc.add_key(section, key, value)
         return True
 
     def reset_config(self):
-        p_bCheck = False
-        self.m_sTemp = generate_random_temp_filename(RASP_BOOTCFG_FILE)
-        touch_file(self.m_sTemp)
         p_lBaseCfg = {'pi4': [['dtoverlay', 'vc4-fkms-v3d'],
                               ['max_framebuffers' , '2']],
                       'all': [['gpu_mem_256', '128'],
@@ -286,28 +285,18 @@ class CableMNGR(object):
         if not timings:
             res = ini_get(CRT_UTILITY_FILE, 'default') + '_timings'
             timings = " ".join(ini_getlist(CRT_UTILITY_FILE, res))
-        line = 'hdmi_timings=' + timings
-        add_line(self.m_sTemp, line)
+        p_oDoc = ini_document()
+        p_oDoc.new('hdmi_timings=' + timings + '\n')
 
         section_order = ['pi4', 'all'] # pi4 section must be before of all
         for section in section_order:
             list = p_lBaseCfg[section]
             for key, value in list:
-                ini_sect_add_key(self.m_sTemp, section, key, value)
+                p_oDoc.add_key(section, key, value)
         
-        self.set_cable(self.m_sTemp, 0) # create cable config ID0 (default)
-        ini_sect_create_section(self.m_sTemp, "CUSTOM-USER")
-        
-        os.system('sudo cp %s %s' % (self.m_sTemp, RASP_BOOTCFG_FILE))
-        if md5_file(self.m_sTemp) == md5_file(RASP_BOOTCFG_FILE):
-            p_bCheck = True
-        self.__clean()
-        return p_bCheck
-
-    def __clean(self):
-        if os.path.exists(self.m_sTemp):
-            remove_file(self.m_sTemp)
-        self.m_sTemp = ""
+        self.set_cable(p_oDoc, 0) # create cable config ID0 (default)
+        p_oDoc.create_section("CUSTOM-USER")
+        return p_oDoc.write(RASP_BOOTCFG_FILE, True)
         
     def __temp(self):
         if CLEAN_LOG_ONSTART:
@@ -20,8 +20,8 @@ with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 """
 
-import os, sys, re, time, logging
-import filecmp, subprocess, smbus
+import os, sys, re, time, json, logging, collections, threading
+import hashlib, subprocess, smbus
 import xml.etree.ElementTree as ET
 
 sys.dont_write_bytecode = True
@@ -32,7 +32,9 @@ from main_paths import MODULES_PATH
 sys.path.append(MODULES_PATH)
 
 from launcher_module.core_paths import CRT_RGB_SRV_FILE, CRT_RGB_SRV_PATH, \
-                                       CRT_RGB_CORE_PATH, CRT_RGB_CORE_FILE
+                                       CRT_RGB_CORE_PATH, CRT_RGB_CORE_FILE, \
+                                       TMP_LAUNCHER_PATH
+from launcher_module.sys_facts import BOOT_ID_PATH
 
 def clean_line(p_sLine):
     lValues = p_sLine.strip()
@@ -40,254 +42,485 @@ def clean_line(p_sLine):
     lValues = re.sub(r' +', " ", lValues).split('=')
     return lValues
 
+def _header(p_sLine):
+    """ Return section name if line is a header like [name] """
+    lValues = clean_line(p_sLine)
+    if lValues[0].startswith('[') and lValues[0].endswith(']'):
+        return lValues[0].strip('[]')
+    return None
+
+def _key_value(p_sLine, p_sKeyMask, p_bStrip = False):
+    """
+    Return value of line if key matches, None if not. p_bStrip also
+    matches keys with spaces before '=' like 'arm_freq = 1300'.
+
+    >>> _key_value("arm_freq = 1300", "arm_freq", True)
+    ' 1300'
+    >>> _key_value("arm_freq = 1300", "arm_freq") is None
+    True
+    """
+    lValues = clean_line(p_sLine)
+    key = lValues[0].strip() if p_bStrip else lValues[0]
+    if key == p_sKeyMask:
+        return "=".join(lValues[1:])
+    elif len(lValues) > 2:
+        if "=".join(lValues[:-1]) == p_sKeyMask:
+            return lValues[-1]
+    return None
+
+def sudo_write(p_sFile, p_sText):
+    """
+    Replace a root owned file in one step: text is written to a temp
+    file, copied with sudo next to the target and renamed over it.
+    Return True if target has the new text.
+    """
+    p_sTemp = os.path.join(TMP_LAUNCHER_PATH, "%s.%i" % \
+                           (os.path.basename(p_sFile), os.getpid()))
+    p_sNew = p_sFile + ".crt_new"
+    try:
+        with open(p_sTemp, "w") as f: f.write(p_sText)
+        p_sCommand = 'sudo cp "%s" "%s" && sudo mv "%s" "%s"' % \
+                     (p_sTemp, p_sNew, p_sNew, p_sFile)
+        if subprocess.call(p_sCommand, shell=True):
+            logging.info("ERROR: can't write %s" % p_sFile)
+            return False
+        with open(p_sFile, "r") as f: return f.read() == p_sText
+    except Exception as e:
+        logging.info("ERROR: can't write %s: %s" % (p_sFile, e))
+        return False
+    finally:
+        try: os.remove(p_sTemp)
+        except OSError: pass
+
+class ini_document(object):
+    """
+    Sectioned ini file like /boot/config.txt loaded once in memory.
+    Lines are kept as they are, so writing a document without changes
+    gives the very same bytes. Edits work on memory, with same results
+    that ini_sect_* functions give on files, and are written with a
+    single write() or a single sudo_write() when sudo is needed.
+    """
+    def __init__(self, p_sFile = None):
+        self.m_sFile = p_sFile
+        self.m_sOrig = None     # text as loaded, None if file not found
+        self.m_lLines = []
+        self.m_lSects = None    # [name, header line, end line], lazy
+        if p_sFile: self.load()
+
+    def load(self, p_sFile = None):
+        if p_sFile: self.m_sFile = p_sFile
+        self.m_sOrig = None
+        p_sText = ""
+        if os.path.isfile(self.m_sFile):
+            with open(self.m_sFile, "r") as f: p_sText = f.read()
+            self.m_sOrig = p_sText
+        self._set_text(p_sText)
+        return self.exists()
+
+    def new(self, p_sText = ""):
+        """ Start a document from text instead of loading a file """
+        self.m_sOrig = ""
+        self._set_text(p_sText)
+
+    def exists(self):
+        return self.m_sOrig != None
+
+    def text(self):
+        return "".join(self.m_lLines)
+
+    def changed(self):
+        return self.text() != self.m_sOrig
+
+    def write(self, p_sFile = None, p_bSudo = False):
+        """ Save document if changed, return False on error """
+        p_sFile = p_sFile or self.m_sFile
+        p_sText = self.text()
+        if p_sFile == self.m_sFile and p_sText == self.m_sOrig: return True
+        if p_bSudo:
+            if not sudo_write(p_sFile, p_sText): return False
+        else:
+            with open(p_sFile, "w") as f: f.write(p_sText)
+        if p_sFile == self.m_sFile: self.m_sOrig = p_sText
+        return True
+
+    def _set_text(self, p_sText):
+        self.m_lLines = p_sText.splitlines(True)
+        self.m_lSects = None
+
+    def _set_lines(self, p_lLines, p_bClean = True):
+        self._set_text("".join(p_lLines))
+        if p_bClean: self.clean()
+
+    def sections(self):
+        """ Return list of [name, header line, end line] """
+        if self.m_lSects == None:
+            self.m_lSects = []
+            for i, line in enumerate(self.m_lLines):
+                name = _header(line)
+                if name == None: continue
+                if self.m_lSects: self.m_lSects[-1][2] = i
+                self.m_lSects.append([name, i, len(self.m_lLines)])
+        return self.m_lSects
+
+    def _section_lines(self, p_sSection):
+        for name, start, end in self.sections():
+            if name == p_sSection:
+                for line in self.m_lLines[start + 1:end]: yield line
+
+    def has_section(self, p_sSection):
+        for name, start, end in self.sections():
+            if name == p_sSection: return True
+        return False
+
+    def get(self, p_sFindMask):
+        """ Same result of file_helpers.ini_get() on the document """
+        for line in self.m_lLines:
+            lValues = line.strip().replace('"', '').replace('=', ' ')
+            lValues = re.sub(r' +', " ", lValues).split(' ')
+            if p_sFindMask == lValues[0].strip(): return lValues[-1].strip()
+        return False
+
+    def get_any(self, p_sKeyMask):
+        """ Return value of key on any section, False if not found """
+        for line in self.m_lLines:
+            value = _key_value(line, p_sKeyMask)
+            if value != None: return value
+        return False
+
+    def get_key(self, p_sSection, p_sKeyMask):
+        """
+        Return value of key in first section with that name, None if
+        not found and more sections follow, False if not found at all
+        """
+        for name, start, end in self.sections():
+            if name != p_sSection: continue
+            for line in self.m_lLines[start + 1:end]:
+                value = _key_value(line, p_sKeyMask)
+                if value != None: return value
+            if end < len(self.m_lLines): return None
+            break
+        return False
+
+    def get_key_outside(self, p_sSection, p_sKeyMask):
+        """ Return value of key in sections with other name """
+        for name, start, end in self.sections():
+            if name == p_sSection: continue
+            for line in self.m_lLines[start + 1:end]:
+                value = _key_value(line, p_sKeyMask)
+                if value != None: return value
+        return False
+
+    def get_keys(self, p_sSection):
+        """ Return sorted list of [key, value] of a section """
+        p_lList = []
+        for line in self._section_lines(p_sSection):
+            if not line.startswith(('#', '[')) and line.strip() and '=' in line:
+                lValues = clean_line(line)
+                p_lList.append([lValues[0], "=".join(lValues[1:])])
+        p_lList.sort()
+        return p_lList
+
+    def diff_section(self, p_sSection, p_lList):
+        """
+        Return list of [wanted, found] pairs of [key, value] that
+        differ, with None on the missing side
+        """
+        p_oWanted = collections.Counter(tuple(item) for item in p_lList)
+        p_oFound = collections.Counter(tuple(item) for item in
+                                       self.get_keys(p_sSection))
+        p_lDiff = []
+        for item in sorted((p_oWanted - p_oFound).elements()):
+            p_lDiff.append([list(item), None])
+        for item in sorted((p_oFound - p_oWanted).elements()):
+            p_lDiff.append([None, list(item)])
+        return p_lDiff
+
+    def compare_section(self, p_sSection, p_lList1):
+        p_lList1.sort()
+        p_lList2 = self.get_keys(p_sSection)
+        if len(p_lList1) != len(p_lList2): 
+            logging.info("WARNING: number of keys in [%s] doesn't match" % p_sSection)
+            return False
+        p_bCheck = True
+        for a, b in zip(p_lList1, p_lList2):
+            if a[0] != b[0] or a[1] != b[1]: 
+                logging.info("WARNING: [%s] | OK:%s=%s | WRONG:%s=%s" % \
+                            (p_sSection, a[0], a[1], b[0], b[1]))
+                p_bCheck = False
+        if p_bCheck: logging.info("Configuration is OK for %s" % p_sSection)
+        return p_bCheck
+
+    def clean(self):
+        """ Remove empty lines and leave one before each section """
+        p_lLines = []
+        for line in self.m_lLines:
+            if _header(line) != None: p_lLines.append('\n')
+            if line.strip(): p_lLines.append(line)
+        self._set_lines(p_lLines, False)
+
+    def set_key(self, p_sSection, p_sKeyMask, p_sNewValue):
+        """ Change key value in section, return False if not found """
+        p_bFound = False
+        p_sKeyMask = str(p_sKeyMask)
+        p_lLines = list(self.m_lLines)
+        for name, start, end in self.sections():
+            if name != p_sSection: continue
+            for i in range(start + 1, end):
+                if _key_value(p_lLines[i], p_sKeyMask, True) != None:
+                    p_lLines[i] = '%s=%s\n' % (p_sKeyMask, str(p_sNewValue))
+                    p_bFound = True
+        self._set_lines(p_lLines)
+        return p_bFound
+
+    def add_key(self, p_sSection, p_sNewKey, p_sNewValue):
+        """ Add key at the end of section, created if doesn't exist """
+        self.create_section(p_sSection)
+        p_sNewKeyLine = str(p_sNewKey) + "=" + str(p_sNewValue) + '\n'
+        p_lLines = []
+        p_bFound = False
+        p_bInSection = False
+        for line in self.m_lLines:
+            name = _header(line)
+            if name != None:
+                if p_bInSection: p_lLines += [p_sNewKeyLine, '\n']
+                p_bInSection = name == p_sSection
+                if p_bInSection: p_bFound = True
+            if not p_bInSection or clean_line(line)[0]: p_lLines.append(line)
+        if p_bInSection: p_lLines += [p_sNewKeyLine, '\n']
+        self._set_lines(p_lLines)
+        return p_bFound
+
+    def create_section(self, p_sSection):
+        if self.has_section(p_sSection): return
+        self._set_lines(self.m_lLines + ['\n\n[' + p_sSection + ']\n'])
+
+    def empty_section(self, p_sSection, p_bRemove = False):
+        """ Remove all keys of a section, or the section with p_bRemove """
+        p_bFound = False
+        p_bInSection = False
+        p_lLines = []
+        for line in self.m_lLines:
+            name = _header(line)
+            if name != None:
+                p_bInSection = False
+                if name == p_sSection:
+                    if not p_bRemove: p_lLines.append(line + '\n')
+                    p_bFound = True
+                    p_bInSection = True
+            if not p_bInSection: p_lLines.append(line)
+        self._set_lines(p_lLines)
+        return p_bFound
+
+    def remove_lines(self, p_sRemoveMask):
+        """ Remove any line containing p_sRemoveMask like remove_line() """
+        p_lLines = [line for line in self.m_lLines if p_sRemoveMask not in line]
+        p_bCheck = len(p_lLines) != len(self.m_lLines)
+        self._set_lines(p_lLines, False)
+        return p_bCheck
+
+def _ini_edit(p_sFile, p_sMethod, *args):
+    """ Apply one ini_document edit on a file and save it """
+    doc = ini_document(p_sFile)
+    if not doc.exists(): return None
+    result = getattr(doc, p_sMethod)(*args)
+    doc.write()
+    return result
+
+def _ini_read(p_sFile, p_sMethod, *args):
+    doc = ini_document(p_sFile)
+    if not doc.exists(): return None
+    return getattr(doc, p_sMethod)(*args)
+
 def ini_get_any(p_sFile, p_sKeyMask):
     """ Return ini values on any section allways assigned with '=' 
         if multiple = are found return value from the last
     """
-    if not os.path.isfile(p_sFile): return None
-    with open(p_sFile, "r") as f:
-        for line in f:
-            lValues = clean_line(line)
-            if lValues[0] == p_sKeyMask:
-                value = "=".join(lValues[1:])
-                return value
-            elif len(lValues) > 2:
-                if "=".join(lValues[:-1]) == p_sKeyMask:
-                    value = lValues[-1]
-                    return value
-    return False # section not found
+    return _ini_read(p_sFile, 'get_any', p_sKeyMask)
         
 def ini_sect_clean_file(p_sFile):
-    if not os.path.isfile(p_sFile): return None
-    with open(p_sFile, "r+") as f:
-        p_bInSection = False
-        new_file = f.readlines()
-        f.seek(0) # rewind
-        for line in new_file:
-            lValues = clean_line(line)
-            if lValues[0].startswith('[') and lValues[0].endswith(']'):
-                    f.write('\n')
-            if line.strip(): f.write(line)
-        f.truncate() # remove everything after the last write
+    _ini_edit(p_sFile, 'clean')
 
 def ini_outofsect_get_key(p_sFile, p_sSection, p_sKeyMask):
-    if not os.path.isfile(p_sFile): return None
-    with open(p_sFile, "r") as f:
-        p_bOutOfSection = False
-        for line in f:
-            lValues = clean_line(line)
-            if lValues[0].startswith('[') and lValues[0].endswith(']'):
-                #if p_bOutOfSection: return None # value not found
-                p_bHeader = True
-                section = lValues[0].strip('[]')
-                if p_sSection == section: p_bOutOfSection = False
-                else: p_bOutOfSection = True
-            else: p_bHeader = False
-            if p_bOutOfSection and not p_bHeader:
-                if lValues[0] == p_sKeyMask:
-                    value = "=".join(lValues[1:])
-                    return value
-                elif len(lValues) > 2:
-                    if "=".join(lValues[:-1]) == p_sKeyMask:
-                        value = lValues[-1]
-                        return value
-    return False # section not found
+    return _ini_read(p_sFile, 'get_key_outside', p_sSection, p_sKeyMask)
 
 def ini_sect_get_key(p_sFile, p_sSection, p_sKeyMask):
-    if not os.path.isfile(p_sFile): return None
-    with open(p_sFile, "r") as f:
-        p_bInSection = False
-        for line in f:
-            lValues = clean_line(line)
-            if lValues[0].startswith('[') and lValues[0].endswith(']'):
-                if p_bInSection: return None # value not found
-                section = lValues[0].strip('[]')
-                if p_sSection == section: p_bInSection = True
-            if p_bInSection:
-                if lValues[0] == p_sKeyMask:
-                    value = "=".join(lValues[1:])
-                    return value
-                elif len(lValues) > 2:
-                    if "=".join(lValues[:-1]) == p_sKeyMask:
-                        value = lValues[-1]
-                        return value
-    return False # section not found
+    return _ini_read(p_sFile, 'get_key', p_sSection, p_sKeyMask)
 
 def ini_sect_set_key(p_sFile, p_sSection, p_sKeyMask, p_sNewValue):
-    if not os.path.isfile(p_sFile): return None
-    with open(p_sFile, "r+") as f:
-        p_bInSection = False
-        p_bFound = False
-        new_file = f.readlines()
-        f.seek(0) # rewind
-        for line in new_file:
-            lValues = clean_line(line)
-            if lValues[0].startswith('[') and lValues[0].endswith(']'):
-                if p_bInSection: p_bInSection = False
-                section = lValues[0].strip('[]')
-                if p_sSection == section: p_bInSection = True
-            if p_bInSection:
-                if str(p_sKeyMask) == lValues[0].strip():
-                    line = '%s=%s\n' % (str(p_sKeyMask), str(p_sNewValue))
-                    p_bFound = True
-                elif len(lValues) > 2:
-                    if "=".join(lValues[:-1]) == str(p_sKeyMask):
-                        line = '%s=%s\n' % (str(p_sKeyMask), str(p_sNewValue))
-                        p_bFound = True
-            f.write(line) # new line
-        f.truncate() # remove everything after the last write
-    ini_sect_clean_file(p_sFile)
-    return p_bFound
+    return _ini_edit(p_sFile, 'set_key', p_sSection, p_sKeyMask, p_sNewValue)
 
 def ini_sect_empty_section(p_sFile, p_sSection, p_bRemove = False):
-    if not os.path.isfile(p_sFile): return None
-    with open(p_sFile, "r+") as f:
-        p_bInSection = False
-        p_bFound = False
-        new_file = f.readlines()
-        f.seek(0) # rewind
-        for line in new_file:
-            lValues = clean_line(line)
-            if lValues[0].startswith('[') and lValues[0].endswith(']'):
-                if p_bInSection: p_bInSection = False
-                section = lValues[0].strip('[]')
-                if p_sSection == section: 
-                    if not p_bRemove:
-                        f.write(line + '\n')
-                    p_bFound = True
-                    p_bInSection = True
-            if p_bInSection: pass
-            else: f.write(line) # new line
-        f.truncate() # remove everything after the last write
-    ini_sect_clean_file(p_sFile)
-    return p_bFound
+    return _ini_edit(p_sFile, 'empty_section', p_sSection, p_bRemove)
 
 def ini_sect_add_key(p_sFile, p_sSection, p_sNewKey, p_sNewValue):
-    if not os.path.isfile(p_sFile): return None
-    ini_sect_create_section(p_sFile, p_sSection)
-    p_sNewKeyLine = str(p_sNewKey) + "=" + str(p_sNewValue)
-    with open(p_sFile, "r+") as f:
-        p_bInSection = False
-        p_bFound = False
-        new_file = f.readlines()
-        f.seek(0) # rewind
-        for line in new_file:
-            lValues = clean_line(line)
-            if lValues[0].startswith('[') and lValues[0].endswith(']'):
-                if p_bInSection: 
-                    f.write(p_sNewKeyLine + '\n')
-                    f.write('\n')
-                    p_bInSection = False
-                section = lValues[0].strip('[]')
-                if p_sSection == section: 
-                    p_bFound = True
-                    p_bInSection = True
-            if p_bInSection:
-                if lValues[0]: f.write(line)
-            else: f.write(line) # new line
-        if p_bInSection:
-            f.write(p_sNewKeyLine + '\n')
-            f.write('\n')
-        f.truncate() # remove everything after the last write
-    ini_sect_clean_file(p_sFile)
-    return p_bFound
+    return _ini_edit(p_sFile, 'add_key', p_sSection, p_sNewKey, p_sNewValue)
 
 def ini_set_check_section(p_sFile, p_sSection):
-    if not os.path.isfile(p_sFile): return None
-    with open(p_sFile, "r") as f:
-        p_bFound = False
-        for line in f:
-            lValues = clean_line(line)
-            if lValues[0].startswith('[') and lValues[0].endswith(']'):
-                section = lValues[0].strip('[]')
-                if p_sSection == section: 
-                    p_bFound = True
-                    break
-    return p_bFound
+    return _ini_read(p_sFile, 'has_section', p_sSection)
 
 def ini_sect_create_section(p_sFile, p_sSection):
-    if not os.path.isfile(p_sFile):
-        return None
-    if not ini_set_check_section(p_sFile, p_sSection):
-        with open(p_sFile, "a") as f:
-            line = '\n\n[' + p_sSection + ']\n'
-            f.write(line)
-        ini_sect_clean_file(p_sFile)
+    _ini_edit(p_sFile, 'create_section', p_sSection)
 
 def ini_sect_get_keys(p_sFile, p_sSection):
-    if not os.path.isfile(p_sFile): return None
-    p_lList = []
-    with open(p_sFile, "r") as f:
-        p_bInSection = False
-        p_bFound = False
-        for line in f:
-            lValues = clean_line(line)
-            if lValues[0].startswith('[') and lValues[0].endswith(']'):
-                if p_bInSection: p_bInSection = False
-                section = lValues[0].strip('[]')
-                if p_sSection == section: 
-                    p_bFound = True
-                    p_bInSection = True
-            if p_bInSection:
-                if not line.startswith(('#', '[')) and line.strip() and '=' in line: 
-                    key = lValues[0]
-                    value = "=".join(lValues[1:])
-                    p_lList.append([key, value])
-    p_lList.sort()
-    return p_lList
+    return _ini_read(p_sFile, 'get_keys', p_sSection)
 
 def compare_section(p_sFile, p_sSection, p_lList1):
-    p_lList1.sort()
-    p_lList2 = ini_sect_get_keys(p_sFile, p_sSection)
-    p_lList2.sort()
-    if len(p_lList1) != len(p_lList2): 
-        logging.info("WARNING: number of keys in [%s] doesn't match" % p_sSection)
-        return False
-    p_bCheck = True
-    for a, b in zip(p_lList1, p_lList2):
-        if a[0] != b[0] or a[1] != b[1]: 
-            logging.info("WARNING: [%s] | OK:%s=%s | WRONG:%s=%s" % \
-                        (p_sSection, a[0], a[1], b[0], b[1]))
-            p_bCheck = False
-    if p_bCheck: logging.info("Configuration is OK for %s" % p_sSection)
-    return p_bCheck
-
-def i2c_detect(p_lList):
+    doc = ini_document(p_sFile)
+    return doc.compare_section(p_sSection, p_lList1)
+
+I2C_BUS = 0
+I2C_DEV_PATH = "/dev/i2c-%i"
+I2C_CACHE = os.path.join(TMP_LAUNCHER_PATH, "CRT_I2CProbe.json")
+
+def _node_stamp(p_sNode):
+    """ Device node identity, changes if driver creates it again """
+    try: st = os.stat(p_sNode)
+    except OSError: return None
+    return [st.st_ino, st.st_rdev, st.st_ctime_ns]
+
+class i2c_probe(object):
+    """
+    Results of i2c address probes shared between processes through a
+    small json file in /dev/shm, checked against kernel boot_id and the
+    bus device node. Every address is probed just once, again only if
+    refresh is requested or /dev/i2c-X is created again. p_oBus opens
+    the bus, smbus.SMBus by default; any callable taking bus number and
+    returning an object with read_byte() and close() can replace it.
+    """
+    def __init__(self, p_iBus = I2C_BUS, p_oBus = None,
+                 p_sCache = I2C_CACHE, p_sBootID = BOOT_ID_PATH):
+        self.m_iBus = p_iBus
+        self.m_oBus = p_oBus        # None is smbus.SMBus
+        self.m_sCache = p_sCache
+        self.m_sBootID = p_sBootID
+        self.m_sNode = I2C_DEV_PATH % p_iBus
+        self.m_oLock = threading.Lock()
+        self.m_sBoot = None
+
+    def detect(self, p_lList, p_bRefresh = False):
+        """ Return True if any address of p_lList answers on the bus """
+        with self.m_oLock:
+            p_dCache = self._load_cache(p_bRefresh)
+            return self._probe(p_lList, p_dCache)
+
+    def _probe(self, p_lList, p_dCache):
+        p_dDevices = p_dCache['devices']
+        p_lProbe = []
+        for device in p_lList:
+            if str(device) in p_dDevices:
+                if p_dDevices[str(device)]: return True
+            else: p_lProbe.append(device)
+        if not p_lProbe: return False
+
+        try: bus = (self.m_oBus or smbus.SMBus)(self.m_iBus)
+        except:
+            logging.info("WARNING: can't connect to i2c%i" % self.m_iBus)
+            return False
+        p_bCheck = False
+        for device in p_lProbe:
+            try:
+                bus.read_byte(device)
+                p_bCheck = True
+            except:
+                pass
+            p_dDevices[str(device)] = p_bCheck
+            if p_bCheck: break
+        bus.close()
+        self._save_cache(p_dCache)
+        return p_bCheck
+
+    def _boot_id(self):
+        if self.m_sBoot is None:
+            try:
+                with open(self.m_sBootID, "r") as f: self.m_sBoot = f.read().strip()
+            except Exception: self.m_sBoot = ""
+        return self.m_sBoot
+
+    def _load_cache(self, p_bRefresh):
+        p_dCache = {'boot_id': self._boot_id(), 'bus': self.m_iBus,
+                    'node': _node_stamp(self.m_sNode), 'devices': {}}
+        if p_bRefresh or not p_dCache['boot_id']: return p_dCache
+        try:
+            with open(self.m_sCache, "r") as f: p_dSaved = json.load(f)
+        except Exception: return p_dCache
+        for key in ('boot_id', 'bus', 'node'):
+            if p_dSaved.get(key) != p_dCache[key]: return p_dCache
+        p_dCache['devices'] = p_dSaved.get('devices', {})
+        return p_dCache
+
+    def _save_cache(self, p_dCache):
+        if not p_dCache['boot_id']: return
+        p_sTemp = self.m_sCache + ".%i" % os.getpid()
+        try:
+            with open(p_sTemp, "w") as f: json.dump(p_dCache, f)
+            os.replace(p_sTemp, self.m_sCache)
+        except Exception as e:
+            logging.info("WARNING: can't save i2c probes: %s" % e)
+            try: os.remove(p_sTemp)
+            except OSError: pass
+
+I2C_PROBE = i2c_probe()
+
+def i2c_detect(p_lList, p_bRefresh = False):
     """ 
     This function try to detect in i2c bus 0 if any i2c device is 
     connected looking for addreses.
     """
-    p_bCheck = False
-    try: bus = smbus.SMBus(0)
-    except: 
-        logging.info("WARNING: can't connect to i2c0")
-        return p_bCheck
-    for device in p_lList:
-        try:
-            bus.read_byte(device)
-            p_bCheck = True
-            break
-        except:
-            pass
-    bus.close()
-    bus = None
-    return p_bCheck
+    return I2C_PROBE.detect(p_lList, p_bRefresh)
+
+SYNC_SUDO = ["sudo"]
+SYNC_COPY = 'rc=0; while [ $# -gt 0 ]; do { cp --preserve=timestamps "$1" "$2" ' + \
+            '&& if [ -n "$3" ]; then chmod "+$3" "$2"; fi; } || rc=1; ' + \
+            'shift 3; done; exit $rc'
+
+def _file_hash(p_sFile):
+    p_oHash = hashlib.sha1()
+    with open(p_sFile, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""): p_oHash.update(chunk)
+    return p_oHash.digest()
+
+def _needs_sync(p_sFile1, p_sFile2):
+    """
+    Files of different size differ, same size and mtime are taken as
+    equal (copies keep source mtime); only when size is equal but mtime
+    is not contents are hashed.
+    """
+    try:
+        st1 = os.stat(p_sFile1)
+        st2 = os.stat(p_sFile2)
+    except OSError: return True
+    if st1.st_size != st2.st_size: return True
+    if st1.st_mtime_ns == st2.st_mtime_ns: return False
+    try: return _file_hash(p_sFile1) != _file_hash(p_sFile2)
+    except OSError: return True
+
+def sync_file_list(p_lFiles):
+    """
+    Install files only if destination differs from source. p_lFiles is
+    a list of (source, destination, rights) like sync_files() args.
+    All copies are done by a single sudo shell. Return list of synced
+    destinations.
+    """
+    p_lArgs = []
+    p_lSync = []
+    for p_sFile1, p_sFile2, p_schmod in p_lFiles:
+        if not _needs_sync(p_sFile1, p_sFile2): continue
+        logging.info("WARNING: synchronizing %s " % p_sFile2)
+        p_lArgs += [p_sFile1, p_sFile2, p_schmod or ""]
+        p_lSync.append((p_sFile1, p_sFile2))
+    if p_lArgs:
+        p_lCommand = SYNC_SUDO + ["sh", "-c", SYNC_COPY, "sync"] + p_lArgs
+        if subprocess.call(p_lCommand):
+            logging.info("ERROR: can't synchronize some files")
+            # keep only the ones really installed
+            p_lSync = [sync for sync in p_lSync if not _needs_sync(*sync)]
+    return [sync[1] for sync in p_lSync]
 
 def sync_files(p_sFile1, p_sFile2, p_schmod = None):
     # p_sFile1 = source file
     # p_sFile2 = destination file
     # p_schmod = file rigths
-    p_bSync = False
-    try: 
-        if not filecmp.cmp(p_sFile1, p_sFile2): p_bSync = True
-    except:
-        p_bSync = True
-    if p_bSync:
-        logging.info("WARNING: synchronizing %s " % p_sFile2)
-        os.system('sudo cp \"%s\" \"%s\"' % (p_sFile1, p_sFile2))
-        if p_schmod:
-            logging.info("INFO: changing permissions to file")
-            os.system('chmod +%s \"%s\"' % (p_schmod, p_sFile2))
+    return bool(sync_file_list([(p_sFile1, p_sFile2, p_schmod)]))
 
 class CRTdaemon(object):
     def __init__(self):
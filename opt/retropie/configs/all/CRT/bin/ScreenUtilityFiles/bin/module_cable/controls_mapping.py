@@ -24,7 +24,7 @@ with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 """
 
-import os, sys, logging, re
+import os, sys, io, logging, re
 import xml.etree.ElementTree as ET
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -34,8 +34,135 @@ sys.path.append(MODULES_PATH)
 
 from launcher_module.core_paths import *
 from launcher_module.file_helpers import *
+from module_cable.cable_utils import sudo_write
 
 ADVMAMECFG_FILE = os.path.join(RETROPIE_CFG_PATH, "mame-advmame/advmame.rc")
+XINMO_CFG = "usbhid.quirks=0x16c0:0x05e1:0x040"
+
+def _ini_key(p_sLine):
+    """ Return [key, value] of a line like 'key = "value"', '#' ignored """
+    line = p_sLine.strip().replace('=',' ').strip(' #')
+    lValues = re.sub(r' +', " ", line).split(' ')
+    return [lValues[0], " ".join(lValues[1:])]
+
+def _replace_file(p_sFile, p_sText):
+    """
+    Write file in place, so owner, mode and symlinks are kept, or with
+    sudo_write() if user can't write there. Return True if written.
+    """
+    p_sReal = os.path.realpath(p_sFile)
+    if not os.access(os.path.dirname(p_sReal), os.W_OK) or \
+       (os.path.exists(p_sReal) and not os.access(p_sReal, os.W_OK)):
+        return sudo_write(p_sReal, p_sText)
+    try:
+        with open(p_sFile, "w") as f: f.write(p_sText)
+        return True
+    except Exception as e:
+        logging.info("ERROR: can't write %s: %s" % (p_sFile, e))
+        return False
+
+class mapping_files(object):
+    """
+    Target state of the files touched by input mappings. Every file is
+    read once and edited in memory as ini lines, xml tree or plain text;
+    commit() writes only files whose content differs from disk, each
+    one with a single write. Applying same mapping again gives
+    same content, so a second run writes nothing.
+    """
+    def __init__(self):
+        self.m_dFiles = {}  # file: {'old': text on disk, 'new': edited}
+
+    def _file(self, p_sFile):
+        if not p_sFile in self.m_dFiles:
+            text = None
+            if os.path.isfile(p_sFile):
+                with open(p_sFile, "r") as f: text = f.read()
+            self.m_dFiles[p_sFile] = {'old': text, 'new': None}
+        return self.m_dFiles[p_sFile]
+
+    def exists(self, p_sFile):
+        data = self._file(p_sFile)
+        return data['old'] is not None or data['new'] is not None
+
+    def text(self, p_sFile):
+        """ Current text of file in memory, None if doesn't exist """
+        data = self._file(p_sFile)
+        return self._render(data) if data['new'] is not None else data['old']
+
+    def set_text(self, p_sFile, p_sText):
+        self._file(p_sFile)['new'] = p_sText
+
+    def lines(self, p_sFile):
+        """ Editable list of lines with line endings, None if no file """
+        data = self._file(p_sFile)
+        if not isinstance(data['new'], list):
+            text = self.text(p_sFile)
+            if text is None: return None
+            data['new'] = text.splitlines(True)
+        return data['new']
+
+    def tree(self, p_sFile, p_oDefault = None):
+        """
+        Editable ElementTree of a xml file; if file doesn't exist
+        p_oDefault() creates it, otherwise None is returned.
+        """
+        data = self._file(p_sFile)
+        if not isinstance(data['new'], ET.ElementTree):
+            text = self.text(p_sFile)
+            if text is not None: data['new'] = ET.ElementTree(ET.fromstring(text))
+            elif p_oDefault: data['new'] = p_oDefault()
+            else: return None
+        return data['new']
+
+    def ini_get(self, p_sFile, p_sFindMask):
+        """
+        This function will return two values:
+        p_lCheck = [value0, value1]:
+            value0 = INI value
+            value1 = Complete line where ini is located
+        """
+        for line in self.lines(p_sFile) or []:
+            key, value = _ini_key(line)
+            if p_sFindMask == key: return [value, line.strip()]
+        logging.info('WARNING: %s NOT found' % p_sFindMask)
+        return [None, None]
+
+    def ini_set(self, p_sFile, p_sFindMask, p_sNewLine):
+        """ Replace all lines of p_sFindMask or add it at the end """
+        p_lLines = self.lines(p_sFile)
+        if p_lLines is None: return
+        p_bFound = False
+        for i, line in enumerate(p_lLines):
+            if _ini_key(line)[0] == p_sFindMask:
+                p_lLines[i] = p_sNewLine + "\n"
+                p_bFound = True
+        if not p_bFound: p_lLines.append(p_sNewLine + "\n")
+
+    def _render(self, p_dData):
+        new = p_dData['new']
+        if isinstance(new, list): return "".join(new)
+        if isinstance(new, ET.ElementTree):
+            buffer = io.BytesIO()
+            new.write(buffer, encoding='UTF-8')
+            return buffer.getvalue().decode('utf-8')
+        return new
+
+    def changed(self):
+        """ Return files whose content in memory differs from disk """
+        return [file for file, data in self.m_dFiles.items()
+                if data['new'] is not None and \
+                self._render(data) != data['old']]
+
+    def commit(self):
+        """ Write changed files, return the list of written ones """
+        p_lWritten = []
+        for file in self.changed():
+            text = self._render(self.m_dFiles[file])
+            if not _replace_file(file, text): continue
+            logging.info("INFO: written %s" % file)
+            self.m_dFiles[file] = {'old': text, 'new': None}
+            p_lWritten.append(file)
+        return p_lWritten
 
 class CTRLSMgmt(object):
     """
@@ -186,42 +313,54 @@ class CTRLSMgmt(object):
         if p_bCheck: return self.m_bKBDEna
 
         p_bCheck = True
-        if self._inputs_retroarch_ctrls(self.m_lRArchKBP1, True, False): p_bCheck = False
-        if self._inputs_retroarch_ctrls(self.m_lRArchKBP2, True, False): p_bCheck = False
-        if self._inputs_retroarch_hotkeys(self.m_lRarchKBDS, True, False): p_bCheck = False
-        if self._inputs_advmame_keys(self.m_lADVMAMEKBDUI, True, False): p_bCheck = False
-        if not self._inputs_emulationstation_ctrls(True, False): p_bCheck = False
+        p_oFiles = mapping_files()
+        if self._inputs_retroarch_ctrls(p_oFiles, self.m_lRArchKBP1, True, False): p_bCheck = False
+        if self._inputs_retroarch_ctrls(p_oFiles, self.m_lRArchKBP2, True, False): p_bCheck = False
+        if self._inputs_retroarch_hotkeys(p_oFiles, self.m_lRarchKBDS, True, False): p_bCheck = False
+        if self._inputs_advmame_keys(p_oFiles, self.m_lADVMAMEKBDUI, True, False): p_bCheck = False
+        if not self._inputs_emulationstation_ctrls(p_oFiles, True, False): p_bCheck = False
         if not p_bCheck: logging.info("INFO: some MAME keyboard controls config is missing")
         self.m_bKBDEna = p_bCheck
         return p_bCheck
 
     def pi2jamma_enable_controls(self):
         logging.info("INFO: enabling keyboard on configuration")
-        self.inputs_retroarch_pi2jamma_enable()
-        self.inputs_emulationstation_pi2jamma_enable()
-        self.inputs_advmame_pi2jamma_enable()
-        return self.m_bChange
+        p_oFiles = mapping_files()
+        self.inputs_retroarch_pi2jamma_enable(p_oFiles)
+        self.inputs_emulationstation_pi2jamma_enable(p_oFiles)
+        self.inputs_advmame_pi2jamma_enable(p_oFiles)
+        return self._commit(p_oFiles)
 
     def pi2jamma_disable_controls(self):
         logging.info("INFO: disabling keyboard on configuration")
-        self.inputs_retroarch_pi2jamma_disable()
-        self.inputs_emulationstation_pi2jamma_disable()
-        self.inputs_advmame_pi2jamma_disable()
+        p_oFiles = mapping_files()
+        self.inputs_retroarch_pi2jamma_disable(p_oFiles)
+        self.inputs_emulationstation_pi2jamma_disable(p_oFiles)
+        self.inputs_advmame_pi2jamma_disable(p_oFiles)
+        return self._commit(p_oFiles)
+
+    def _commit(self, p_oFiles):
+        """ Write all changed files at once, return True if any changed """
+        self.m_bChange = bool(p_oFiles.commit())
         return self.m_bChange
 
-    def inputs_retroarch_pi2jamma_enable(self):
+    def inputs_retroarch_pi2jamma_enable(self, p_oFiles = None):
         """ All actions to enable pi2jamma in retroarch """
-        self._inputs_retroarch_ctrls(self.m_lRArchKBP1, True)
-        self._inputs_retroarch_ctrls(self.m_lRArchKBP2, True)
-        self._inputs_retroarch_hotkeys(self.m_lRarchKBDS, True)
+        p_oMap = p_oFiles or mapping_files()
+        self._inputs_retroarch_ctrls(p_oMap, self.m_lRArchKBP1, True)
+        self._inputs_retroarch_ctrls(p_oMap, self.m_lRArchKBP2, True)
+        self._inputs_retroarch_hotkeys(p_oMap, self.m_lRarchKBDS, True)
+        if not p_oFiles: self._commit(p_oMap)
 
-    def inputs_retroarch_pi2jamma_disable(self):
+    def inputs_retroarch_pi2jamma_disable(self, p_oFiles = None):
         """ All actions to enable pi2jamma in retroarch """
-        self._inputs_retroarch_ctrls(self.m_lRArchKBP1DF, True)
-        self._inputs_retroarch_ctrls(self.m_lRArchKBP2, False)
-        self._inputs_retroarch_hotkeys(self.m_lRarchKBDS, False)
+        p_oMap = p_oFiles or mapping_files()
+        self._inputs_retroarch_ctrls(p_oMap, self.m_lRArchKBP1DF, True)
+        self._inputs_retroarch_ctrls(p_oMap, self.m_lRArchKBP2, False)
+        self._inputs_retroarch_hotkeys(p_oMap, self.m_lRarchKBDS, False)
+        if not p_oFiles: self._commit(p_oMap)
 
-    def _inputs_retroarch_ctrls(self, p_lInputs, p_bEnable, p_bEdit = True):
+    def _inputs_retroarch_ctrls(self, p_oFiles, p_lInputs, p_bEnable, p_bEdit = True):
         """
         This function enable or disable keyboard controls for pi2jamma in
         main retroarch.cfg. If input are not defined will be created.
@@ -230,29 +369,29 @@ class CTRLSMgmt(object):
         p_bEnable = False; Will disable keyboard inputs commenting line
         """
         p_bCheck = False
-        if not os.path.exists(RA_CFG_FILE):
+        if not p_oFiles.exists(RA_CFG_FILE):
             return
         for key in p_lInputs:
-            p_Return = self._ini_get(RA_CFG_FILE, key['line'])
+            p_Return = p_oFiles.ini_get(RA_CFG_FILE, key['line'])
             line = '%s = "%s"' % (key['line'], key['value'])
             if not p_bEnable:
                 line = '# ' + line
             if not p_Return[1]:
                 if p_bEdit:
-                    add_line(RA_CFG_FILE, line)
+                    p_oFiles.ini_set(RA_CFG_FILE, key['line'], line)
                     logging.info("INFO: added missed line in ra cfg: %s" % line)
                 p_bCheck = True
             elif not p_bEnable and p_Return[1][0] == '#': pass
             elif p_Return[1] != line:
                 if p_bEdit:
-                    modify_line(RA_CFG_FILE, key['line'] + ' ', line)
+                    p_oFiles.ini_set(RA_CFG_FILE, key['line'], line)
                     logging.info("INFO: changed line in ra cfg: %s" % p_Return[1])
                     logging.info("INFO: to -> %s" % line)
                 p_bCheck = True
 
         return p_bCheck
 
-    def _inputs_retroarch_hotkeys(self, p_lInputs, p_bEnable, p_bEdit = True):
+    def _inputs_retroarch_hotkeys(self, p_oFiles, p_lInputs, p_bEnable, p_bEdit = True):
         """
         This function enable or disable some retroarch hotkey controls
         to avoid keyboard keystrokes conflicts.
@@ -260,74 +399,82 @@ class CTRLSMgmt(object):
         p_bEnable = False   Enable default ra hotkeys (pi2jamma disabled)
         """
         p_bCheck = False
-        if not os.path.exists(RA_CFG_FILE):
+        if not p_oFiles.exists(RA_CFG_FILE):
             return
         for key in p_lInputs:
-            p_Return = self._ini_get(RA_CFG_FILE, key['line'])
+            p_Return = p_oFiles.ini_get(RA_CFG_FILE, key['line'])
             line = key['line'] + " = \""
             if not p_bEnable: line += key['value'] + "\""
             else: line += key['dis'] + "\""
 
             if not p_Return[1]:
                 if p_bEdit:
-                    add_line(RA_CFG_FILE, line)
+                    p_oFiles.ini_set(RA_CFG_FILE, key['line'], line)
                     logging.info("INFO: added missed line in ra cfg: %s" % line)
                 p_bCheck = True
             elif p_Return[1] != line:
                 if p_bEdit:
-                    modify_line(RA_CFG_FILE, key['line'] + ' ', line)
+                    p_oFiles.ini_set(RA_CFG_FILE, key['line'], line)
                     logging.info("INFO: changed line in ra cfg: %s" % p_Return[1])
                     logging.info("INFO: to -> %s" % line)
                 p_bCheck = True
 
         return p_bCheck
 
-    def inputs_advmame_pi2jamma_enable(self):
+    def inputs_advmame_pi2jamma_enable(self, p_oFiles = None):
         """ All actions to enable pi2jamma in advmame """
-        self._inputs_advmame_keys(self.m_lADVMAMEKBDUI, True)
+        p_oMap = p_oFiles or mapping_files()
+        self._inputs_advmame_keys(p_oMap, self.m_lADVMAMEKBDUI, True)
+        if not p_oFiles: self._commit(p_oMap)
 
-    def inputs_advmame_pi2jamma_disable(self):
+    def inputs_advmame_pi2jamma_disable(self, p_oFiles = None):
         """ All actions to enable pi2jamma in advmame """
-        self._inputs_advmame_keys(self.m_lADVMAMEKBDUI, False)
+        p_oMap = p_oFiles or mapping_files()
+        self._inputs_advmame_keys(p_oMap, self.m_lADVMAMEKBDUI, False)
+        if not p_oFiles: self._commit(p_oMap)
 
-    def _inputs_advmame_keys(self, p_lInputs, p_bEnable, p_bEdit = True):
+    def _inputs_advmame_keys(self, p_oFiles, p_lInputs, p_bEnable, p_bEdit = True):
         """
         This function some advmame hotkey controls like UI select.
         p_bEnable = True    Enable for pi2jamma keyboard inputs
         p_bEnable = False   Disable for pi2jamma keyboard inputs
         """
         p_bCheck = False
-        if not os.path.exists(ADVMAMECFG_FILE):
+        if not p_oFiles.exists(ADVMAMECFG_FILE):
             return
         for key in p_lInputs:
-            p_Return = self._ini_get(ADVMAMECFG_FILE, key['line'])
+            p_Return = p_oFiles.ini_get(ADVMAMECFG_FILE, key['line'])
             line = key['line'] + " "
             if p_bEnable: line += key['dis']
             else: line += key['value']
 
             if not p_Return[1]:
                 if p_bEdit:
-                    add_line(ADVMAMECFG_FILE, line)
+                    p_oFiles.ini_set(ADVMAMECFG_FILE, key['line'], line)
                     logging.info("INFO: added missed line in advmame cfg: %s" % line)
                 p_bCheck = True
             elif p_Return[1] != line:
                 if p_bEdit:
-                    modify_line(ADVMAMECFG_FILE, key['line'] + ' ', line)
+                    p_oFiles.ini_set(ADVMAMECFG_FILE, key['line'], line)
                     logging.info("INFO: changed line in advmame cfg: %s" % p_Return[1])
                     logging.info("INFO: to -> %s" % line)
                 p_bCheck = True
 
         return p_bCheck
 
-    def inputs_emulationstation_pi2jamma_enable(self):
+    def inputs_emulationstation_pi2jamma_enable(self, p_oFiles = None):
         """ All actions to enable pi2jamma in emulationstation """
-        self._inputs_emulationstation_ctrls(True)
+        p_oMap = p_oFiles or mapping_files()
+        self._inputs_emulationstation_ctrls(p_oMap, True)
+        if not p_oFiles: self._commit(p_oMap)
 
-    def inputs_emulationstation_pi2jamma_disable(self):
+    def inputs_emulationstation_pi2jamma_disable(self, p_oFiles = None):
         """ All actions to disable pi2jamma in emulationstation """
-        self._inputs_emulationstation_ctrls(False)
+        p_oMap = p_oFiles or mapping_files()
+        self._inputs_emulationstation_ctrls(p_oMap, False)
+        if not p_oFiles: self._commit(p_oMap)
 
-    def _inputs_emulationstation_ctrls(self, p_bEnable, p_bEdit = True):
+    def _inputs_emulationstation_ctrls(self, p_oFiles, p_bEnable, p_bEdit = True):
         """
         This function clean or install keyboard config for pi2jamma
         in es_input.cfg. Also will try to backup and/or restore any user's
@@ -338,82 +485,70 @@ class CTRLSMgmt(object):
                             any pre-existent custom keyboard config.
         """
         p_bCheck = False
-        p_bXMLSave = False
         p_lCtmDev = []
         p_lBckDev = []
         p_lP2JDev = []
 
-        # create emulationstation 'es_input.cfg' file if doesn't exist
-        if not os.path.exists(ES_CONTROLS_FILE):
-            self._emulationstation_create_inputs_file()
+        # create emulationstation 'es_input.cfg' in memory if doesn't exist
+        p_oDefault = self._emulationstation_inputs_tree if p_bEdit else None
+        tree = p_oFiles.tree(ES_CONTROLS_FILE, p_oDefault)
+        if tree is None: return p_bCheck
+
         # analize xml configurations
-        else:
-            tree = ET.parse(ES_CONTROLS_FILE)
-            root = tree.getroot()
-            p_lClean = []
-            for device in root:
-                if device.attrib['type'].lower() == "keyboard":
-                    if device.attrib['deviceGUID'] == 'disabled':
-                        p_lBckDev.append(device)
-                    else:
-                        if 'class' in device.attrib:
-                            if device.attrib['class'].lower() == "pi2jamma":
-                                p_bCheck = True
-                                p_lP2JDev.append(device)
-                            elif device.attrib['class'].lower() == "custom":
-                                p_lCtmDev.append(device)
-                        else:
+        root = tree.getroot()
+        for device in root:
+            if device.attrib['type'].lower() == "keyboard":
+                if device.attrib['deviceGUID'] == 'disabled':
+                    p_lBckDev.append(device)
+                else:
+                    if 'class' in device.attrib:
+                        if device.attrib['class'].lower() == "pi2jamma":
+                            p_bCheck = True
+                            p_lP2JDev.append(device)
+                        elif device.attrib['class'].lower() == "custom":
                             p_lCtmDev.append(device)
-
-            # always clean pi2jamma config even if already exist
-            # will be applied again at the end if p_bEnable = True
-            for device in p_lP2JDev:
-                root.remove(device)
-                p_bXMLSave = True
-
-            if p_bEnable:
-                if len(p_lCtmDev) > 1:
-                    for device in p_lCtmDev:
-                        root.remove(device)
-                        p_bXMLSave = True
-                elif len(p_lCtmDev) == 1:
-                    for device in p_lBckDev:
-                        root.remove(device)
-                    p_lCtmDev[0].attrib['class'] = 'custom'
-                    p_lCtmDev[0].attrib['deviceGUID'] = 'disabled'
-                    p_lCtmDev[0].attrib['deviceName'] = 'Keyboard'
-                    p_lCtmDev[0].attrib['type'] = 'keyboard'
-                    p_bXMLSave = True
-            else:
-                if len(p_lBckDev) > 1:
-                    for device in p_lBckDev:
-                        root.remove(device)
-                        p_bXMLSave = True
-                    for device in p_lCtmDev:
-                        root.remove(device)
-                        p_bXMLSave = True
-                elif len(p_lBckDev) == 1:
-                    for device in p_lCtmDev:
-                        root.remove(device)
-                    p_lBckDev[0].attrib['class'] = 'custom'
-                    p_lBckDev[0].attrib['deviceGUID'] = '-1'
-                    p_lBckDev[0].attrib['deviceName'] = 'Keyboard'
-                    p_lBckDev[0].attrib['type'] = 'keyboard'
-                    p_bXMLSave = True
-
-            # save 'es_input.cfg' only if any change happens
-            if p_bXMLSave and p_bEdit:
-                self.m_bChange = True
-                tree.write(ES_CONTROLS_FILE, encoding='UTF-8')
-
-            # once xml is reorganized, create clean pi2jamma config
-            if p_bEnable and p_bEdit:
-                self.m_bChange = True
-                self.__inputs_emulationstation_ctrls_create(self.m_lESP2JInputs)
+                    else:
+                        p_lCtmDev.append(device)
+        if not p_bEdit: return p_bCheck
+
+        # always clean pi2jamma config even if already exist
+        # will be applied again at the end if p_bEnable = True,
+        # file is written only if final xml is not the same
+        for device in p_lP2JDev:
+            root.remove(device)
+
+        if p_bEnable:
+            if len(p_lCtmDev) > 1:
+                for device in p_lCtmDev:
+                    root.remove(device)
+            elif len(p_lCtmDev) == 1:
+                for device in p_lBckDev:
+                    root.remove(device)
+                p_lCtmDev[0].attrib['class'] = 'custom'
+                p_lCtmDev[0].attrib['deviceGUID'] = 'disabled'
+                p_lCtmDev[0].attrib['deviceName'] = 'Keyboard'
+                p_lCtmDev[0].attrib['type'] = 'keyboard'
+        else:
+            if len(p_lBckDev) > 1:
+                for device in p_lBckDev:
+                    root.remove(device)
+                for device in p_lCtmDev:
+                    root.remove(device)
+            elif len(p_lBckDev) == 1:
+                for device in p_lCtmDev:
+                    root.remove(device)
+                p_lBckDev[0].attrib['class'] = 'custom'
+                p_lBckDev[0].attrib['deviceGUID'] = '-1'
+                p_lBckDev[0].attrib['deviceName'] = 'Keyboard'
+                p_lBckDev[0].attrib['type'] = 'keyboard'
+
+        # once xml is reorganized, create clean pi2jamma config
+        if p_bEnable:
+            self.__inputs_emulationstation_ctrls_create(root, self.m_lESP2JInputs)
 
         return p_bCheck
 
-    def _emulationstation_create_inputs_file(self):
+    def _emulationstation_inputs_tree(self):
         root = ET.Element("inputList")
         root.text = "\n  "
         p_sNewAction = ET.Element("inputAction")
@@ -425,15 +560,12 @@ class CTRLSMgmt(object):
         p_sNewCommand.text += "/scripts/inputconfiguration.sh"
         p_sNewCommand.tail = "\n  "
         root.append(p_sNewAction)
-        tree = ET.ElementTree(root)
-        tree.write(ES_CONTROLS_FILE, encoding='UTF-8')
+        return ET.ElementTree(root)
 
-    def __inputs_emulationstation_ctrls_create(self, p_lESInputs):
+    def __inputs_emulationstation_ctrls_create(self, p_oRoot, p_lESInputs):
         """ Create keyboard inputs for manage EmulationStation"""
         # 1 tab = 2 x spaces
         # \n    = new line
-        tree = ET.parse(ES_CONTROLS_FILE)
-        root = tree.getroot()
         p_sNewDevice = ET.Element("inputConfig")
         p_sNewDevice.set("deviceGUID", "-1")
         p_sNewDevice.set("deviceName", "Keyboard")
@@ -447,111 +579,36 @@ class CTRLSMgmt(object):
                 p_sNewAtb.set(attrib, input[attrib])
                 p_sNewAtb.tail = "\n    "
         p_sNewDevice[-1].tail = "\n  "  # change last atb tab
-        if len(root) > 0:               # at least one element under root
-            root[-1].tail = "\n  "      # Edit the previous element's tail
-        root.append(p_sNewDevice)       # Add the element to the tree.
-        tree.write(ES_CONTROLS_FILE, encoding='UTF-8')
-
-    def _ini_get(self, p_sFile, p_sFindMask):
-        """
-        This function will return three values:
-        p_lCheck = [value0, value1, value2]:
-            value0 = True or False; True if ini value was found
-            value1 = True or False; True if line is commented with '#'
-            value2 = String; Value of requested ini
-        """
-        p_lCheck = [False, False, None]
-        if not os.path.isfile(p_sFile):
-            logging.info('WARNING: %s NOT found' % p_sFile)
-            return p_lCheck
-        with open(p_sFile, "r") as f:
-            for line in f:
-                line = line.strip().replace('=',' ').replace(' or ','or')
-                lValues = line.strip().replace('# ','#').split(' ')
-                if p_sFindMask == lValues[0].strip('# '):
-                    p_lCheck[0] = True
-                    if line[:1] == '#':
-                        p_lCheck[1] = True
-                        logging.info('WARNING: %s is ' % p_sFindMask + \
-                                     'commented or without value')
-                    try:
-                        p_lCheck[2] = lValues[1].strip('" ')
-                        logging.info('INFO: %s=' % p_sFindMask + \
-                                      '%s' % p_lCheck[2])
-                    except:
-                        logging.info('WARNING: %s has ' % p_sFindMask + \
-                                     'not value')
-
-        if not p_lCheck[0]:
-            logging.info('WARNING: %s NOT found' % p_sFindMask)
-        return p_lCheck
-
-    def _ini_get(self, p_sFile, p_sFindMask):
-        """
-        This function will return three values:
-        p_lCheck = [value0, value1, value2]:
-            value0 = INI value
-            value1 = Complete line where ini is located
-        """
-        p_lCheck = [None, None]
-        if not os.path.isfile(p_sFile):
-            logging.info('WARNING: %s NOT found' % p_sFile)
-            return p_lCheck
-        with open(p_sFile, "r") as f:
-            for line in f:
-                ini_line = line.strip()
-                line = line.replace('=',' ').strip(' #')
-                line = re.sub(r' +', " ", line)
-                lValues = line.split(' ')
-                if p_sFindMask == lValues[0]:
-                    p_lCheck[0] = " ".join(lValues[1:])
-                    p_lCheck[1] = ini_line
-                    return p_lCheck
-        logging.info('WARNING: %s NOT found' % p_sFindMask)
-        return p_lCheck
+        if len(p_oRoot) > 0:            # at least one element under root
+            p_oRoot[-1].tail = "\n  "   # Edit the previous element's tail
+        p_oRoot.append(p_sNewDevice)    # Add the element to the tree.
 
     def check_xinmo(self):
         """ Check status of USB Xin-Mo Controller fix for 2 players """
-        sXinMoCfg = "usbhid.quirks=0x16c0:0x05e1:0x040"
         with open(RASP_CMDLINE_FILE, "r") as f:
             new_file = f.read().replace('\n', ' ').strip()
-            f.close()
-        if sXinMoCfg in new_file: return True
+        if XINMO_CFG in new_file: return True
         return False
 
     def xinmo_usb_driver_enable(self):
         """ Enable USB Xin-Mo Controller fix for 2 players """
         if self.check_xinmo(): return
-        sXinMoCfg = "usbhid.quirks=0x16c0:0x05e1:0x040"
-        sTempFile = generate_random_temp_filename(RASP_CMDLINE_FILE)
-        os.system('cp %s %s' %(RASP_CMDLINE_FILE, sTempFile))
-        with open(sTempFile, "r+") as f:
-            new_file = f.read().replace('\n', ' ').strip()
-            new_file = line = re.sub(r' +', " ", new_file)
-            new_file += " " + sXinMoCfg
-            f.seek(0)
-            f.truncate(0)
-            f.write(new_file)
-            f.close()
-        os.system('sudo cp %s %s' %(sTempFile, RASP_CMDLINE_FILE))
-        os.system('rm %s' % sTempFile)
+        self._xinmo_usb_driver(True)
 
     def xinmo_usb_driver_disable(self):
         """ Disable USB Xin-Mo Controller fix for 2 players """
         if not self.check_xinmo(): return
-        sXinMoCfg = "usbhid.quirks=0x16c0:0x05e1:0x040"
-        sTempFile = generate_random_temp_filename(RASP_CMDLINE_FILE)
-        os.system('cp %s %s' %(RASP_CMDLINE_FILE, sTempFile))
-        with open(sTempFile, "r+") as f:
-            new_file = f.read().replace('\n', ' ').strip()
-            new_file = new_file.replace(sXinMoCfg, '')
-            new_file = line = re.sub(r' +', " ", new_file)
-            f.seek(0)
-            f.truncate(0)
-            f.write(new_file)
-            f.close()
-        os.system('sudo cp %s %s' %(sTempFile, RASP_CMDLINE_FILE))
-        os.system('rm %s' % sTempFile)
+        self._xinmo_usb_driver(False)
+
+    def _xinmo_usb_driver(self, p_bEnable):
+        """ cmdline.txt must be a single line, written with sudo """
+        p_oFiles = mapping_files()
+        new_file = p_oFiles.text(RASP_CMDLINE_FILE)
+        if new_file is None: return False
+        new_file = new_file.replace('\n', ' ').replace(XINMO_CFG, '').strip()
+        if p_bEnable: new_file += " " + XINMO_CFG
+        p_oFiles.set_text(RASP_CMDLINE_FILE, re.sub(r' +', " ", new_file))
+        return self._commit(p_oFiles)
 
     def OLD_xinmo_usb_driver_enable(self):
         sXinMoCfg = "usbhid.quirks=0x16c0:0x05e1:0x040"
@@ -26,7 +26,7 @@ with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 import os, sys, traceback, re
 import time, subprocess
-import logging
+import logging, threading
 
 sys.dont_write_bytecode = True
 
@@ -36,14 +36,9 @@ from main_paths import MODULES_PATH
 sys.path.append(MODULES_PATH)
 
 from launcher_module.core_paths import TMP_LAUNCHER_PATH, RASP_BOOTCFG_FILE
-from module_cable.cable_utils import ini_sect_clean_file, ini_sect_get_key, \
-                                     ini_sect_set_key, ini_sect_empty_section, \
-                                     ini_sect_add_key, ini_set_check_section, \
-                                     ini_sect_create_section, ini_sect_get_keys, \
-                                     ini_outofsect_get_key
-from launcher_module.file_helpers import ini_getlist, generate_random_temp_filename, \
-                                         remove_line, remove_file, touch_file, ini_get, \
-                                         md5_file
+from module_cable.cable_utils import ini_document
+from launcher_module.file_helpers import remove_file
+from launcher_module.sys_facts import SYSFACTS, file_stamp
 
 LOG_PATH = os.path.join(TMP_LAUNCHER_PATH, "CRT_OCManager.log")
 EXCEPTION_LOG = os.path.join(TMP_LAUNCHER_PATH, "backtrace.log")
@@ -59,6 +54,7 @@ class OCMNGR(object):
                    'desc'    : 'Not Compatible',
                    'recval'  : {},
                    'values'  : {},
+                   'allowed' : {},
                    'config'  : {},
                   }
 
@@ -67,8 +63,8 @@ class OCMNGR(object):
     m_bOCEnabled = None
     m_bRPIComp = None
 
-    m_sMD5_Prev  = ""
-    m_sTemp = ""        # temp file
+    m_oCfgStamp  = None # config.txt (mtime, size) of loaded values
+    m_oDoc = None       # config.txt being edited
     
     def __init__(self):
         self.__temp()
@@ -77,22 +73,12 @@ class OCMNGR(object):
         self.clean_oc_options()
         
     def create_rpi_config(self):
-        p_lProfiles = [self.load_profile_0, self.load_profile_1,
-                       self.load_profile_2]
-        p_bProfFound = False
         self.get_rpi_id()
-        for pf in p_lProfiles:
-            p_lList = {}
-            p_lList = pf()
-            hwd = self.m_sRPIModel
-            if len(self.m_sRPIModel) > 6:
-                hwd = self.m_sRPIModel[-6:]
-            if hwd in p_lList['id']:
-                p_bProfFound = True
-                self.m_bRPIComp = True
-                self.load_rpi_config(p_lList)
-                break
-        if not p_bProfFound: 
+        p_lList = OC_CATALOG.get(self.m_sRPIModel)
+        if p_lList:
+            self.m_bRPIComp = True
+            self.load_rpi_config(p_lList)
+        else: 
             self.m_bRPIComp = False
             self.m_dOCConfig = self.p_mProfile
 
@@ -110,11 +96,12 @@ class OCMNGR(object):
         p_dOptToMove = []
         p_lSection   = []
         p_bSectFound = False
-        if ini_set_check_section(RASP_BOOTCFG_FILE, self.m_dOCConfig['section']):
-            p_lSection = ini_sect_get_keys(RASP_BOOTCFG_FILE, self.m_dOCConfig['section'])
+        p_oDoc = ini_document(RASP_BOOTCFG_FILE)
+        if p_oDoc.has_section(self.m_dOCConfig['section']):
+            p_lSection = p_oDoc.get_keys(self.m_dOCConfig['section'])
             p_bSectFound = True
         for opt in p_lOCFullOpt:
-            value = ini_get(RASP_BOOTCFG_FILE, opt)
+            value = p_oDoc.get(opt)
             if value:
                 p_bFound = False
                 for item in p_lSection:
@@ -123,10 +110,10 @@ class OCMNGR(object):
                     try: value = int(value)
                     except: pass
                     p_dOptToMove.append([opt, value])
-        valueOut = ini_outofsect_get_key(RASP_BOOTCFG_FILE, self.m_dOCConfig['section'],
-                                         'dtparam=sd_overclock')
-        valueIn = ini_sect_get_key(RASP_BOOTCFG_FILE, self.m_dOCConfig['section'],
-                                         'dtparam=sd_overclock')
+        valueOut = p_oDoc.get_key_outside(self.m_dOCConfig['section'],
+                                          'dtparam=sd_overclock')
+        valueIn = p_oDoc.get_key(self.m_dOCConfig['section'],
+                                 'dtparam=sd_overclock')
         if valueOut:
             if valueIn: 
                 try: valueIn = int(valueIn)
@@ -138,18 +125,18 @@ class OCMNGR(object):
                 p_dOptToMove.append(['dtparam=sd_overclock', valueOut])
 
         if p_dOptToMove:
-            self.__clone_cfg()
+            self.__clone_cfg(p_oDoc)
             if not p_bSectFound: 
-                ini_sect_create_section(self.m_sTemp, self.m_dOCConfig['section'])
+                self.m_oDoc.create_section(self.m_dOCConfig['section'])
             for opt in p_dOptToMove:
-                remove_line(self.m_sTemp, opt[0])
-                if opt[1] not in self.m_dOCConfig['values'][opt[0]][3]:
+                self.m_oDoc.remove_lines(opt[0])
+                if opt[1] not in self.m_dOCConfig['allowed'][opt[0]]:
                     opt[1] = self.m_dOCConfig['values'][opt[0]][0]
-                ini_sect_add_key(self.m_sTemp, self.m_dOCConfig['section'],
-                                 opt[0], opt[1])
+                self.m_oDoc.add_key(self.m_dOCConfig['section'], opt[0], opt[1])
             self.__upload_cfg()
         
-    def load_profile_0(self):
+    @staticmethod
+    def load_profile_0():
         """ Create profile for Raspberry Pi 3A+/3B+ """
         p_lProfile = {'id'      : ['a020d3', '9020e0'],
                       'section' : 'CRT-OC',
@@ -184,7 +171,8 @@ class OCMNGR(object):
 
         return p_lProfile
 
-    def load_profile_1(self):
+    @staticmethod
+    def load_profile_1():
         """ Create profile for Raspberry Pi 3B """
         p_lProfile = {'id'      : ['a02082', 'a22082', 'a32082'],
                       'section' : 'CRT-OC',
@@ -219,7 +207,8 @@ class OCMNGR(object):
 
         return p_lProfile
 
-    def load_profile_2(self):
+    @staticmethod
+    def load_profile_2():
         """ Create profile for Raspberry Pi 2B """
         p_lProfile = {'id'      : ['a01040', 'a01041', 'a21041'],
                       'section' : 'CRT-OC',
@@ -259,14 +248,7 @@ class OCMNGR(object):
         return p_lProfile
 
     def get_rpi_id(self):
-        p_sCMD = 'cat /proc/cpuinfo | grep Revision'
-        try: p_sOutput = subprocess.check_output(p_sCMD, shell=True).decode("utf-8")
-        except: p_sOutput = ""
-        if p_sOutput:
-            p_sModel = re.sub(r' +', " ", p_sOutput).split(':')[1]
-            p_sModel = p_sModel.replace('\00', '').strip()
-            self.m_sRPIModel = p_sModel
-        else: self.m_sRPIModel = "Not Found"
+        self.m_sRPIModel = SYSFACTS.revision()
 
     def status(self):
         if not self.compatible(): return False
@@ -294,26 +276,28 @@ class OCMNGR(object):
     def enable(self):
         if self.m_bOCEnabled: return False
         self.__clone_cfg()
-        ini_sect_empty_section(self.m_sTemp, self.m_dOCConfig['section'], True)
-        ini_sect_create_section(self.m_sTemp, self.m_dOCConfig['section'])
+        self.m_oDoc.empty_section(self.m_dOCConfig['section'], True)
+        self.m_oDoc.create_section(self.m_dOCConfig['section'])
         self.__upload_cfg()
 
     def disable(self):
         if not self.m_bOCEnabled: return False
         self.__clone_cfg()
-        ini_sect_empty_section(self.m_sTemp, self.m_dOCConfig['section'], True)
+        self.m_oDoc.empty_section(self.m_dOCConfig['section'], True)
         self.__upload_cfg()
 
     def load_rpi_config(self, p_dConfig):
-        if self.m_sMD5_Prev != md5_file(RASP_BOOTCFG_FILE):
-            if ini_set_check_section(RASP_BOOTCFG_FILE, p_dConfig['section']):
+        p_oStamp = file_stamp(RASP_BOOTCFG_FILE)
+        if not p_oStamp or self.m_oCfgStamp != p_oStamp:
+            p_oDoc = ini_document(RASP_BOOTCFG_FILE)
+            if p_oDoc.has_section(p_dConfig['section']):
                 self.m_bOCEnabled = True
                 for ini in p_dConfig['config']:
-                    value = ini_sect_get_key(RASP_BOOTCFG_FILE, p_dConfig['section'], ini)
+                    value = p_oDoc.get_key(p_dConfig['section'], ini)
                     if value != None: 
                         try: value = int(value)
                         except Exception as e: pass
-                        if value not in p_dConfig['values'][ini][3]:
+                        if value not in p_dConfig['allowed'][ini]:
                             value = p_dConfig['values'][ini][0]
                         p_dConfig['config'][ini] = value
                     else: 
@@ -322,7 +306,7 @@ class OCMNGR(object):
                 self.m_bOCEnabled = False
                 for ini in p_dConfig['values']:
                     p_dConfig['config'][ini] = p_dConfig['values'][ini][0]
-            m_sMD5_Prev = md5_file(RASP_BOOTCFG_FILE)
+            self.m_oCfgStamp = p_oStamp
         self.m_dOCConfig = p_dConfig.copy()
 
     def set_oc_value(self, p_sINI, p_sValue):
@@ -330,10 +314,10 @@ class OCMNGR(object):
         if not p_sINI in self.m_dOCConfig['config']: return False
         self.__clone_cfg()
         if p_sValue == self.m_dOCConfig['values'][p_sINI][3][0]:
-            remove_line(self.m_sTemp, p_sINI)
+            self.m_oDoc.remove_lines(p_sINI)
         else:
-            if not ini_sect_set_key(self.m_sTemp, self.m_dOCConfig['section'], p_sINI, p_sValue):
-                ini_sect_add_key(self.m_sTemp, self.m_dOCConfig['section'], p_sINI, p_sValue)
+            if not self.m_oDoc.set_key(self.m_dOCConfig['section'], p_sINI, p_sValue):
+                self.m_oDoc.add_key(self.m_dOCConfig['section'], p_sINI, p_sValue)
         self.__upload_cfg()
 
     def get_ini_values_list(self, p_sINI):
@@ -343,7 +327,7 @@ class OCMNGR(object):
 
     def get_ini(self, p_sINI):
         if not p_sINI in self.m_dOCConfig['config']: return None
-        #self.load_rpi_config(self.m_dOCConfig)
+        self.load_rpi_config(self.m_dOCConfig)
         return self.m_dOCConfig['config'][p_sINI]
 
     def get_model_id(self):
@@ -352,23 +336,62 @@ class OCMNGR(object):
     def get_model(self):
         return self.m_dOCConfig['desc']
 
-    def __clone_cfg(self):
-        self.m_sTemp = generate_random_temp_filename(RASP_BOOTCFG_FILE)
-        os.system('cp %s %s' % (RASP_BOOTCFG_FILE, self.m_sTemp))
+    def __clone_cfg(self, p_oDoc = None):
+        self.m_oDoc = p_oDoc or ini_document(RASP_BOOTCFG_FILE)
 
     def __upload_cfg(self, p_bReload = True):
-        ini_sect_clean_file(self.m_sTemp)
-        os.system('sudo cp %s %s' % (self.m_sTemp, RASP_BOOTCFG_FILE))
-        self.__clean()
+        self.m_oDoc.clean()
+        self.m_oDoc.write(p_bSudo = True)
+        self.m_oDoc = None
+        self.m_oCfgStamp = None # FAT mtime is 2s, always reload own changes
         if p_bReload: self.load_rpi_config(self.m_dOCConfig)
-
-    def __clean(self):
-        if os.path.exists(self.m_sTemp):
-            remove_file(self.m_sTemp)
-        self.m_sTemp = ""
         
     def __temp(self):
         if CLEAN_LOG_ONSTART:
             remove_file(LOG_PATH)
         logging.basicConfig(filename=LOG_PATH, level=__DEBUG__,
         format='[%(asctime)s] %(levelname)s - %(filename)s:%(funcName)s - %(message)s')
+
+class oc_catalog(object):
+    """
+    Overclock profiles compiled once per process and indexed by board
+    revision code. Lists of allowed values are expanded only once and
+    also kept as sets in 'allowed' for checks. Every get() returns its
+    own 'config' dict to be filled from config.txt.
+    """
+    def __init__(self, p_lBuilders = None):
+        self.m_lBuilders = p_lBuilders
+        self.m_dBoards = None
+        self.m_oLock = threading.Lock()
+
+    def board_id(self, p_sRevision):
+        """ Overvolted boards have a prefix like '1000', ignore it """
+        return p_sRevision[-6:]
+
+    def boards(self):
+        return list(self._boards())
+
+    def get(self, p_sRevision):
+        """ Return profile for a board revision, None if not supported """
+        profile = self._boards().get(self.board_id(p_sRevision))
+        if not profile: return None
+        profile = dict(profile)
+        profile['config'] = dict(profile['config'])
+        return profile
+
+    def _boards(self):
+        with self.m_oLock:
+            if self.m_dBoards == None:
+                self.m_dBoards = {}
+                p_lBuilders = self.m_lBuilders or \
+                              [OCMNGR.load_profile_0, OCMNGR.load_profile_1,
+                               OCMNGR.load_profile_2]
+                for pf in p_lBuilders:
+                    profile = pf()
+                    profile['allowed'] = {}
+                    for ini in profile['values']:
+                        profile['allowed'][ini] = set(profile['values'][ini][3])
+                    for id in profile['id']: self.m_dBoards[id] = profile
+            return self.m_dBoards
+
+OC_CATALOG = oc_catalog()
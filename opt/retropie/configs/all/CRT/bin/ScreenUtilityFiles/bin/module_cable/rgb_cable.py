@@ -35,10 +35,9 @@ sys.path.append(MODULES_PATH)
 from cable_utils import *
 from launcher_module.core_paths import *
 from launcher_module.utils import set_procname, check_process, \
-                                  wait_process, module_exists, \
-                                  module_loaded
-from launcher_module.file_helpers import md5_file, ini_set, ini_get, \
-                                         generate_random_temp_filename
+                                  wait_process
+from launcher_module.kernel_modules import KMODS
+from launcher_module.file_helpers import ini_set, ini_get, file_watcher
 from module_config.config_utils import saveboot
 
 LOG_PATH = os.path.join(TMP_LAUNCHER_PATH,"CRT_RGB_Cable.log")
@@ -51,7 +50,9 @@ CLEAN_LOG_ONSTART = True
 set_procname(PNAME_RGBCABLE)
 
 class CRTDaemon(object):
-    m_sHashConfig     = ""
+    DEBOUNCE = 0.5 # seconds without changes before reading config.txt
+
+    m_oWatcher        = None
     m_iCableType      = None
     m_iCableType_Prev = -1
     m_bCableLoaded    = False
@@ -59,7 +60,7 @@ class CRTDaemon(object):
     m_bRecovMode      = "DEFAULT"
     m_bDaemonEna      = True
     
-    m_sTempFile = ""
+    m_oBootCfg = None   # config.txt being edited
     
     def __init__(self):
         self.__temp()
@@ -77,18 +78,26 @@ class CRTDaemon(object):
         jamma cable is selected and apply its needed sofware.
         After cycle if no one jamma cable is detected on config.txt 
         daemon will be closed.
+        config.txt is only read again when it changes; a change wakes
+        up the daemon immediately instead of waiting for next loop.
         """
         logging.info('INFO: starting main search cycle of ' + \
                      '{%s loops}x{%s seconds}' % (p_iLoops, p_iTime))
+        self.m_oWatcher = file_watcher([RASP_BOOTCFG_FILE])
+        p_bReload = True
         iCounter = 0
         while iCounter < p_iLoops:
             if check_process(PNAME_CONFIG):
                 wait_process(PNAME_CONFIG)
-            self._get_config()
+                if self.m_oWatcher.changed(): p_bReload = True
+            if p_bReload: self._get_config()
             self._halt_daemon()
             self._recovery_mode()
             self._load_cable()
-            time.sleep(p_iTime)          # Wait until next cycle
+            p_bReload = self._wait_changes(p_iTime) # Wait until next cycle
+            if p_bReload:
+                logging.info('INFO: config.txt changed, checking again')
+                continue
             iCounter += 1
             if self.m_bCableLoaded: # Keep daemon if any jamma cable
                 logging.info('INFO: JAMMA CABLE FOUND; ' + \
@@ -101,22 +110,27 @@ class CRTDaemon(object):
                      % (p_iLoops, p_iTime))
         self._quit()
     
+    def _wait_changes(self, p_iTime):
+        """
+        Sleep until config.txt changes or p_iTime seconds. Return True
+        on change, once writes have stopped during DEBOUNCE seconds.
+        """
+        if not self.m_oWatcher.wait(p_iTime): return False
+        while self.m_oWatcher.wait(self.DEBOUNCE): pass
+        return True
+
     def _get_config(self):
         """ get configuration from boot.txt """
-        p_sHashTemp = md5_file(RASP_BOOTCFG_FILE)
-        if p_sHashTemp != self.m_sHashConfig:
-            self.m_iCableType  = int(ini_sect_get_key(RASP_BOOTCFG_FILE, 
-                                     'CRT-CABLE', 'crt_cable_type'))
-            self.m_bRecovery   = int(ini_sect_get_key(RASP_BOOTCFG_FILE, 
-                                     'CRT-RECOVERY', 'crt_recovery_enabled'))
-            self.m_bDaemonEna  = int(ini_sect_get_key(RASP_BOOTCFG_FILE, 
-                                     'CRT-RECOVERY', 'crt_daemon_enabled'))
-
-            if self.m_bRecovery:
-                value =  ini_sect_get_key(RASP_BOOTCFG_FILE, 
-                                          'CRT-RECOVERY', 'crt_recovery_mode')
-                if value: self.m_bRecovMode = value
-        self.m_sHashConfig = p_sHashTemp
+        p_oDoc = ini_document(RASP_BOOTCFG_FILE)
+        self.m_iCableType  = int(p_oDoc.get_key('CRT-CABLE', 'crt_cable_type'))
+        self.m_bRecovery   = int(p_oDoc.get_key('CRT-RECOVERY',
+                                                'crt_recovery_enabled'))
+        self.m_bDaemonEna  = int(p_oDoc.get_key('CRT-RECOVERY',
+                                                'crt_daemon_enabled'))
+
+        if self.m_bRecovery:
+            value = p_oDoc.get_key('CRT-RECOVERY', 'crt_recovery_mode')
+            if value: self.m_bRecovMode = value
 
     def _load_cable(self):
         if self.m_iCableType != self.m_iCableType_Prev:
@@ -153,8 +167,8 @@ class CRTDaemon(object):
             logging.info("INFO: changed recovery mode to {%s} " % self.m_bRecovMode)
             self._clone_boot_cfg()
 
-            ini_sect_set_key(self.m_sTempFile, 'CRT-RECOVERY', 'crt_recovery_enabled', 0)
-            ini_sect_set_key(self.m_sTempFile, 'CRT-RECOVERY', 'crt_recovery_mode', 'DEFAULT')
+            self.m_oBootCfg.set_key('CRT-RECOVERY', 'crt_recovery_enabled', 0)
+            self.m_oBootCfg.set_key('CRT-RECOVERY', 'crt_recovery_mode', 'DEFAULT')
             self._upload_boot_cfg()
 
             # Create timings with MODE for system/ES in /boot/config.txt
@@ -176,15 +190,13 @@ class CRTDaemon(object):
             wait_process('resize2fs')
 
     def _clone_boot_cfg(self):
-        self.m_sTempFile = generate_random_temp_filename(RASP_BOOTCFG_FILE)
-        os.system('cp %s %s' % (RASP_BOOTCFG_FILE, self.m_sTempFile))
-        logging.info('INFO: taking a temp copy of config.txt ' + \
-                     ' at %s' % self.m_sTempFile)
+        self.m_oBootCfg = ini_document(RASP_BOOTCFG_FILE)
+        logging.info('INFO: taking a copy of config.txt in memory')
 
     def _upload_boot_cfg(self):
-        os.system('sudo cp %s %s' %(self.m_sTempFile, RASP_BOOTCFG_FILE))
+        self.m_oBootCfg.write(p_bSudo = True)
         logging.info('INFO: uploading modified config.txt to /boot')
-        self.__clean()
+        self.m_oBootCfg = None
 
     def _restart_system(self):
         """ Restart system and close ES if it's running """
@@ -193,14 +205,8 @@ class CRTDaemon(object):
             os.system(commandline)
         os.system('sudo reboot now')
 
-    def __clean(self):
-        if os.path.exists (self.m_sTempFile):
-            os.system('rm "%s"' % self.m_sTempFile)
-            self.m_sTempFile = ""
-
     def _quit(self):
         logging.info('Exiting from daemon')
-        self.__clean()
         sys.exit(0)
         
     def __temp(self):
@@ -305,10 +311,10 @@ class pi2jammaMNGR(object):
         
         # if source files exits, check instalation
         if p_bCheck:
-            sync_files(self.PI2JAMMA_BIN_FILE_SRC,
-                       self.PI2JAMMA_BIN_FILE_DST, "x")
-            sync_files(self.PI2JAMMA_CFG_FILE_SRC,
-                       self.PI2JAMMA_CFG_FILE_DST)
+            sync_file_list([(self.PI2JAMMA_BIN_FILE_SRC,
+                             self.PI2JAMMA_BIN_FILE_DST, "x"),
+                            (self.PI2JAMMA_CFG_FILE_SRC,
+                             self.PI2JAMMA_CFG_FILE_DST, None)])
         return p_bCheck
 
 class jammargbpiMNGR(object):
@@ -324,13 +330,12 @@ class jammargbpiMNGR(object):
         else: 
             logging.info("INFO: trying to load jamma-rgb-pi module")
              # Check if mk_arcade_joystick_rpi is loaded is system
-            if not module_exists(self.JAMMARGBPI_MODULE):
+            if not KMODS.exists(self.JAMMARGBPI_MODULE):
                 logging.info("WARNING: %s not installed" % self.JAMMARGBPI_MODULE)
                 return False
             if not self.detect():
                 return False
-            os.system('sudo modprobe %s i2c0=0x20,0x21' % self.JAMMARGBPI_MODULE)
-            if self.check(): 
+            if KMODS.load(self.JAMMARGBPI_MODULE, 'i2c0=0x20,0x21'): 
                 logging.info("INFO: jamma rgb-pi now loaded") 
                 return True
             else:
@@ -354,12 +359,12 @@ class jammargbpiMNGR(object):
         """ This function will close JAMMA RGB-PI software """
         while self.check():
             logging.info("INFO: Killing %s module" % self.JAMMARGBPI_MODULE)
-            os.system('sudo modprobe -r %s' % self.JAMMARGBPI_MODULE)
+            KMODS.unload(self.JAMMARGBPI_MODULE)
         return True
 
     def check(self):
         """ check current status of driver """
-        if module_loaded(self.JAMMARGBPI_MODULE): return True
+        if KMODS.loaded(self.JAMMARGBPI_MODULE): return True
         return False
 
 try:
@@ -26,7 +26,7 @@ with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
 import os, sys, time, math
-import subprocess
+import subprocess, collections
 import logging
 import pygame
 
@@ -53,6 +53,7 @@ CLICK_SOUND_FILE = os.path.join(CRT_SOUNDS_PATH, "sys_click_01.ogg")
 BOOTCFG_TEMP_FILE = os.path.join(TMP_LAUNCHER_PATH, "config.txt")
 
 FPS = 0
+SURFACE_CACHE_SIZE = 16 # scaled/rotated surfaces kept in memory
 
 class generate(object):
     """ virtual class for centering pattern """
@@ -97,8 +98,17 @@ class generate(object):
                   "rndimg": None, "rndpos": None}
     m_lFreqIcon = {"width": 68, "height": 28,
                   "rndimg": None, "rndpos": None}
+    m_sFreqIconRnd = None # icon path already positioned
+
+    m_dSurfSources = {} # decoded images by path
+    m_dSurfCache = None # (path, size, rotation): surface
+    m_oInfoKey = None   # texts and boxes of last info box render
+    m_oInfoTable = None
+    m_oInfoTablePos = None
 
     def __init__(self):
+        self.m_dSurfSources = {}
+        self.m_dSurfCache = collections.OrderedDict()
         self.m_oPatternDatas = datas()
         self.m_iCurSide = self.m_oPatternDatas.side()
         
@@ -135,6 +145,31 @@ class generate(object):
         self.m_PGoScreen = pygame.display.set_mode((self.m_dPatternAdj["ScreenHSize"],
                                                     self.m_dPatternAdj["ScreenVSize"]),
                                                     pygame.FULLSCREEN)
+        self._preload_surfaces()
+
+    def _preload_surfaces(self):
+        """ Decode once pattern and icon for the prepared timings """
+        self.pattern_render()
+        self.freq_icon_render()
+
+    def _surface(self, p_sPath, p_lSize, p_iRotate = 0):
+        """
+        Return image scaled and rotated from cache. Source images are
+        decoded only once, transformed ones are kept in a small LRU.
+        """
+        key = (p_sPath, tuple(p_lSize), p_iRotate)
+        if key in self.m_dSurfCache:
+            self.m_dSurfCache.move_to_end(key)
+            return self.m_dSurfCache[key]
+        if p_sPath not in self.m_dSurfSources:
+            self.m_dSurfSources[p_sPath] = pygame.image.load(p_sPath)
+        img = pygame.transform.smoothscale(self.m_dSurfSources[p_sPath],
+                                           key[1])
+        if p_iRotate: img = pygame.transform.rotate(img, p_iRotate)
+        self.m_dSurfCache[key] = img
+        if len(self.m_dSurfCache) > SURFACE_CACHE_SIZE:
+            self.m_dSurfCache.popitem(last = False)
+        return img
 
     def _init_sounds(self):
         try:
@@ -163,10 +198,24 @@ class generate(object):
         self.pattern_init_size_position()
 
     def render_test(self):
-        """ Prepare all test elements """
-        self.box_info_prepare_render()
+        """ Prepare all test elements, info box only if it changed """
+        p_oKey = self._box_info_key()
+        if p_oKey != self.m_oInfoKey:
+            self.box_info_prepare_render()
+            self.box_info_table_render()
+            self.m_oInfoKey = p_oKey
         self.pattern_prepare_render()
 
+    def _box_info_key(self):
+        p_lKey = []
+        for opt in self.m_lInfoText:
+            p_lKey.append((opt["text"], tuple(opt["rndcolor"]), opt["posx"],
+                           opt["posy"], opt["center"]))
+        for opt in self.m_lInfoBox:
+            p_lKey.append((tuple(opt["rndcolor"]), opt["posx"], opt["posy"],
+                           opt["width"], opt["height"], opt["fill"]))
+        return tuple(p_lKey)
+
     def draw_test(self):
         """ Draw all test elements """
         self.m_PGoScreen.fill(BLACK)
@@ -175,6 +224,9 @@ class generate(object):
         pygame.display.flip()
 
     def draw_info_box(self):
+        self.m_PGoScreen.blit(self.m_oInfoTable, self.m_oInfoTablePos)
+
+    def box_info_table_render(self):
         POS_X = 0
         POS_Y = 0
         table = pygame.Surface((190, 77), pygame.SRCALPHA)
@@ -217,7 +269,8 @@ class generate(object):
                 POS_Y = self.m_iRES_Y/2
         size = table.get_rect()
         size.center = (POS_X, POS_Y)
-        self.m_PGoScreen.blit(table, size)
+        self.m_oInfoTable = table
+        self.m_oInfoTablePos = size
 
     def draw_pattern(self):
         """ Draw main centering pattern """
@@ -255,20 +308,20 @@ class generate(object):
     def pattern_prepare_render(self):
         self.pattern_render()
         self.pattern_pos()
-        self.freq_icon_render()
-        self.freq_icon_pos()
+        # frequency icon doesn't change with pattern adjustments
+        if self.m_sFreqIconRnd != self.m_PGoFreqIcon:
+            self.freq_icon_render()
+            self.freq_icon_pos()
+            self.m_sFreqIconRnd = self.m_PGoFreqIcon
 
     def pattern_render(self):
-        self.m_lPattern["rndimg"] = pygame.image.load(self.m_PGpPattern)
-        self.m_lPattern["rndimg"] = pygame.transform.smoothscale(self.m_lPattern["rndimg"],
+        p_iRotate = 180 if self.m_iCurSide == 3 else 0
+        self.m_lPattern["rndimg"] = self._surface(self.m_PGpPattern,
                                     (self.m_lPattern["width"],
-                                    self.m_lPattern["height"]))
-        if self.m_iCurSide == 3:
-            self.m_lPattern["rndimg"] = pygame.transform.rotate(self.m_lPattern["rndimg"], 180)
+                                    self.m_lPattern["height"]), p_iRotate)
 
     def freq_icon_render(self):
-        self.m_lFreqIcon["rndimg"] = pygame.image.load(self.m_PGoFreqIcon)
-        self.m_lFreqIcon["rndimg"] = pygame.transform.smoothscale(self.m_lFreqIcon["rndimg"],
+        self.m_lFreqIcon["rndimg"] = self._surface(self.m_PGoFreqIcon,
                                     (self.m_lFreqIcon["width"],
                                     self.m_lFreqIcon["height"]))
 
@@ -33,8 +33,10 @@ sys.path.append(MODULES_PATH)
 
 from index import index
 from config_utils import change_watcher, restart_ES
-from launcher_module.core_paths import TMP_LAUNCHER_PATH, CRT_SOUNDS_PATH
+from launcher_module.core_paths import TMP_LAUNCHER_PATH, CRT_SOUNDS_PATH, \
+                                       ROTMODES_TATE1_FILE, ROTMODES_TATE3_FILE
 from launcher_module.utils import get_screen_resolution, get_side
+from launcher_module.file_helpers import file_watcher
 from launcher_module.core_controls import joystick, CRT_UP, CRT_DOWN, \
                                           CRT_LEFT, CRT_RIGHT, CRT_OK, \
                                           CRT_CANCEL
@@ -75,6 +77,9 @@ DEFAULT_CFG = {
     'icon_foldero': "icon_foldero.png",
 
     'pointer': ["pointerf1.png", "pointerf2.png"],
+    'pointer_fps': 2,  # pointer animation speed
+    'scroll_fps': 15,  # long text scroll speed
+    'anim_idle': 5,    # seconds between animation checks if nothing moves
 
     'type_color_1': pygame.Color(244,217, 48), # info values
     'type_color_2': pygame.Color(124,113,218), # menu access color
@@ -95,6 +100,34 @@ C_GREY   = pygame.Color(125, 125, 125)
 CURSOR_SOUND_FILE = os.path.join(CRT_SOUNDS_PATH, "sys_cursor_01.ogg")
 CLICK_SOUND_FILE = os.path.join(CRT_SOUNDS_PATH, "sys_click_01.ogg")
 
+class screen_side(object):
+    """
+    Current EmulationStation side, read once and then only again when
+    tate trigger files are created or removed (i.e. by es_rotation).
+    With inotify a frame check is a non blocking read of its queue, if
+    not available trigger files are checked at most every POLL_TIME.
+    """
+    POLL_TIME = 1 # seconds
+
+    def __init__(self):
+        self.m_oWatch = file_watcher([ROTMODES_TATE1_FILE, ROTMODES_TATE3_FILE])
+        self.m_iSide = get_side()
+        self.m_iPollTime = time.time()
+
+    def side(self):
+        return self.m_iSide
+
+    def changed(self):
+        """ Return True if side was changed since last call """
+        if self.m_oWatch.fileno() < 0:
+            if time.time() - self.m_iPollTime < self.POLL_TIME: return False
+            self.m_iPollTime = time.time()
+        if not self.m_oWatch.changed(): return False
+        p_iSide = get_side()
+        if p_iSide == self.m_iSide: return False
+        self.m_iSide = p_iSide
+        return True
+
 class core(object):
     m_sSkinPath = ""
 
@@ -112,6 +145,8 @@ class core(object):
     m_oLayer21      = None # selected line
     m_oLayer30      = None # pointer
     m_oLayer40      = None # info
+    m_oStatic       = None # layers 0, 10 & 20 flattened
+    m_lStaticSrc    = ()   # layers used to build m_oStatic
 
     m_lLayer40      = [None, None] # text & icon label from submenus
     m_lLayer40_core = [None, None] # text & icon label from core
@@ -137,6 +172,7 @@ class core(object):
         self.m_oIndex = index()
         self._init_pygame()
         self.m_oWach = change_watcher(self.m_lLines, self.m_iLine)
+        self.m_oAnimCond = threading.Condition()
         self._create_threads()
         self.run()
 
@@ -145,7 +181,7 @@ class core(object):
         self._main_loop()
 
     def _draw_screen(self):
-        self._side_and_size()
+        if self.m_oSide.changed(): self._side_and_size()
         self._import_index()
         self._get_pages()
         self._prepare_datas()
@@ -163,7 +199,7 @@ class core(object):
         self.m_lReboot['reboot'] = self.m_oIndex.m_bReboot
 
     def _create_threads(self):
-        p_oDmns = [self._dmn_rfrsh_scr, self._dmn_pnt_anim, self._dmn_scroll]
+        p_oDmns = [self._dmn_rfrsh_scr, self._dmn_animate]
         for dmn in p_oDmns:
             t = threading.Thread(target=dmn)
             t.setDaemon(True)
@@ -180,45 +216,55 @@ class core(object):
                 pygame.time.wait(0)
         except: raise
 
-    def _dmn_pnt_anim(self):
-        try:
-            freq = 2 #increse/decrease for speed animation (FPS)
-            while True:
-                if self.m_bPause[0]: self._wait()
-                if self.m_bExit: return
-                if len(self.m_lPointer['pointer_render']) > 1:
-                    if (self.m_lPointer['frame'] + 1) == len(self.m_lPointer['pointer_render']):
-                        self.m_lPointer['frame'] = 0
-                    else:
-                        self.m_lPointer['frame'] += 1
-                self.m_oClock.tick(freq)
-                pygame.time.wait(0)
-        except: raise
-
-    def _dmn_scroll(self):
-        try:
-            freq = 15 #increse/decrease for speed animation (FPS)
-            while True:
-                if self.m_bPause[0]: self._wait()
-                if self.m_bExit: return
-                if self.m_iScroll_dif:
-                    self.m_iScroll_mov = 0
-                    prev_dif = self.m_iScroll_dif
-                    side = -1
-                    while self.m_iScroll_dif:
-                        if self.m_bPause[0]: self._wait()
-                        if self.m_bExit: return
-                        if self.m_iScroll_mov > 0 or prev_dif != self.m_iScroll_dif: break
-                        self.m_iScroll_mov += (1 * side)
-                        if abs(self.m_iScroll_mov) >= abs(self.m_iScroll_dif) or \
-                           abs(self.m_iScroll_mov) == 0:
-                            side = -(side)
-                            if self.m_iScroll_mov == 0: time.sleep(1.5)
-                        self.m_oClock.tick(freq)
-                        pygame.time.wait(0)
-                self.m_oClock.tick(freq)
-                pygame.time.wait(0)
-        except: raise
+    def _dmn_animate(self):
+        """
+        Pointer animation and long text scroll on a single thread. It
+        sleeps on a condition until next step of any active animation;
+        when nothing moves it only wakes up every 'anim_idle' seconds
+        or when _anim_wake() is called.
+        """
+        p_iPtrNext = 0
+        p_iScrNext = 0
+        self.m_dScroll = {'dif': 0, 'side': -1}
+        while True:
+            if self.m_bPause[0]: self._wait()
+            if self.m_bExit: return
+            now = time.time()
+            p_iTimeout = self.dCFG['anim_idle']
+            if len(self.m_lPointer['pointer_render']) > 1:
+                if now >= p_iPtrNext:
+                    self._pointer_step()
+                    p_iPtrNext = now + 1.0 / self.dCFG['pointer_fps']
+                p_iTimeout = min(p_iTimeout, p_iPtrNext - now)
+            if self.m_iScroll_dif:
+                if now >= p_iScrNext: p_iScrNext = now + self._scroll_step()
+                p_iTimeout = min(p_iTimeout, p_iScrNext - now)
+            else: p_iScrNext = 0
+            with self.m_oAnimCond:
+                self.m_oAnimCond.wait(max(p_iTimeout, 0))
+
+    def _anim_wake(self):
+        with self.m_oAnimCond:
+            self.m_oAnimCond.notify()
+
+    def _pointer_step(self):
+        if (self.m_lPointer['frame'] + 1) == len(self.m_lPointer['pointer_render']):
+            self.m_lPointer['frame'] = 0
+        else:
+            self.m_lPointer['frame'] += 1
+
+    def _scroll_step(self):
+        """ Move long text one pixel, return seconds until next step """
+        # restart from the beginning if selected text has changed
+        if self.m_iScroll_mov > 0 or self.m_dScroll['dif'] != self.m_iScroll_dif:
+            self.m_iScroll_mov = 0
+            self.m_dScroll = {'dif': self.m_iScroll_dif, 'side': -1}
+        self.m_iScroll_mov += (1 * self.m_dScroll['side'])
+        if abs(self.m_iScroll_mov) >= abs(self.m_iScroll_dif) or \
+           abs(self.m_iScroll_mov) == 0:
+            self.m_dScroll['side'] = -(self.m_dScroll['side'])
+            if self.m_iScroll_mov == 0: return 1.5
+        return 1.0 / self.dCFG['scroll_fps']
 
     def _wait(self):
         while self.m_bPause[0]:
@@ -231,6 +277,7 @@ class core(object):
         if self.m_bExit: return
         self.m_oJoyHandler.init()
         self.m_oScreen = pygame.display.set_mode(self.m_lResolutionXY, pygame.FULLSCREEN)
+        self.m_oStatic = None
 
     def _init_pygame(self):
         pygame.mixer.pre_init(44100, -16, 2, 4096)
@@ -253,12 +300,14 @@ class core(object):
 
         # screen
         self.m_lResolutionXY = get_screen_resolution()
+        try: self.m_oSide
+        except: self.m_oSide = screen_side()
         self._side_and_size()
         self.m_oScreen = pygame.display.set_mode(self.m_lResolutionXY, pygame.FULLSCREEN)
 
     def _side_and_size(self):
         self.m_lRES = list(self.m_lResolutionXY)
-        p_iSide = get_side()
+        p_iSide = self.m_oSide.side()
 
         self.m_iText_fst = 30
         self.m_iText_spc = 14
@@ -395,22 +444,8 @@ class core(object):
         self._render_layer40()
 
     def _join_layers(self):
-        self.m_oScreen.fill(C_BLACK)
-
-        # append Layer 0 on main screen surface
-        rect = self.m_oLayer0.get_rect()
-        rect.topleft = (0, 0)
-        self.m_oScreen.blit(self.m_oLayer0, rect)
-
-        # append Layer 10 on main screen surface
-        rect = self.m_oLayer10.get_rect()
-        rect.topleft = (0, 0)
-        self.m_oScreen.blit(self.m_oLayer10, rect)
-
-        # append Layer 20 on main screen surface
-        rect = self.m_oLayer20.get_rect()
-        rect.topleft = (0, 0)
-        self.m_oScreen.blit(self.m_oLayer20, rect)
+        # append flattened Layers 0, 10 and 20 on main screen surface
+        self.m_oScreen.blit(self._static_layers(), (0, 0))
 
         # append Layer 21 on main screen surface
         rect = self.m_oLayer21.get_rect()
@@ -428,6 +463,28 @@ class core(object):
             rect.topleft = (0, 0)
             self.m_oScreen.blit(self.m_oLayer40, rect)
 
+    def _static_layers(self):
+        """
+        Layers 0, 10 and 20 only change on side, line or text change, and
+        every change renders a new surface. Keep them flattened on one
+        opaque surface and rebuild it only when any source is replaced.
+        """
+        p_lSrc = (self.m_oLayer0, self.m_oLayer10, self.m_oLayer20)
+        if self.m_oStatic and all(map(lambda a, b: a is b, p_lSrc,
+                                      self.m_lStaticSrc)):
+            return self.m_oStatic
+
+        size = self.m_oScreen.get_size()
+        if not self.m_oStatic or self.m_oStatic.get_size() != size:
+            self.m_oStatic = pygame.Surface(size, 0, self.m_oScreen)
+        self.m_oStatic.fill(C_BLACK)
+        for layer in p_lSrc:
+            rect = layer.get_rect()
+            rect.topleft = (0, 0)
+            self.m_oStatic.blit(layer, rect)
+        self.m_lStaticSrc = p_lSrc
+        return self.m_oStatic
+
     def _render_layer0(self):
         # Layer 0 surface, background + top frame + bottom frame
         self.m_oLayer0 = pygame.Surface(self.m_lRES, pygame.SRCALPHA)
@@ -611,6 +668,7 @@ class core(object):
             else:
                 ptr = self._img_render(self.dCFG['pointer'])
                 self.m_lPointer['pointer_render'].append(ptr)
+            self._anim_wake()
 
         ptr = self.m_lPointer['pointer_render'][self.m_lPointer['frame']]
         rect = ptr.get_rect()
@@ -697,6 +755,7 @@ class core(object):
             self.m_lLayer40_core = ["Restarting ES", "icon_info"]
             time.sleep(2)
         self.m_bExit = True
+        self._anim_wake()
         self.m_oJoyHandler.quit()
         while pygame.mixer.get_busy(): pass
         time.sleep(1.2)
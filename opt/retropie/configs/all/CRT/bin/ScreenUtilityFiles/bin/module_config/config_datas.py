@@ -0,0 +1,221 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+config_datas.py.
+
+Shared data providers for Configuration Utility submenus
+
+https://github.com/krahsdevil/crt-for-retropie/
+
+Copyright (C)  2018/2020 -krahs- - https://github.com/krahsdevil/
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 2 of the License, or (at your option) any
+later version.
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import sys, os, time, threading
+import logging, subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(SCRIPT_DIR + "/../"))
+from main_paths import MODULES_PATH
+sys.path.append(MODULES_PATH)
+
+from config_utils import get_ip_address, sys_volume, external_storage, oled
+from launcher_module.core_paths import CRT_EXTSTRG_TRIG_MNT_PATH
+from launcher_module.storage_info import STORAGE
+
+class data_bus(object):
+    """
+    Registry of data sources shared by all submenus. Every source
+    declares a TTL and is refreshed by a single scheduler thread only
+    while some loaded submenu is subscribed to it; options of that
+    submenu are reloaded just when the value really changes. Options
+    not bound to any source are polled every TICK as before.
+    """
+    TICK = 0.5      # seconds, polling time for options without source
+    MAX_WAIT = 5    # seconds, scheduler sleeps at most this time
+
+    def __init__(self):
+        self.m_oCond = threading.Condition()
+        self.m_oRefresh = threading.Lock() # serialize calls to sources
+        self.m_dSources = {}
+        self.m_lSubs = []   # [menu, {source/None: [opts]}, first_load]
+        self.m_oThread = None
+
+    def register(self, p_sName, p_oFn, p_iTTL):
+        with self.m_oCond:
+            self.m_dSources[p_sName] = {'fn': p_oFn, 'ttl': p_iTTL,
+                                        'value': None, 'time': 0,
+                                        'loaded': False, 'count': 0}
+
+    def get(self, p_sName):
+        """ Return cached value, loading it only the very first time """
+        src = self.m_dSources[p_sName]
+        if not src['loaded']: self._refresh(p_sName)
+        return src['value']
+
+    def invalidate(self, p_sName):
+        """ Force a refresh on next scheduler cycle, i.e. after a set """
+        with self.m_oCond:
+            self.m_dSources[p_sName]['time'] = 0
+            self.m_oCond.notify()
+
+    def refresh_count(self, p_sName):
+        return self.m_dSources[p_sName]['count']
+
+    def subscribe(self, p_oMenu, p_dOpts):
+        """
+        Bind submenu options to sources, p_dOpts is a dict like
+        {'source': [opt, ...], None: [opt polled every TICK]}.
+        """
+        with self.m_oCond:
+            self.m_lSubs = [sub for sub in self.m_lSubs if sub[0] != p_oMenu]
+            self.m_lSubs.append([p_oMenu, p_dOpts, True])
+            if not self.m_oThread or not self.m_oThread.is_alive():
+                self.m_oThread = threading.Thread(target=self._dmn_scheduler)
+                self.m_oThread.setDaemon(True)
+                self.m_oThread.start()
+            self.m_oCond.notify()
+
+    def unsubscribe(self, p_oMenu):
+        with self.m_oCond:
+            self.m_lSubs = [sub for sub in self.m_lSubs if sub[0] != p_oMenu]
+
+    def _refresh(self, p_sName, p_bStale = False):
+        """ Call source; return True if its value changed """
+        src = self.m_dSources[p_sName]
+        with self.m_oRefresh:
+            # another thread could have refreshed it while waiting
+            if src['loaded'] and not (p_bStale and self._stale(src)):
+                return False
+            try: value = src['fn']()
+            except Exception as e:
+                logging.info("ERROR: data source %s: %s" % (p_sName, e))
+                value = src['value']
+            with self.m_oCond:
+                changed = not src['loaded'] or value != src['value']
+                src['value'] = value
+                src['time'] = time.time()
+                src['loaded'] = True
+                src['count'] += 1
+        return changed
+
+    def _stale(self, p_dSrc):
+        return time.time() - p_dSrc['time'] >= p_dSrc['ttl']
+
+    def _dmn_scheduler(self):
+        while True:
+            with self.m_oCond:
+                while not self.m_lSubs: self.m_oCond.wait()
+                p_lSubs = [sub for sub in self.m_lSubs
+                           if not sub[0].m_bThreadsStop]
+                p_lFirst = [sub[0] for sub in p_lSubs if sub[2]]
+                for sub in p_lSubs: sub[2] = False
+
+            p_dWanted = {}
+            for menu, opts, first in p_lSubs:
+                for name in opts:
+                    if name: p_dWanted.setdefault(name, []).append(menu)
+
+            for name in p_dWanted:
+                if not self._refresh(name, True): continue
+                for menu, opts, first in p_lSubs:
+                    if menu in p_lFirst: continue # fully reloaded below
+                    for opt in opts.get(name, []): self._reload(menu, opt)
+
+            for menu, opts, first in p_lSubs:
+                for name in opts:
+                    if name and not menu in p_lFirst: continue
+                    for opt in opts[name]: self._reload(menu, opt)
+
+            with self.m_oCond:
+                self.m_oCond.wait(self._next_wait(p_dWanted, p_lSubs))
+
+    def _next_wait(self, p_dWanted, p_lSubs):
+        wait = self.MAX_WAIT
+        for menu, opts, first in p_lSubs:
+            if None in opts: wait = min(wait, self.TICK)
+        now = time.time()
+        for name in p_dWanted:
+            src = self.m_dSources[name]
+            wait = min(wait, src['time'] + src['ttl'] - now)
+        return max(wait, 0.05)
+
+    def _reload(self, p_oMenu, p_oOpt):
+        if p_oMenu.m_bThreadsStop: return
+        try: p_oMenu._reload_opt_datas(p_oOpt)
+        except Exception as e:
+            logging.info("ERROR: reloading option datas: %s" % e)
+
+def disk_space(p_sDisk):
+    """ Return 'free/size(free%)' string of mounted disk """
+    return STORAGE.space(p_sDisk) or "CALCULATING..."
+
+def _temperature():
+    temp = subprocess.check_output('vcgencmd measure_temp', shell=True).decode("utf-8")
+    temp = temp.strip().split("=")[1]
+    return temp.replace("'", "\xb0")
+
+def _storage_sd():
+    return disk_space("/dev/root")
+
+def _storage_usb():
+    disk = None
+    if os.path.exists (CRT_EXTSTRG_TRIG_MNT_PATH):
+        with open(CRT_EXTSTRG_TRIG_MNT_PATH, "r") as f:
+            disk = f.readline().strip().split(" ")[0]
+    if not disk: return "N/A"
+    return disk_space(disk)
+
+def _storage_roms():
+    disk = external_storage().check_connected()
+    return disk_space(disk or "/dev/root")
+
+m_oSYSVOLClass = None
+def _volume():
+    global m_oSYSVOLClass
+    if not m_oSYSVOLClass:
+        m_oSYSVOLClass = sys_volume() # reads volume on init
+        return m_oSYSVOLClass.m_iSysVol
+    return m_oSYSVOLClass.get_vol()
+
+def _extstrg_service():
+    return external_storage().check()
+
+m_oOLEDClass = None
+def _oled_class():
+    global m_oOLEDClass
+    if not m_oOLEDClass: m_oOLEDClass = oled()
+    return m_oOLEDClass
+
+def _oled_status():
+    return _oled_class().check()
+
+def _oled_config():
+    """ Return None if service is not reachable """
+    if not _oled_class().service_connection(): return None
+    _oled_class().get_config()
+    return dict(_oled_class().m_lOLEDScrns)
+
+DATABUS = data_bus()
+DATABUS.register('temperature', _temperature, 2)
+DATABUS.register('storage_sd', _storage_sd, 5)
+DATABUS.register('storage_usb', _storage_usb, 5)
+DATABUS.register('storage_roms', _storage_roms, 5)
+DATABUS.register('ip_public', lambda: get_ip_address("public"), 2)
+DATABUS.register('ip_eth0', lambda: get_ip_address("eth0"), 2)
+DATABUS.register('ip_wlan0', lambda: get_ip_address("wlan0"), 2)
+DATABUS.register('volume', _volume, 2)
+DATABUS.register('extstrg_service', _extstrg_service, 2)
+DATABUS.register('oled_status', _oled_status, 2)
+DATABUS.register('oled_config', _oled_config, 2)
@@ -21,6 +21,7 @@ with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 import pygame, os, sys, logging, math
+import threading, collections
 
 sys.dont_write_bytecode = False
 
@@ -30,6 +31,7 @@ from main_paths import MODULES_PATH
 sys.path.append(MODULES_PATH)
 
 #from launcher_module.core_paths import *
+from launcher_module.text_cache import TEXT_CACHE
 from config_core import core
 
 C_BLACK  = pygame.Color(  0,   0,   0)
@@ -40,19 +42,68 @@ C_GREY = pygame.Color(125, 125, 125)
 C_BLUEDK = pygame.Color(0, 9, 28)
 C_ORANGE = pygame.Color(255, 140, 0)
 
+IMG_CACHE_BUDGET = 4 * 1024 * 1024 # bytes of decoded images, GPU mem is shared
+
+class surface_cache(object):
+    """
+    LRU of decoded skin images keyed by (path, mtime, scale, rotation)
+    so a changed file on disk is loaded again. Returned surfaces are
+    shared, only blit from them.
+    """
+    def __init__(self, p_iBudget = IMG_CACHE_BUDGET):
+        self.m_iBudget = p_iBudget
+        self.m_iSize = 0
+        self.m_dCache = collections.OrderedDict()
+        self.m_oLock = threading.Lock()
+
+    def get(self, p_sPath, p_lScale = None, p_iRotate = 0):
+        try: mtime = os.stat(p_sPath).st_mtime_ns
+        except OSError: return None
+        key = (p_sPath, mtime, p_lScale, p_iRotate)
+        with self.m_oLock:
+            sf = self.m_dCache.get(key)
+            if sf:
+                self.m_dCache.move_to_end(key)
+                return sf
+        sf = self._load(p_sPath, p_lScale, p_iRotate)
+        if not sf: return None
+        with self.m_oLock:
+            if not key in self.m_dCache:
+                self.m_dCache[key] = sf
+                self.m_iSize += self._bytes(sf)
+            while self.m_iSize > self.m_iBudget and len(self.m_dCache) > 1:
+                old = self.m_dCache.popitem(last = False)[1]
+                self.m_iSize -= self._bytes(old)
+        return sf
+
+    def clear(self):
+        with self.m_oLock:
+            self.m_dCache.clear()
+            self.m_iSize = 0
+
+    def _load(self, p_sPath, p_lScale, p_iRotate):
+        try:
+            img = pygame.image.load(p_sPath).convert_alpha()
+            rect = img.get_rect()
+            rect.bottomleft = (0, rect.height)
+            sf = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
+            sf.blit(img, rect)
+        except:
+            return None
+        if p_lScale: sf = pygame.transform.scale(sf, p_lScale)
+        if p_iRotate: sf = pygame.transform.rotate(sf, p_iRotate)
+        return sf
+
+    def _bytes(self, p_oSf):
+        return p_oSf.get_width() * p_oSf.get_height() * p_oSf.get_bytesize()
+
+IMG_CACHE = surface_cache()
+
 class render(core):
     def _img_render(self, p_sImg):
         if p_sImg:
             path = os.path.join(self.m_sSkinPath, p_sImg)
-            try:
-                img = pygame.image.load(path).convert_alpha()
-                rect = img.get_rect()
-                rect.bottomleft = (0, rect.height)
-                sf = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-                sf.blit(img, rect)
-                return sf
-            except:
-                return None
+            return IMG_CACHE.get(path)
 
     def _text_render(self, p_sText, p_lTextColor, p_lShadowColor = None,
                      p_bCropText = False, p_iShadowDrop = 1):
@@ -78,17 +129,9 @@ class render(core):
             p_oShadowColor = p_lShadowColor
 
         if self.dCFG['cap']: p_sText = p_sText.upper()
-        img = self.m_oFontText.render(p_sText, False, p_oTextColor)
-        rect = img.get_rect()
-        sf = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-        if p_oShadowColor:
-            shadow = self.m_oFontText.render(p_sText, False, p_oShadowColor)
-            shadow_rect = img.get_rect()
-            shadow_rect.x += p_iShadowDrop
-            shadow_rect.y += p_iShadowDrop
-            sf.blit(shadow, shadow_rect)
-        sf.blit(img, rect)
-        return sf
+        p_tFontKey = (self.m_sSkinPath, self.dCFG['font'], self.dCFG['font_size'])
+        return TEXT_CACHE.render(self.m_oFontText, p_tFontKey, p_sText,
+                                 p_oTextColor, p_oShadowColor, p_iShadowDrop)
 
     def _render_line_menu(self, p_lLine):
         oLineSf = pygame.Surface((self.m_iText_rgt - self.m_iText_lft,
@@ -173,7 +216,9 @@ class render(core):
         crop = text.get_rect().width - calc
         if self.m_lLines.index(p_lLine) == self.m_iLine:
             if calc > 4: # text needs scroll or crop
+                p_bWake = self.m_iScroll_dif != calc
                 self.m_iScroll_dif = calc
+                if p_bWake: self._anim_wake()
                 oTextSf = pygame.Surface((crop, self.dCFG['font_line'] + 4),
                                          pygame.SRCALPHA)
                 rect = text.get_rect()
@@ -20,10 +20,9 @@ with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 """
 
-import sys, os, imp, math, re, time, shlex
+import sys, os, imp, math, re, time, shlex, threading
 import logging, subprocess, rpyc, filecmp
 import xml.etree.ElementTree as ET
-import socket, fcntl, struct
 import pygame
 
 sys.dont_write_bytecode = False
@@ -51,6 +50,7 @@ from launcher_module.utils import check_process, touch_file, get_side, md5_file,
                                   module_loaded
 from launcher_module.file_helpers import ini_get, ini_getlist, modify_line, \
                                          ini_set, remove_line
+from launcher_module.net_info import NETINFO
 from launcher_module.core_controls import joystick, CRT_UP, CRT_DOWN, \
                                           CRT_LEFT, CRT_RIGHT, CRT_OK, \
                                           CRT_CANCEL
@@ -94,13 +94,12 @@ def find_submenus(p_sPath, p_sMask):
         cname = re.sub(r'\d+$', "", str(sub.split(".")[0]))
         if p_sMask == cname and sub.endswith(".py"):
             logging.info("loaded: %s " % sub)
-            sClass = sub[:-3]
-            info = imp.find_module(sClass, [p_sPath])
-            submenus.append({"name": sClass, "info": info})
+            submenus.append({"name": sub[:-3], "path": location})
     return submenus
 
 def load_submenu(p_oPlugin):
-    _module = imp.load_module(p_oPlugin["name"], *p_oPlugin["info"])
+    # load_source closes the module file, find_module handles leaked
+    _module = imp.load_source(p_oPlugin["name"], p_oPlugin["path"])
     return getattr(_module, p_oPlugin["name"])
 
 def explore_list(p_iJoy, p_sValue, p_lList = None):
@@ -126,36 +125,20 @@ def explore_list(p_iJoy, p_sValue, p_lList = None):
     return new
 
 def get_ip_address(p_sIFname):
+    """ Never blocks, public IP is resolved on background by NETINFO """
     if p_sIFname == "public":
-        addr = os.popen('wget -qO- http://ipecho.net/plain --timeout=0.8 --tries=1 ; echo').readlines(-1)[0].strip()
+        addr = NETINFO.public_ip()
         if addr: return addr
-        else: return "Not Available"
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    try:
-        # Get MAC address
-        #addr = fcntl.ioctl(s.fileno(), 0x8927,  struct.pack('256s', p_sIFname[:15].encode('utf-8')))
-        #addr = ''.join(['%02x:' % b for b in addr[18:24]])[:-1]
-        # Get IP address
-        addr = socket.inet_ntoa(fcntl.ioctl(s.fileno(),
-               0x8915, # SIOCGIFADDR
-               struct.pack('256s', p_sIFname[:15].encode('utf-8')))[20:24])
-    except Exception as e:
+        elif NETINFO.public_ip_pending(): return "Checking..."
+        return "Not Available"
+    addr = NETINFO.local_ip(p_sIFname)
+    p_bLink = NETINFO.link(p_sIFname)
+    if not addr:
+        if not p_bLink: addr = "Disconnected"
+        elif p_sIFname == "wlan0": addr = "Connected"
+        else: addr = "Trying to get IP..."
+    elif p_sIFname == "eth0" and not p_bLink:
         addr = "Disconnected"
-
-    if p_sIFname == "wlan0" and addr == "Disconnected":
-        command = "iwgetid -r"
-        try: output = subprocess.check_output(command, shell=True).decode("utf-8").strip()
-        except: output = None
-        if output: addr = "Connected"
-
-    if p_sIFname == "eth0":
-        command = "sudo ethtool %s | grep \"Link detected\"" % p_sIFname
-        try: output = subprocess.check_output(command, shell=True).decode("utf-8").strip()
-        except: output = "no"
-        if addr != "Disconnected":
-            if "no" in output.lower(): addr = "Disconnected"
-        elif addr == "Disconnected":
-            if "yes" in output.lower(): addr = "Trying to get IP..."
     return addr
 
 def get_modes():
@@ -589,102 +572,184 @@ class wifi(object):
         self.m_sPwd = p_sPWD
         return True
 
+class menu_line(dict):
+    """
+    Menu line that asks its menu_lines owner for a new generation
+    every time any of its values really changes.
+    """
+    m_oOwner = None
+    m_iGen = 0
+
+    def _changed(self):
+        if self.m_oOwner is not None: self.m_oOwner.changed(self)
+
+    def __setitem__(self, p_sKey, p_oValue):
+        if p_sKey in self and self[p_sKey] == p_oValue: return
+        dict.__setitem__(self, p_sKey, p_oValue)
+        self._changed()
+
+    def __delitem__(self, p_sKey):
+        dict.__delitem__(self, p_sKey)
+        self._changed()
+
+    def update(self, *args, **kwargs):
+        p_bCheck = False
+        for key, value in dict(*args, **kwargs).items():
+            if key in self and self[key] == value: continue
+            dict.__setitem__(self, key, value)
+            p_bCheck = True
+        if p_bCheck: self._changed()
+
+    def setdefault(self, p_sKey, p_oValue = None):
+        if not p_sKey in self: self[p_sKey] = p_oValue
+        return self[p_sKey]
+
+    def pop(self, *args):
+        p_bCheck = args[0] in self
+        value = dict.pop(self, *args)
+        if p_bCheck: self._changed()
+        return value
+
+    def popitem(self):
+        item = dict.popitem(self)
+        self._changed()
+        return item
+
+    def clear(self):
+        dict.clear(self)
+        self._changed()
+
+class menu_lines(list):
+    """
+    List of menu lines with a generation counter. Any change of the
+    list or its lines increments it, so checking for changes is just
+    comparing a number. Lines remember the generation of their last
+    change and 'shape' the last one that added, removed or moved lines.
+    Dicts added to the list are converted to menu_line.
+    """
+    def __init__(self, p_lLines = ()):
+        list.__init__(self)
+        self.m_oLock = threading.Lock()
+        self.m_iGen = 0
+        self.m_iShape = 0
+        self.extend(p_lLines)
+
+    def generation(self):
+        """ Return (generation, shape generation) """
+        with self.m_oLock:
+            return (self.m_iGen, self.m_iShape)
+
+    def changed(self, p_oLine = None):
+        with self.m_oLock:
+            self.m_iGen += 1
+            if p_oLine is None: self.m_iShape = self.m_iGen
+            else: p_oLine.m_iGen = self.m_iGen
+
+    def _line(self, p_oItem):
+        if type(p_oItem) is dict: p_oItem = menu_line(p_oItem)
+        if isinstance(p_oItem, menu_line): p_oItem.m_oOwner = self
+        return p_oItem
+
+    def append(self, p_oItem):
+        list.append(self, self._line(p_oItem))
+        self.changed()
+
+    def insert(self, p_iIndex, p_oItem):
+        list.insert(self, p_iIndex, self._line(p_oItem))
+        self.changed()
+
+    def extend(self, p_lItems):
+        list.extend(self, [self._line(item) for item in p_lItems])
+        self.changed()
+
+    def __iadd__(self, p_lItems):
+        self.extend(p_lItems)
+        return self
+
+    def __setitem__(self, p_oIndex, p_oItem):
+        if isinstance(p_oIndex, slice):
+            p_oItem = [self._line(item) for item in p_oItem]
+        else: p_oItem = self._line(p_oItem)
+        list.__setitem__(self, p_oIndex, p_oItem)
+        self.changed()
+
+    def __delitem__(self, p_oIndex):
+        list.__delitem__(self, p_oIndex)
+        self.changed()
+
+    def pop(self, *args):
+        item = list.pop(self, *args)
+        self.changed()
+        return item
+
+    def remove(self, p_oItem):
+        list.remove(self, p_oItem)
+        self.changed()
+
+    def clear(self):
+        list.clear(self)
+        self.changed()
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self.changed()
+
+    def reverse(self):
+        list.reverse(self)
+        self.changed()
+
 class change_watcher(object):
+    """
+    Tell if current page of a menu must be redrawn. With menu_lines
+    nothing is compared while its generation doesn't move; then only
+    the lines of current page are looked at. Plain lists are always
+    reported as changed.
+    """
     m_iPrevLine = 0
     m_iMaxLines = 0
-
-    m_lPrevIconList = []
-    m_lPrevTextList = []
-    m_lPrevValueList = []
-    m_lPrevColor = []
-
-    m_lCurIconList = []
-    m_lCurTextList = []
-    m_lCurValueList = []
-    m_lCurColor = []
+    m_iPrevGen = 0
+    m_oPrevList = None
 
     def __init__(self, p_lInitList, p_iInitLine):
-        self._get_values(p_lInitList)
-        self.m_lPrevIconList = self.m_lCurIconList.copy()
-        self.m_lPrevTextList = self.m_lCurTextList.copy()
-        self.m_lPrevValueList = self.m_lCurValueList.copy()
-        self.m_lPrevColor = self.m_lCurColor.copy()
+        self.m_oPrevList = p_lInitList
+        self.m_iPrevGen = self._generation(p_lInitList)[0]
         self.m_iPrevLine = p_iInitLine
 
     def check(self, p_lCurList, p_iCurLine, p_MaxLines):
         p_bCheck = False
         self.m_iMaxLines = p_MaxLines
-        self._get_values(p_lCurList)
+        gen, shape = self._generation(p_lCurList)
 
-        # if there is a line change
-        if self.m_iPrevLine != p_iCurLine:
-            p_bCheck = True
-        # if not same number of lines
-        elif len(self.m_lPrevTextList) != len(self.m_lCurTextList):
+        # if there is a line change or a new list
+        if self.m_iPrevLine != p_iCurLine or self.m_oPrevList is not p_lCurList:
             p_bCheck = True
-        # if any icon, value, text change
-        elif self._changes_in_page(p_iCurLine):
+        elif gen is None:
             p_bCheck = True
+        elif gen != self.m_iPrevGen:
+            # if lines were added, removed or moved
+            if shape > self.m_iPrevGen: p_bCheck = True
+            # if any line changed in current page
+            elif self._changes_in_page(p_lCurList, p_iCurLine): p_bCheck = True
 
         self.m_iPrevLine = p_iCurLine
-        self.m_lPrevIconList = self.m_lCurIconList.copy()
-        self.m_lPrevTextList = self.m_lCurTextList.copy()
-        self.m_lPrevValueList = self.m_lCurValueList.copy()
-        self.m_lPrevColor = self.m_lCurColor.copy()
+        self.m_oPrevList = p_lCurList
+        self.m_iPrevGen = gen
         return p_bCheck
 
-    def _get_values(self, p_lList):
-        self.m_lCurIconList = []
-        self.m_lCurTextList = []
-        self.m_lCurValueList = []
-        self.m_lCurColor = []
-        for item in p_lList:
-            try: self.m_lCurIconList.append(item['icon'])
-            except: self.m_lCurIconList.append(None)
-            try: self.m_lCurTextList.append(item['text'])
-            except: self.m_lCurTextList.append(None)
-            try: self.m_lCurValueList.append(item['value'])
-            except: self.m_lCurValueList.append(None)
-            try: self.m_lCurColor.append(item['color_val'])
-            except: self.m_lCurColor.append(None)
-
-    def _changes_in_page(self, p_iCurLine):
+    def _generation(self, p_lList):
+        try: return p_lList.generation()
+        except AttributeError: return (None, None)
+
+    def _changes_in_page(self, p_lCurList, p_iCurLine):
         """
-        Compare icons, values and texts from previous and current lists
-        Return True if change is detected on the same page, False if not
+        Return True if any line of current page changed since last
+        check, False if not
         """
-        size = len(self.m_lCurValueList)
-        for i in range(0, size):
-            if self.m_lPrevValueList[i] != self.m_lCurValueList[i]:
-                if self._is_same_page(i, p_iCurLine):
-                    return True
-
-        size = len(self.m_lCurTextList)
-        for i in range(0, size):
-            if self.m_lPrevTextList[i] != self.m_lCurTextList[i]:
-                if self._is_same_page(i, p_iCurLine):
-                    return True
-
-        size = len(self.m_lCurIconList)
-        for i in range(0, size):
-            if self.m_lPrevIconList[i] != self.m_lCurIconList[i]:
-                if self._is_same_page(i, p_iCurLine):
-                    return True
-
-        size = len(self.m_lCurColor)
-        for i in range(0, size):
-            if self.m_lPrevColor[i] != self.m_lCurColor[i]:
-                if self._is_same_page(i, p_iCurLine):
-                    return True
-
-        return False
-
-    def _is_same_page(self, p_iChangedLine, p_iCurLine):
         p_iPageCur = int(math.ceil((p_iCurLine + 1) \
                           * 1.0 / self.m_iMaxLines * 1.0))
-        p_iPagePos = int(math.ceil((p_iChangedLine + 1) \
-                          * 1.0 / self.m_iMaxLines * 1.0))
-        if p_iPageCur == p_iPagePos: return True
+        first = (p_iPageCur - 1) * self.m_iMaxLines
+        for line in p_lCurList[first:first + self.m_iMaxLines]:
+            if getattr(line, 'm_iGen', 0) > self.m_iPrevGen: return True
         return False
 
 class sys_volume(object):
@@ -20,8 +20,9 @@ with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 """
 
-import sys, os, time, logging
-import filecmp
+import sys, os, re, time, logging
+import shutil, subprocess
+import xml.etree.ElementTree as ET
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.abspath(SCRIPT_DIR + "/../"))
@@ -33,11 +34,8 @@ from launcher_module.core_paths import ES_CFG_PATH, ES_PATH, CRT_ES_CONFIGS_PATH
                                        ROTMODES_TATE3_FILE, RETROPIE_SPLASH_PATH, \
                                        RETROPIE_CFG_PATH, CRT_UTILITY_FILE, \
                                        ES_THEMES_SEC_PATH, ES_THEMES_PRI_PATH, \
-                                       CRT_LNCH_IMG_ROT_PATH
-from launcher_module.file_helpers import ini_get, touch_file, \
-                                         get_xml_value_esconfig, \
-                                         set_xml_value_esconfig, \
-                                         ini_set
+                                       CRT_LNCH_IMG_ROT_PATH, ES_CFG_FILE
+from launcher_module.file_helpers import ini_get
 from launcher_module.utils import get_side
 
 ESSYSTEMS_TEMP_FILE = os.path.join(ES_CFG_PATH, "es_systems.cfg")
@@ -51,8 +49,185 @@ INTRO_VID0_FILE = os.path.join(CRT_ES_RES_PATH, "splash_screen/CRT-Retropie-Load
 INTRO_VID1_FILE = os.path.join(CRT_ES_RES_PATH, "splash_screen/CRT-Retropie-Load_V1.mp4")
 INTRO_VID3_FILE = os.path.join(CRT_ES_RES_PATH, "splash_screen/CRT-Retropie-Load_V3.mp4")
 
+def _writable(p_sPath):
+    return os.access(os.path.dirname(p_sPath) or ".", os.W_OK)
+
+def _sudo(*p_lArgs):
+    if subprocess.call(["sudo"] + list(p_lArgs)):
+        raise OSError("failed: sudo %s" % " ".join(p_lArgs))
+
+def _rename(p_sSrc, p_sDst):
+    if _writable(p_sSrc) and _writable(p_sDst): os.replace(p_sSrc, p_sDst)
+    else: _sudo("mv", "-T", p_sSrc, p_sDst)
+
+def _delete(p_sPath):
+    if not os.path.lexists(p_sPath): return
+    if not _writable(p_sPath): _sudo("rm", "-rf", p_sPath)
+    elif os.path.isdir(p_sPath) and not os.path.islink(p_sPath):
+        shutil.rmtree(p_sPath)
+    else: os.remove(p_sPath)
+
+def _symlink(p_sTarget, p_sPath):
+    if _writable(p_sPath): os.symlink(p_sTarget, p_sPath)
+    else: _sudo("ln", "-s", p_sTarget, p_sPath)
+
+def _linked(p_sTarget, p_sPath):
+    """ True if p_sPath is already a symlink to p_sTarget """
+    return os.path.islink(p_sPath) and os.readlink(p_sPath) == p_sTarget
+
+class es_transaction(object):
+    """
+    File operations of a rotation. Actions are planned first without
+    touching anything, then applied in order; every replaced or removed
+    path is renamed to a backup instead of being deleted, so a failure
+    restores previous state. Backups are dropped only after all actions
+    are done. Files are installed as symlinks, nothing is copied.
+    """
+    BACKUP = ".crt_bak"
+    STAGE = ".crt_new"
+
+    def __init__(self):
+        self.m_lPlan = []   # [(action, args)]
+        self.m_lUndo = []   # callables restoring applied actions
+        self.m_lBackups = []
+
+    def link(self, p_sTarget, p_sPath):
+        """ Make p_sPath a symlink to p_sTarget """
+        if not _linked(p_sTarget, p_sPath):
+            self.m_lPlan.append((self._link, (p_sTarget, p_sPath)))
+
+    def remove(self, p_sPath):
+        if os.path.lexists(p_sPath):
+            self.m_lPlan.append((self._remove, (p_sPath,)))
+
+    def rename(self, p_sSrc, p_sDst):
+        """ Move p_sSrc to p_sDst if p_sDst is not there yet """
+        if os.path.lexists(p_sSrc) and not os.path.lexists(p_sDst):
+            self.m_lPlan.append((self._rename, (p_sSrc, p_sDst)))
+
+    def mkdir(self, p_sPath):
+        if not os.path.lexists(p_sPath):
+            self.m_lPlan.append((self._mkdir, (p_sPath,)))
+
+    def write(self, p_sFile, p_sText, p_sOld = None):
+        """ Replace text of p_sFile, p_sOld is current one if known """
+        if p_sText != p_sOld:
+            self.m_lPlan.append((self._write, (p_sFile, p_sText)))
+
+    def touch(self, p_sPath):
+        if not os.path.lexists(p_sPath): self.write(p_sPath, "")
+
+    def actions(self):
+        return len(self.m_lPlan)
+
+    def apply(self):
+        """ Run planned actions, return False if rolled back """
+        try:
+            for action, args in self.m_lPlan: action(*args)
+        except Exception as e:
+            logging.info("ERROR: ES rotation failed, rolling back: %s" % e)
+            self.rollback()
+            return False
+        for backup in self.m_lBackups:
+            try: _delete(backup)
+            except Exception as e:
+                logging.info("WARNING: can't remove %s: %s" % (backup, e))
+        self.m_lUndo = []
+        self.m_lBackups = []
+        return True
+
+    def rollback(self):
+        while self.m_lUndo:
+            undo = self.m_lUndo.pop()
+            try: undo()
+            except Exception as e:
+                logging.info("ERROR: rolling back ES rotation: %s" % e)
+
+    def _backup(self, p_sPath):
+        """ Rename existing p_sPath out of the way, restore on undo """
+        if not os.path.lexists(p_sPath): return
+        backup = p_sPath + self.BACKUP
+        _delete(backup)
+        _rename(p_sPath, backup)
+        self.m_lBackups.append(backup)
+        self.m_lUndo.append(lambda: _rename(backup, p_sPath))
+
+    def _install(self, p_sStage, p_sPath):
+        self._backup(p_sPath)
+        _rename(p_sStage, p_sPath)
+        self.m_lUndo.append(lambda: _delete(p_sPath))
+
+    def _link(self, p_sTarget, p_sPath):
+        stage = p_sPath + self.STAGE
+        _delete(stage)
+        _symlink(p_sTarget, stage)
+        self._install(stage, p_sPath)
+
+    def _write(self, p_sFile, p_sText):
+        stage = p_sFile + self.STAGE
+        with open(stage, "w") as f: f.write(p_sText)
+        if os.path.exists(p_sFile): shutil.copymode(p_sFile, stage)
+        self._install(stage, p_sFile)
+
+    def _remove(self, p_sPath):
+        self._backup(p_sPath)
+
+    def _rename(self, p_sSrc, p_sDst):
+        _rename(p_sSrc, p_sDst)
+        self.m_lUndo.append(lambda: _rename(p_sDst, p_sSrc))
+
+    def _mkdir(self, p_sPath):
+        os.mkdir(p_sPath)
+        self.m_lUndo.append(lambda: os.rmdir(p_sPath))
+
+def ini_set_text(p_sText, p_sKeyMask, p_sNewValue):
+    """ Like ini_set() on text already read, return new text """
+    lines = p_sText.splitlines(True)
+    for i, line in enumerate(lines):
+        lValues = line.strip().replace('"', '').replace('=',' ')
+        lValues = re.sub(r' +', " ", lValues).split(' ')
+        if p_sKeyMask == lValues[0].strip():
+            lines[i] = '%s = "%s"\n' % (p_sKeyMask, p_sNewValue)
+    return "".join(lines)
+
+def _esconfig_lines(p_sText):
+    """
+    es_settings.cfg elements. Text is parsed as it is, if it has not a
+    root element one is added, like get_xml_value_esconfig() does.
+    """
+    try: return ET.fromstring(p_sText)
+    except ET.ParseError: pass
+    lines = [line for line in p_sText.splitlines()
+             if line.strip() and not ("xml" in line and "version" in line)]
+    return ET.fromstringlist(["<root>\n"] + [l + "\n" for l in lines] + ["</root>\n"])
+
+def esconfig_get(p_sText, p_sFindMask):
+    """ Like get_xml_value_esconfig() on text already read """
+    for child in _esconfig_lines(p_sText):
+        if child.attrib.get("name") == p_sFindMask:
+            return child.attrib.get("value")
+    return None
+
+def esconfig_set(p_sText, p_sFindMask, p_sValue):
+    """ Like set_xml_value_esconfig() on text, return new text """
+    for child in _esconfig_lines(p_sText):
+        if child.attrib.get("name") != p_sFindMask: continue
+        old = ET.tostring(child).decode("utf-8").strip()
+        new = old.replace(child.attrib.get("value"), p_sValue)
+        lines = p_sText.splitlines(True)
+        for i, line in enumerate(lines):
+            if old in line:
+                indent = line[:len(line) - len(line.lstrip())]
+                lines[i] = indent + new + "\n"
+        return "".join(lines)
+    return p_sText
+
 class frontend_rotation():
-    """ Class for EmulationStation rotation """
+    """
+    Class for EmulationStation rotation. Every rotation is planned as
+    an es_transaction from current state, so only what differs from
+    wanted side is touched, and then applied at once.
+    """
     sSystem50 = "system50"
     sSystem60 = "system60"
     iCurSide = 0
@@ -65,17 +240,30 @@ class frontend_rotation():
         self._check_vertical_themes()
 
     def rotate(self, p_iToMode = 0):
-        self.iCurSide = get_side()
         if not self._check_rotation_mode(p_iToMode): return False
-        self._prepare_theme_configuration()
-        self._frontend_rotation()
-        return True
+        try: oTrans = self.plan(p_iToMode)
+        except Exception as e:
+            logging.info("ERROR: can't plan ES rotation: %s" % e)
+            return False
+        logging.info("INFO: ES rotation, %i file actions" % oTrans.actions())
+        return oTrans.apply()
+
+    def plan(self, p_iToMode):
+        """ Return es_transaction to rotate ES to p_iToMode """
+        self.iCurSide = get_side()
+        self.iToMode = p_iToMode
+        oTrans = es_transaction()
+        self._prepare_theme_configuration(oTrans)
+        self._frontend_rotation(oTrans)
+        return oTrans
 
     def _check_vertical_themes(self):
         VTHEMES_SRC_PATH = os.path.join(CRT_ES_RES_PATH, "themes")
         for item in os.listdir(VTHEMES_SRC_PATH):
-            if os.path.isdir(os.path.join(VTHEMES_SRC_PATH, item)):
-                THEME_LIST.append("themes/%s" % item)
+            theme = "themes/%s" % item
+            if os.path.isdir(os.path.join(VTHEMES_SRC_PATH, item)) and \
+               not theme in THEME_LIST:
+                THEME_LIST.append(theme)
 
     def _check_rotation_mode(self, p_iToMode):
         """ Check if argument is valid """
@@ -85,32 +273,46 @@ class frontend_rotation():
         self.iToMode = p_iToMode
         return True
 
-    def _prepare_theme_configuration(self):
-        self._save_current_theme()
-        self._set_new_theme()
+    def _prepare_theme_configuration(self, p_oTrans):
+        """ es_settings.cfg is read once and written once if changed """
+        p_sText = None
+        if os.path.isfile(ES_CFG_FILE):
+            with open(ES_CFG_FILE, "r") as f: p_sText = f.read()
+        p_sCurTheme = esconfig_get(p_sText, "ThemeSet") if p_sText else None
+        p_lSaved = self._save_current_theme(p_oTrans, p_sCurTheme)
+        p_sTheme = self._set_new_theme(p_lSaved)
+        if p_sCurTheme and p_sTheme != p_sCurTheme:
+            p_sNewText = esconfig_set(p_sText, "ThemeSet", p_sTheme)
+            p_oTrans.write(ES_CFG_FILE, p_sNewText, p_sText)
 
-    def _save_current_theme(self):
+    def _save_current_theme(self, p_oTrans, p_sCurTheme):
+        """
+        Stage current theme in utility.cfg, return [key, theme] saved
+        so _set_new_theme() doesn't read the old one from disk.
+        """
         # identify element theme to find in CRT config
         p_sIni = "h_theme"
         if self.iCurSide != 0:
             p_sIni = "v_theme"
         # get current saved theme for current side
         p_sTheme = ini_get(CRT_UTILITY_FILE, p_sIni)
-        p_sCurTheme = get_xml_value_esconfig("ThemeSet")
-        if p_sTheme != p_sCurTheme:
-            ini_set(CRT_UTILITY_FILE, p_sIni, p_sCurTheme)
+        if p_sCurTheme and p_sTheme != p_sCurTheme and \
+           os.path.isfile(CRT_UTILITY_FILE):
+            with open(CRT_UTILITY_FILE, "r") as f: p_sText = f.read()
+            p_oTrans.write(CRT_UTILITY_FILE,
+                           ini_set_text(p_sText, p_sIni, p_sCurTheme), p_sText)
+        return [p_sIni, p_sCurTheme or p_sTheme]
 
-    def _set_new_theme(self):
+    def _set_new_theme(self, p_lSaved = None):
         """
         Identify saved theme for next orientation in utility.cfg
         If theme not found, default ones will be applied.
         """
-        #p_sTheme = None
-
         p_sIni = "h_theme"
         if self.iToMode != 0:
             p_sIni = "v_theme"
-        p_sTheme = ini_get(CRT_UTILITY_FILE, p_sIni)
+        if p_lSaved and p_lSaved[0] == p_sIni: p_sTheme = p_lSaved[1]
+        else: p_sTheme = ini_get(CRT_UTILITY_FILE, p_sIni)
 
         """ If theme was not found then apply by default """
         # by default vertical theme
@@ -119,30 +321,26 @@ class frontend_rotation():
         # by default horizontal theme
         elif self.iToMode == 0 and not p_sTheme:
             p_sTheme = "UniFlyered-Color"
-        # no change if current configuration is the same
-        if p_sTheme != get_xml_value_esconfig("ThemeSet"):
-            set_xml_value_esconfig("ThemeSet", p_sTheme)
+        return p_sTheme
 
-    def _replace_launching_image(self, p_sImage, p_sFileTail):
+    def _replace_launching_image(self, p_oTrans, p_sImage, p_sFileTail):
         p_sMask = p_sFileTail + p_sImage[-4:]
         if not p_sMask in p_sImage:
             return
         image_cur = RETROPIE_CFG_PATH + "/" + p_sImage.replace(p_sFileTail, "")
         sImageSet = CRT_LNCH_IMG_ROT_PATH + "/" + p_sImage
-        if not os.path.exists(image_cur):
+        if not os.path.lexists(image_cur):
             path = os.path.dirname(p_sImage)
             img = os.path.basename(p_sImage)
             img = "dis_" + img.replace(p_sFileTail, "")
             imgpth = os.path.join(RETROPIE_CFG_PATH, path, img )
-            if os.path.exists(imgpth): image_cur = imgpth
+            if os.path.lexists(imgpth): image_cur = imgpth
             logging.info("INFO: rotating image: %s" % imgpth)
-        try:
-            if not filecmp.cmp(image_cur, sImageSet):
-                os.system('cp "%s" "%s"' % (sImageSet, image_cur))
-        except:
-            pass
+        # only replace images in use, never create removed ones
+        if os.path.lexists(image_cur):
+            p_oTrans.link(sImageSet, image_cur)
 
-    def _rotate_launching_images(self, p_sFileTail):
+    def _rotate_launching_images(self, p_oTrans, p_sFileTail):
         for Level1 in os.listdir(CRT_LNCH_IMG_ROT_PATH):
             LEVEL1 = os.path.join(CRT_LNCH_IMG_ROT_PATH, Level1)
             if os.path.isdir(LEVEL1):
@@ -150,28 +348,28 @@ class frontend_rotation():
                     LEVEL2 = os.path.join(LEVEL1, Level2)
                     sFile2 = os.path.join(Level1, Level2)
                     if os.path.isfile(LEVEL2):
-                        self._replace_launching_image(sFile2, p_sFileTail)
+                        self._replace_launching_image(p_oTrans, sFile2, p_sFileTail)
 
-    def _frontend_rotation(self):
+    def _frontend_rotation(self, p_oTrans):
         p_sIntro = None
 
         if self.iToMode == 0:
             p_sFileTail = "_0"
             p_sIntro = INTRO_VID0_FILE
             p_sTrMode = None
-            os.system('sudo rm %s >> /dev/null 2>&1' % ESSYSTEMS_TEMP_FILE)
-            os.system('sudo mv %s %s >> /dev/null 2>&1' % (ESTHEMES_DIS_PATH, ES_THEMES_PRI_PATH))
+            p_oTrans.remove(ESSYSTEMS_TEMP_FILE)
+            p_oTrans.rename(ESTHEMES_DIS_PATH, ES_THEMES_PRI_PATH)
             for theme in THEME_LIST:
                 VTHEMES_DST_PATH = os.path.join(ES_CFG_PATH, theme)
-                os.system('sudo rm -R %s >> /dev/null 2>&1' % VTHEMES_DST_PATH)
+                p_oTrans.remove(VTHEMES_DST_PATH)
         else:
-            if not os.path.exists(ES_THEMES_SEC_PATH):
-                os.system('mkdir %s >> /dev/null 2>&1' % ES_THEMES_SEC_PATH)
-            os.system('cp %s %s >> /dev/null 2>&1' % (ESSYSTEMS_VERT_FILE, ESSYSTEMS_TEMP_FILE))
-            os.system('sudo mv %s %s >> /dev/null 2>&1' % (ES_THEMES_PRI_PATH, ESTHEMES_DIS_PATH))
+            p_oTrans.mkdir(ES_THEMES_SEC_PATH)
+            p_oTrans.link(ESSYSTEMS_VERT_FILE, ESSYSTEMS_TEMP_FILE)
+            p_oTrans.rename(ES_THEMES_PRI_PATH, ESTHEMES_DIS_PATH)
             for theme in THEME_LIST:
                 VTHEMES_SRC_PATH = os.path.join(CRT_ES_RES_PATH, theme)
-                os.system('cp -R %s %s >> /dev/null 2>&1' % (VTHEMES_SRC_PATH, ES_THEMES_SEC_PATH))
+                VTHEMES_DST_PATH = os.path.join(ES_CFG_PATH, theme)
+                p_oTrans.link(VTHEMES_SRC_PATH, VTHEMES_DST_PATH)
 
             if self.iToMode == 90:
                 p_sFileTail = "_1"
@@ -182,15 +380,16 @@ class frontend_rotation():
                 p_sIntro = INTRO_VID3_FILE
                 p_sTrMode = ROTMODES_TATE3_FILE
 
-        self._set_side_mode(p_sTrMode)
         # change video intro
-        os.system('sudo cp %s %s >> /dev/null 2>&1' % (p_sIntro, INTRO_VID_DEF_FILE))
+        p_oTrans.link(p_sIntro, INTRO_VID_DEF_FILE)
         # change launching images
-        self._rotate_launching_images(p_sFileTail)
+        self._rotate_launching_images(p_oTrans, p_sFileTail)
+        # side triggers go last, get_side() reads ES side from them
+        self._set_side_mode(p_oTrans, p_sTrMode)
 
-    def _set_side_mode(self, p_sTrMode):
+    def _set_side_mode(self, p_oTrans, p_sTrMode):
         """ Clean all side file triggers and create new """
-        os.system('rm %s >> /dev/null 2>&1' % ROTMODES_TATE1_FILE)
-        os.system('rm %s >> /dev/null 2>&1' % ROTMODES_TATE3_FILE)
+        for trigger in (ROTMODES_TATE1_FILE, ROTMODES_TATE3_FILE):
+            if trigger != p_sTrMode: p_oTrans.remove(trigger)
         if p_sTrMode:
-            touch_file(p_sTrMode)
+            p_oTrans.touch(p_sTrMode)
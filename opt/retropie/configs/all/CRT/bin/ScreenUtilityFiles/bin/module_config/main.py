@@ -29,7 +29,7 @@ sys.path.append(os.path.abspath(SCRIPT_DIR + "/../"))
 from main_paths import MODULES_PATH
 sys.path.append(MODULES_PATH)
 
-from config_utils import find_submenus, load_submenu
+from config_utils import find_submenus, load_submenu, menu_lines
 from launcher_module.core_paths import TMP_LAUNCHER_PATH
 from launcher_module.core_controls import CRT_UP, CRT_DOWN, \
                                           CRT_LEFT, CRT_RIGHT, CRT_OK, \
@@ -43,7 +43,7 @@ OPT_MASK = FILE_NAME + "_sub"
 
 class main(object):
 
-    m_lLines = []
+    m_lLines = menu_lines()
     m_lSubMenus = []
     m_lIcon = {'icon': "icon_info"}
     m_sSection = "MAIN"
@@ -30,9 +30,10 @@ sys.path.append(os.path.abspath(SCRIPT_DIR + "/../"))
 from main_paths import MODULES_PATH
 sys.path.append(MODULES_PATH)
 
-from config_utils import find_submenus, load_submenu, explore_list, run, \
+from config_utils import find_submenus, load_submenu, menu_lines, explore_list, run, \
                          check_es_restart, check_sys_reboot, render_image, \
                          press_back
+from config_datas import DATABUS
 from keyb.keyboard import keyboard
 from launcher_module.core_paths import TMP_LAUNCHER_PATH, CRT_ADDN_PATH, \
                                        RETROPIE_CFG_PATH, CRT_ROOT_PATH, \
@@ -61,7 +62,7 @@ class main_sub1_sub1(object):
     m_oThreads = []
     m_bThreadsStop = True
 
-    m_lLines = []
+    m_lLines = menu_lines()
     m_lMainOpts = []
     m_lSubMenus = []
     m_lOptFn = []
@@ -82,7 +83,7 @@ class main_sub1_sub1(object):
 
     def load(self):
         self.m_bThreadsStop = False
-        self._create_threads()
+        self._subscribe_datas()
 
     def info(self, p_sText = False, p_sIcon = False, p_bPress = False):
         self.m_lLayer40[0] = None
@@ -112,22 +113,9 @@ class main_sub1_sub1(object):
         self.info()
         return value
 
-    def _create_threads(self):
-        p_oDmns = [self._auto_load_datas]
-        self.m_oThreads = []
-        for dmn in p_oDmns:
-            t = threading.Thread(target=dmn)
-            t.start()
-            self.m_oThreads.append(t)
-
-    def _auto_load_datas(self):
-        p_lAutoL = []
-        timer = 0.5 # look for datas timer
-        if p_lAutoL:
-            while not self.m_bThreadsStop:
-                for opt in p_lAutoL:
-                    self._reload_opt_datas(opt)
-                time.sleep(timer)
+    def _subscribe_datas(self):
+        p_dAutoL = {}
+        DATABUS.subscribe(self, p_dAutoL)
 
     def _load_options(self):
         p_lOptFn = [self.opt1, self.opt2, self.opt3]
@@ -232,4 +220,5 @@ class main_sub1_sub1(object):
 
     def quit(self):
         self.m_bThreadsStop = True
+        DATABUS.unsubscribe(self)
         self.info()
\ No newline at end of file
@@ -30,10 +30,11 @@ sys.path.append(os.path.abspath(SCRIPT_DIR + "/../"))
 from main_paths import MODULES_PATH
 sys.path.append(MODULES_PATH)
 
-from config_utils import explore_list, find_submenus, load_submenu, \
+from config_utils import explore_list, find_submenus, load_submenu, menu_lines, \
                          check_es_restart, check_sys_reboot, \
                          background_music, sys_volume, render_image, \
                          press_back
+from config_datas import DATABUS
 from keyb.keyboard import keyboard
 from launcher_module.file_helpers import ini_get, ini_getlist, ini_set, \
                                          remove_line, add_line
@@ -54,7 +55,7 @@ class main_sub2(object):
     m_oThreads = []
     m_bThreadsStop = True
 
-    m_lLines = []
+    m_lLines = menu_lines()
     m_lMainOpts = []
     m_lSubMenus = []
     m_lOptFn = []
@@ -76,7 +77,7 @@ class main_sub2(object):
 
     def load(self):
         self.m_bThreadsStop = False
-        self._create_threads()
+        self._subscribe_datas()
         pass
 
     def info(self, p_sText = False, p_sIcon = False, p_bPress = False):
@@ -107,23 +108,11 @@ class main_sub2(object):
         self.info()
         return value
 
-    def _create_threads(self):
-        p_oDmns = [self._auto_load_datas]
-        self.m_oThreads = []
-        for dmn in p_oDmns:
-            t = threading.Thread(target=dmn)
-            t.start()
-            self.m_oThreads.append(t)
-
-    def _auto_load_datas(self):
-        p_lAutoL = [self.opt3, self.opt4, self.opt5,
-                    self.opt6]
-        timer = 0.5 # look for datas timer
-        if p_lAutoL:
-            while not self.m_bThreadsStop:
-                for opt in p_lAutoL:
-                    self._reload_opt_datas(opt)
-                time.sleep(timer)
+    def _subscribe_datas(self):
+        p_dAutoL = {'volume': [self.opt1],
+                    None: [self.opt3, self.opt4, self.opt5,
+                           self.opt6]}
+        DATABUS.subscribe(self, p_dAutoL)
 
     def _load_options(self):
         p_lOptFn = [self.opt1, self.opt2, self.opt3,
@@ -180,6 +169,7 @@ class main_sub2(object):
             if new != None:
                 new = int(new.replace("%", ''))
                 vol = self.m_oSYSVOLClass.set_vol(new)
+                DATABUS.invalidate('volume')
                 if vol == new:
                     if vol > 86: self.m_lLines[p_iLine]['color_val'] = "type_color_6"
                     else: self.m_lLines[p_iLine]['color_val'] = "type_color_1"
@@ -191,13 +181,14 @@ class main_sub2(object):
         p_lLines = {'text': "System Volume",
                     'color_val': "type_color_1"}
         m_lOpt = []
-        if self.m_oSYSVOLClass.get_vol():
+        vol = DATABUS.get('volume')
+        if vol:
             for i in range(0, 101):
                 m_lOpt.append(str(i) + "%")
             p_lLines.update({'options': m_lOpt})
-            if self.m_oSYSVOLClass.get_vol() > 86:
+            if vol > 86:
                 p_lLines.update({'color_val': "type_color_6"})
-            value = str(self.m_oSYSVOLClass.get_vol()) + "%"
+            value = str(vol) + "%"
         else:
             value = "--"
         p_lLines.update({'value': value})
@@ -374,4 +365,5 @@ class main_sub2(object):
 
     def quit(self):
         self.m_bThreadsStop = True
+        DATABUS.unsubscribe(self)
         self.info()
\ No newline at end of file
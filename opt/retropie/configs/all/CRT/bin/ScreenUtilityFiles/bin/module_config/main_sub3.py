@@ -30,9 +30,10 @@ sys.path.append(os.path.abspath(SCRIPT_DIR + "/../"))
 from main_paths import MODULES_PATH
 sys.path.append(MODULES_PATH)
 
-from config_utils import explore_list, find_submenus, load_submenu, \
+from config_utils import explore_list, find_submenus, load_submenu, menu_lines, \
                          check_es_restart, check_sys_reboot, render_image, \
                          press_back
+from config_datas import DATABUS
 from launcher_module.file_helpers import ini_get, ini_set
 from keyb.keyboard import keyboard
 from module_cable.controls_mapping import CTRLSMgmt
@@ -53,7 +54,7 @@ class main_sub3(object):
     m_oThreads = []
     m_bThreadsStop = True
 
-    m_lLines = []
+    m_lLines = menu_lines()
     m_lMainOpts = []
     m_lSubMenus = []
     m_lOptFn = []
@@ -74,7 +75,7 @@ class main_sub3(object):
 
     def load(self):
         self.m_bThreadsStop = False
-        self._create_threads()
+        self._subscribe_datas()
 
     def info(self, p_sText = False, p_sIcon = False, p_bPress = False):
         self.m_lLayer40[0] = None
@@ -104,22 +105,9 @@ class main_sub3(object):
         self.info()
         return value
 
-    def _create_threads(self):
-        p_oDmns = [self._auto_load_datas]
-        self.m_oThreads = []
-        for dmn in p_oDmns:
-            t = threading.Thread(target=dmn)
-            t.start()
-            self.m_oThreads.append(t)
-
-    def _auto_load_datas(self):
-        p_lAutoL = [self.opt1, self.opt2]
-        timer = 0.5 # look for datas timer
-        if p_lAutoL:
-            while not self.m_bThreadsStop:
-                for opt in p_lAutoL:
-                    self._reload_opt_datas(opt)
-                time.sleep(timer)
+    def _subscribe_datas(self):
+        p_dAutoL = {None: [self.opt1, self.opt2]}
+        DATABUS.subscribe(self, p_dAutoL)
 
     def _load_options(self):
         p_lOptFn = [self.opt1, self.opt2]
@@ -252,4 +240,5 @@ class main_sub3(object):
 
     def quit(self):
         self.m_bThreadsStop = True
+        DATABUS.unsubscribe(self)
         self.info()
\ No newline at end of file
@@ -30,9 +30,10 @@ sys.path.append(os.path.abspath(SCRIPT_DIR + "/../"))
 from main_paths import MODULES_PATH
 sys.path.append(MODULES_PATH)
 
-from config_utils import explore_list, find_submenus, load_submenu, \
+from config_utils import explore_list, find_submenus, load_submenu, menu_lines, \
                          check_es_restart, check_sys_reboot, get_ip_address, \
                          render_image, press_back
+from config_datas import DATABUS
 from keyb.keyboard import keyboard
 from launcher_module.core_paths import TMP_LAUNCHER_PATH
 from launcher_module.core_controls import CRT_UP, CRT_DOWN, \
@@ -50,7 +51,7 @@ class main_sub4(object):
     m_oThreads = []
     m_bThreadsStop = True
 
-    m_lLines = []
+    m_lLines = menu_lines()
     m_lMainOpts = []
     m_lSubMenus = []
     m_lOptFn = []
@@ -71,7 +72,7 @@ class main_sub4(object):
 
     def load(self):
         self.m_bThreadsStop = False
-        self._create_threads()
+        self._subscribe_datas()
 
     def info(self, p_sText = False, p_sIcon = False, p_bPress = False):
         self.m_lLayer40[0] = None
@@ -101,22 +102,11 @@ class main_sub4(object):
         self.info()
         return value
 
-    def _create_threads(self):
-        p_oDmns = [self._auto_load_datas]
-        self.m_oThreads = []
-        for dmn in p_oDmns:
-            t = threading.Thread(target=dmn)
-            t.start()
-            self.m_oThreads.append(t)
-
-    def _auto_load_datas(self):
-        p_lAutoL = [self.opt1, self.opt2, self.opt3]
-        timer = 0.5 # look for datas timer
-        if p_lAutoL:
-            while not self.m_bThreadsStop:
-                for opt in p_lAutoL:
-                    self._reload_opt_datas(opt)
-                time.sleep(timer)
+    def _subscribe_datas(self):
+        p_dAutoL = {'ip_public': [self.opt1],
+                    'ip_eth0': [self.opt2],
+                    'ip_wlan0': [self.opt3]}
+        DATABUS.subscribe(self, p_dAutoL)
 
     def _load_options(self):
         p_lOptFn = [self.opt1, self.opt2, self.opt3]
@@ -169,7 +159,7 @@ class main_sub4(object):
     def opt1_datas(self):
         p_lLines = {'text': "Public IP", 'icon': None,
                     'color_val': "type_color_1"}
-        value = get_ip_address("public")
+        value = DATABUS.get('ip_public')
         if value.lower() == "not available":
             p_lLines.update({'color_val': "type_color_7"})
         p_lLines.update({'value': value})
@@ -183,7 +173,7 @@ class main_sub4(object):
     def opt2_datas(self):
         p_lLines = {'text': "LAN IP", 'icon': None,
                     'color_val': "type_color_1"}
-        value = get_ip_address("eth0")
+        value = DATABUS.get('ip_eth0')
         if value.lower() == "disconnected":
             p_lLines.update({'color_val': "type_color_7"})
         p_lLines.update({'value': value})
@@ -197,7 +187,7 @@ class main_sub4(object):
     def opt3_datas(self):
         p_lLines = {'text': "WLAN IP", 'icon': None,
                     'color_val': "type_color_1"}
-        value = get_ip_address("wlan0")
+        value = DATABUS.get('ip_wlan0')
         if value.lower() == "disconnected":
             p_lLines.update({'color_val': "type_color_7"})
         p_lLines.update({'value': value})
@@ -217,4 +207,5 @@ class main_sub4(object):
 
     def quit(self):
         self.m_bThreadsStop = True
+        DATABUS.unsubscribe(self)
         self.info()
\ No newline at end of file
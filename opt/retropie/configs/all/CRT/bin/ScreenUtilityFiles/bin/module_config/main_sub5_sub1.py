@@ -30,11 +30,12 @@ sys.path.append(os.path.abspath(SCRIPT_DIR + "/../"))
 from main_paths import MODULES_PATH
 sys.path.append(MODULES_PATH)
 
-from config_utils import find_submenus, load_submenu, explore_list, run, \
+from config_utils import find_submenus, load_submenu, menu_lines, explore_list, run, \
                          check_es_restart, check_sys_reboot, render_image, \
                          press_back, get_themes, check_retropie_menu, \
                          hide_retropie_menu, launching_images, check_es_menu_font, \
                          fix_es_menu_font, restore_es_menu_font
+from config_datas import DATABUS
 from keyb.keyboard import keyboard
 from es_rotation import frontend_rotation
 from launcher_module.file_helpers import get_xml_value_esconfig, \
@@ -58,7 +59,7 @@ class main_sub5_sub1(object):
     m_oThreads = []
     m_bThreadsStop = True
 
-    m_lLines = []
+    m_lLines = menu_lines()
     m_lMainOpts = []
     m_lSubMenus = []
     m_lOptFn = []
@@ -79,7 +80,7 @@ class main_sub5_sub1(object):
 
     def load(self):
         self.m_bThreadsStop = False
-        self._create_threads()
+        self._subscribe_datas()
 
     def info(self, p_sText = False, p_sIcon = False, p_bPress = False):
         self.m_lLayer40[0] = None
@@ -109,23 +110,10 @@ class main_sub5_sub1(object):
         self.info()
         return value
 
-    def _create_threads(self):
-        p_oDmns = [self._auto_load_datas]
-        self.m_oThreads = []
-        for dmn in p_oDmns:
-            t = threading.Thread(target=dmn)
-            t.start()
-            self.m_oThreads.append(t)
-
-    def _auto_load_datas(self):
-        p_lAutoL = [self.opt4, self.opt7, self.opt10,
-                    self.opt11]
-        timer = 0.5 # look for datas timer
-        if p_lAutoL:
-            while not self.m_bThreadsStop:
-                for opt in p_lAutoL:
-                    self._reload_opt_datas(opt)
-                time.sleep(timer)
+    def _subscribe_datas(self):
+        p_dAutoL = {None: [self.opt4, self.opt7, self.opt10,
+                            self.opt11]}
+        DATABUS.subscribe(self, p_dAutoL)
 
     def _load_options(self):
         p_lOptFn = [self.opt3, self.opt4, self.opt5,
@@ -475,4 +463,5 @@ class main_sub5_sub1(object):
 
     def quit(self):
         self.m_bThreadsStop = True
+        DATABUS.unsubscribe(self)
         self.info()
\ No newline at end of file
@@ -32,7 +32,8 @@ sys.path.append(MODULES_PATH)
 
 from config_utils import explore_list, find_submenus, load_submenu, external_storage, \
                          check_es_restart, check_sys_reboot, render_image, \
-                         press_back
+                         press_back, menu_lines
+from config_datas import DATABUS
 from keyb.keyboard import keyboard
 from launcher_module.core_paths import TMP_LAUNCHER_PATH
 from launcher_module.core_controls import CRT_UP, CRT_DOWN, \
@@ -50,7 +51,7 @@ class main_sub5_sub2(object):
     m_oThreads = []
     m_bThreadsStop = True
 
-    m_lLines = []
+    m_lLines = menu_lines()
     m_lMainOpts = []
     m_lSubMenus = []
     m_lOptFn = []
@@ -71,7 +72,7 @@ class main_sub5_sub2(object):
 
     def load(self):
         self.m_bThreadsStop = False
-        self._create_threads()
+        self._subscribe_datas()
 
     def info(self, p_sText = False, p_sIcon = False, p_bPress = False):
         self.m_lLayer40[0] = None
@@ -101,23 +102,11 @@ class main_sub5_sub2(object):
         self.info()
         return value
 
-    def _create_threads(self):
-        p_oDmns = [self._auto_load_datas]
-        self.m_oThreads = []
-        for dmn in p_oDmns:
-            t = threading.Thread(target=dmn)
-            t.start()
-            self.m_oThreads.append(t)
-
-    def _auto_load_datas(self):
-        p_lAutoL = [self.opt1, self.opt2,
-                    self.opt3, self.opt4]
-        timer = 0.5 # look for datas timer
-        if p_lAutoL:
-            while not self.m_bThreadsStop:
-                for opt in p_lAutoL:
-                    self._reload_opt_datas(opt)
-                time.sleep(timer)
+    def _subscribe_datas(self):
+        p_dAutoL = {'extstrg_service': [self.opt1],
+                    'storage_roms': [self.opt3],
+                    None: [self.opt2, self.opt4]}
+        DATABUS.subscribe(self, p_dAutoL)
 
     def _load_options(self):
         p_lOptFn = [self.opt1, self.opt2,
@@ -182,6 +171,7 @@ class main_sub5_sub2(object):
             self.info("Please Wait", "icon_clock")
             if new == False: self.m_oEXTSTGClass.stop()
             elif new == True: self.m_oEXTSTGClass.init()
+            DATABUS.invalidate('extstrg_service')
             self.info()
             self.m_lLines[p_iLine]['value'] = new
 
@@ -192,7 +182,7 @@ class main_sub5_sub2(object):
         try: self.m_oEXTSTGClass
         except: self.m_oEXTSTGClass = external_storage()
 
-        value = self.m_oEXTSTGClass.check()
+        value = DATABUS.get('extstrg_service')
         if value: p_lLines.update({'es_restart': True})
         p_lLines.update({'value': value})
         return p_lLines
@@ -221,21 +211,7 @@ class main_sub5_sub2(object):
     def opt3_datas(self):
         p_lLines = {'text': "Available",
                     'color_val': "type_color_1"}
-        disk = "/dev/root"
-        try: self.m_oEXTSTGClass
-        except: self.m_oEXTSTGClass = external_storage()
-        value = self.m_oEXTSTGClass.check_connected()
-        if value: disk = value
-        try:
-            command = 'df -h | grep %s' % disk
-            tmp = subprocess.check_output(command, shell=True).decode("utf-8")
-            tmp = re.sub(r' +', " ", tmp).strip().split(" ")
-        except: tmp = ""
-        try:
-            p_iFree = str(100 - int(tmp[4].replace('%', ''))) + '%'
-            space = tmp[3] + '/' + tmp[1] + '(' + p_iFree + ')'
-            if not '%' in tmp[4]: space = "CALCULATING..."
-        except: space = "CALCULATING..."
+        space = DATABUS.get('storage_roms')
         if space == "CALCULATING...":
             p_lLines.update({'color_val': "type_color_7"})
         p_lLines.update({'value': space})
@@ -251,6 +227,7 @@ class main_sub5_sub2(object):
             if self.m_oEXTSTGClass.check_connected():
                 self.info("Please Wait", 'icon_clock')
                 self.m_oEXTSTGClass.eject()
+                DATABUS.invalidate('storage_roms')
                 time.sleep(2)
                 self.info()
 
@@ -261,7 +238,7 @@ class main_sub5_sub2(object):
         try: self.m_oEXTSTGClass
         except: self.m_oEXTSTGClass = external_storage()
 
-        if self.m_oEXTSTGClass.check():
+        if DATABUS.get('extstrg_service'):
             value = self.m_oEXTSTGClass.check_connected()
             logging.info("estado usb %s" % value)
             if not value:
@@ -292,4 +269,5 @@ class main_sub5_sub2(object):
 
     def quit(self):
         self.m_bThreadsStop = True
+        DATABUS.unsubscribe(self)
         self.info()
\ No newline at end of file
@@ -30,9 +30,10 @@ sys.path.append(os.path.abspath(SCRIPT_DIR + "/../"))
 from main_paths import MODULES_PATH
 sys.path.append(MODULES_PATH)
 
-from config_utils import explore_list, find_submenus, load_submenu, oled, \
+from config_utils import explore_list, find_submenus, load_submenu, menu_lines, oled, \
                          check_es_restart, check_sys_reboot, render_image, \
                          press_back
+from config_datas import DATABUS
 from keyb.keyboard import keyboard
 from launcher_module.core_paths import TMP_LAUNCHER_PATH
 from launcher_module.core_controls import CRT_UP, CRT_DOWN, \
@@ -50,7 +51,7 @@ class main_sub5_sub3(object):
     m_oThreads = []
     m_bThreadsStop = True
 
-    m_lLines = []
+    m_lLines = menu_lines()
     m_lMainOpts = []
     m_lSubMenus = []
     m_lOptFn = []
@@ -71,7 +72,7 @@ class main_sub5_sub3(object):
 
     def load(self):
         self.m_bThreadsStop = False
-        self._create_threads()
+        self._subscribe_datas()
 
     def info(self, p_sText = False, p_sIcon = False, p_bPress = False):
         self.m_lLayer40[0] = None
@@ -101,23 +102,10 @@ class main_sub5_sub3(object):
         self.info()
         return value
 
-    def _create_threads(self):
-        p_oDmns = [self._auto_load_datas]
-        self.m_oThreads = []
-        for dmn in p_oDmns:
-            t = threading.Thread(target=dmn)
-            t.start()
-            self.m_oThreads.append(t)
-
-    def _auto_load_datas(self):
-        p_lAutoL = [self.opt1, self.opt2, self.opt3,
-                    self.opt4]
-        timer = 0.5 # look for datas timer
-        if p_lAutoL:
-            while not self.m_bThreadsStop:
-                for opt in p_lAutoL:
-                    self._reload_opt_datas(opt)
-                time.sleep(timer)
+    def _subscribe_datas(self):
+        p_dAutoL = {'oled_status': [self.opt1],
+                    'oled_config': [self.opt2, self.opt3, self.opt4]}
+        DATABUS.subscribe(self, p_dAutoL)
 
     def _load_options(self):
         p_lOptFn = [self.opt1, self.opt2, self.opt3,
@@ -193,6 +181,8 @@ class main_sub5_sub3(object):
                            "icon_warn")
                 time.sleep(2)
             self.info()
+            DATABUS.invalidate('oled_status')
+            DATABUS.invalidate('oled_config')
             self.m_lLines[p_iLine]['value'] = value
 
     def opt1_datas(self):
@@ -200,7 +190,7 @@ class main_sub5_sub3(object):
                     'color_val': "type_color_1"}
         try: self.m_oOLEDClass
         except: self.m_oOLEDClass = oled()
-        value = self.m_oOLEDClass.check()
+        value = DATABUS.get('oled_status')
         if value == None: 
             p_lLines.update({'color_val': "type_color_7"})
             value = "N/A"
@@ -220,6 +210,7 @@ class main_sub5_sub3(object):
             new = explore_list(p_iJoy, value, list)
             if new: 
                 self.m_oOLEDClass.set_config('scr_info_ingame', new)
+                DATABUS.invalidate('oled_config')
                 value = self.m_oOLEDClass.get_config('scr_info_ingame')
                 self.m_lLines[p_iLine]['value'] = value
 
@@ -231,12 +222,11 @@ class main_sub5_sub3(object):
             p_lValues.append(str(i) + "m")
         p_lLines.update({'options': p_lValues})
 
-        try: self.m_oOLEDClass
-        except: self.m_oOLEDClass = oled()
-        if not self.m_oOLEDClass.service_connection(): 
+        p_dConfig = DATABUS.get('oled_config')
+        if not p_dConfig:
             value = "--"
             p_lLines.update({'color_val': 'type_color_7'})
-        else: value = self.m_oOLEDClass.get_config('scr_info_ingame')
+        else: value = p_dConfig['scr_info_ingame']
         p_lLines.update({'value': value})
         return p_lLines
 
@@ -253,6 +243,7 @@ class main_sub5_sub3(object):
             new = explore_list(p_iJoy, value, list)
             if new: 
                 self.m_oOLEDClass.set_config('scr_info_cpu', new)
+                DATABUS.invalidate('oled_config')
                 value = self.m_oOLEDClass.get_config('scr_info_cpu')
                 self.m_lLines[p_iLine]['value'] = value
 
@@ -264,12 +255,11 @@ class main_sub5_sub3(object):
             p_lValues.append(str(i) + "m")
         p_lLines.update({'options': p_lValues})
 
-        try: self.m_oOLEDClass
-        except: self.m_oOLEDClass = oled()
-        if not self.m_oOLEDClass.service_connection(): 
+        p_dConfig = DATABUS.get('oled_config')
+        if not p_dConfig:
             value = "--"
             p_lLines.update({'color_val': 'type_color_7'})
-        else: value = self.m_oOLEDClass.get_config('scr_info_cpu')
+        else: value = p_dConfig['scr_info_cpu']
         p_lLines.update({'value': value})
         return p_lLines
 
@@ -286,6 +276,7 @@ class main_sub5_sub3(object):
             new = explore_list(p_iJoy, value, list)
             if new: 
                 self.m_oOLEDClass.set_config('scr_info_mem', new)
+                DATABUS.invalidate('oled_config')
                 value = self.m_oOLEDClass.get_config('scr_info_mem')
                 self.m_lLines[p_iLine]['value'] = value
 
@@ -297,12 +288,11 @@ class main_sub5_sub3(object):
             p_lValues.append(str(i) + "m")
         p_lLines.update({'options': p_lValues})
 
-        try: self.m_oOLEDClass
-        except: self.m_oOLEDClass = oled()
-        if not self.m_oOLEDClass.service_connection(): 
+        p_dConfig = DATABUS.get('oled_config')
+        if not p_dConfig:
             value = "--"
             p_lLines.update({'color_val': 'type_color_7'})
-        else: value = self.m_oOLEDClass.get_config('scr_info_mem')
+        else: value = p_dConfig['scr_info_mem']
         p_lLines.update({'value': value})
         return p_lLines
 
@@ -320,4 +310,5 @@ class main_sub5_sub3(object):
 
     def quit(self):
         self.m_bThreadsStop = True
+        DATABUS.unsubscribe(self)
         self.info()
\ No newline at end of file
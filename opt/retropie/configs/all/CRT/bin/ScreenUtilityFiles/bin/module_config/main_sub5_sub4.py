@@ -30,9 +30,10 @@ sys.path.append(os.path.abspath(SCRIPT_DIR + "/../"))
 from main_paths import MODULES_PATH
 sys.path.append(MODULES_PATH)
 
-from config_utils import explore_list, find_submenus, load_submenu, \
+from config_utils import explore_list, find_submenus, load_submenu, menu_lines, \
                          check_es_restart, check_sys_reboot, render_image, \
                          press_back
+from config_datas import DATABUS
 from keyb.keyboard import keyboard
 from launcher_module.core_paths import TMP_LAUNCHER_PATH
 from launcher_module.core_controls import CRT_UP, CRT_DOWN, \
@@ -52,7 +53,7 @@ class main_sub5_sub4(object):
     m_oThreads = []
     m_bThreadsStop = True
 
-    m_lLines = []
+    m_lLines = menu_lines()
     m_lMainOpts = []
     m_lSubMenus = []
     m_lOptFn = []
@@ -73,7 +74,7 @@ class main_sub5_sub4(object):
 
     def load(self):
         self.m_bThreadsStop = False
-        self._create_threads()
+        self._subscribe_datas()
 
     def info(self, p_sText = False, p_sIcon = False, p_bPress = False):
         self.m_lLayer40[0] = None
@@ -103,26 +104,16 @@ class main_sub5_sub4(object):
         self.info()
         return value
 
-    def _create_threads(self):
-        p_oDmns = [self._auto_load_datas]
-        self.m_oThreads = []
-        for dmn in p_oDmns:
-            t = threading.Thread(target=dmn)
-            t.start()
-            self.m_oThreads.append(t)
-
-    def _auto_load_datas(self, p_bOnce = False):
-        p_lAutoL = [self.opt1, self.opt4, self.opt5,
-                    self.opt6, self.opt7, self.opt8,
-                    self.opt9, self.opt10, self.opt11,
-                    self.opt12]
-        timer = 0.5 # look for datas timer
-        if p_lAutoL:
-            while not self.m_bThreadsStop:
-                for opt in p_lAutoL:
-                    self._reload_opt_datas(opt)
-                if p_bOnce: break
-                time.sleep(timer)
+    def _subscribe_datas(self):
+        self.m_dAutoL = {None: [self.opt1, self.opt4, self.opt5,
+                                self.opt6, self.opt7, self.opt8,
+                                self.opt9, self.opt10, self.opt11,
+                                self.opt12]}
+        DATABUS.subscribe(self, self.m_dAutoL)
+
+    def _reload_all_datas(self):
+        for opt in self.m_dAutoL[None]:
+            self._reload_opt_datas(opt)
 
     def _load_options(self):
         p_lOptFn = [self.opt1, self.opt2, self.opt3,
@@ -184,7 +175,7 @@ class main_sub5_sub4(object):
             if new == False: 
                 self.info("Please Wait", "icon_clock")
                 self.m_oOCClass.disable()
-                self._auto_load_datas(True)
+                self._reload_all_datas()
             elif new == True: 
                 self.info(["Only advanced users!",
                            " Overclock can damage",
@@ -666,4 +657,5 @@ class main_sub5_sub4(object):
 
     def quit(self):
         self.m_bThreadsStop = True
+        DATABUS.unsubscribe(self)
         self.info()
\ No newline at end of file
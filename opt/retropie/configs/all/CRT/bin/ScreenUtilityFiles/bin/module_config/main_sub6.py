@@ -32,11 +32,13 @@ sys.path.append(MODULES_PATH)
 
 from config_utils import explore_list, find_submenus, load_submenu, external_storage, \
                          check_es_restart, check_sys_reboot, SYSTEMSDB, render_image, \
-                         press_back
+                         press_back, menu_lines
+from config_datas import DATABUS
 from keyb.keyboard import keyboard
 from launcher_module.core_paths import TMP_LAUNCHER_PATH, CRT_UTILITY_FILE, \
                                        CRT_EXTSTRG_TRIG_MNT_PATH, CRT_STATS_FILE
 from launcher_module.file_helpers import ini_get, ini_getlist
+from launcher_module.sys_facts import SYSFACTS
 from launcher_module.core_controls import CRT_UP, CRT_DOWN, \
                                           CRT_LEFT, CRT_RIGHT, CRT_OK, \
                                           CRT_CANCEL
@@ -52,7 +54,7 @@ class main_sub6(object):
     m_oThreads = []
     m_bThreadsStop = True
 
-    m_lLines = []
+    m_lLines = menu_lines()
     m_lMainOpts = []
     m_lSubMenus = []
     m_lOptFn = []
@@ -73,7 +75,7 @@ class main_sub6(object):
 
     def load(self):
         self.m_bThreadsStop = False
-        self._create_threads()
+        self._subscribe_datas()
 
     def info(self, p_sText = False, p_sIcon = False, p_bPress = False):
         self.m_lLayer40[0] = None
@@ -103,22 +105,11 @@ class main_sub6(object):
         self.info()
         return value
 
-    def _create_threads(self):
-        p_oDmns = [self._auto_load_datas]
-        self.m_oThreads = []
-        for dmn in p_oDmns:
-            t = threading.Thread(target=dmn)
-            t.start()
-            self.m_oThreads.append(t)
-
-    def _auto_load_datas(self):
-        p_lAutoL = [self.opt4, self.opt5, self.opt6]
-        timer = 0.5 # look for datas timer
-        if p_lAutoL:
-            while not self.m_bThreadsStop:
-                for opt in p_lAutoL:
-                    self._reload_opt_datas(opt)
-                time.sleep(timer)
+    def _subscribe_datas(self):
+        p_dAutoL = {'storage_sd': [self.opt4],
+                    'storage_usb': [self.opt5],
+                    'temperature': [self.opt6]}
+        DATABUS.subscribe(self, p_dAutoL)
 
     def _load_options(self):
         p_lOptFn = [self.opt1, self.opt2, self.opt3,
@@ -197,8 +188,7 @@ class main_sub6(object):
 
     def opt3_datas(self):
         p_lLines = {'color_val': "type_color_1"}
-        command = 'cat /proc/device-tree/model'
-        value = subprocess.check_output(command, shell=True).decode("utf-8")
+        value = SYSFACTS.model()
         value = value.replace('Raspberry Pi', '')
         value = value.replace(' Model ', '')
         value = value.replace(' Plus', '+')
@@ -217,17 +207,7 @@ class main_sub6(object):
     def opt4_datas(self):
         p_lLines = {'text': "Storage SD",
                     'color_val': "type_color_1"}
-        disk = "/dev/root"
-        try:
-            command = 'df -h | grep %s' % disk
-            tmp = subprocess.check_output(command, shell=True).decode("utf-8")
-            tmp = re.sub(r' +', " ", tmp).strip().split(" ")
-        except: tmp = ""
-        try:
-            p_iFree = str(100 - int(tmp[4].replace('%', ''))) + '%'
-            space = tmp[3] + '/' + tmp[1] + '(' + p_iFree + ')'
-            if not '%' in tmp[4]: space = "CALCULATING..."
-        except: space = "CALCULATING..."
+        space = DATABUS.get('storage_sd')
         if space == "CALCULATING...":
             p_lLines.update({'color_val': "type_color_7"})
         p_lLines.update({'value': space})
@@ -241,24 +221,7 @@ class main_sub6(object):
     def opt5_datas(self):
         p_lLines = {'text': "Storage USB",
                     'color_val': "type_color_1"}
-        disk = None
-        if os.path.exists (CRT_EXTSTRG_TRIG_MNT_PATH):
-            with open(CRT_EXTSTRG_TRIG_MNT_PATH, "r+") as f:
-                new_file = f.readlines()
-                line = new_file[0]
-                disk = line.strip().split(" ")[0]
-        if disk:
-            try:
-                command = 'df -h | grep %s' % disk
-                tmp = subprocess.check_output(command, shell=True).decode("utf-8")
-                tmp = re.sub(r' +', " ", tmp).strip().split(" ")
-            except: tmp = ""
-            try:
-                p_iFree = str(100 - int(tmp[4].replace('%', ''))) + '%'
-                space = tmp[3] + '/' + tmp[1] + '(' + p_iFree + ')'
-                if not '%' in tmp[4]: space = "CALCULATING..."
-            except: space = "CALCULATING..."
-        else: space = "N/A"
+        space = DATABUS.get('storage_usb')
         if space == "CALCULATING..." or space == "N/A":
             p_lLines.update({'color_val': "type_color_7"})
         p_lLines.update({'value': space})
@@ -271,9 +234,7 @@ class main_sub6(object):
 
     def opt6_datas(self):
         p_lLines = {'color_val': "type_color_1"}
-        temp = subprocess.check_output('vcgencmd measure_temp', shell=True).decode("utf-8")
-        temp = temp.strip().split("=")[1]
-        temp = temp.replace("'", "\xb0")
+        temp = DATABUS.get('temperature')
         p_lLines.update({'text': "Temperature"})
         p_lLines.update({'value': temp})
         return p_lLines
@@ -368,4 +329,5 @@ class main_sub6(object):
 
     def quit(self):
         self.m_bThreadsStop = True
+        DATABUS.unsubscribe(self)
         self.info()
\ No newline at end of file
@@ -23,9 +23,9 @@ with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os, sys, math, subprocess, time, re, threading, shlex
 import logging, traceback
-import socket, busio, rpyc
+import busio, rpyc
 from rpyc.utils.server import ThreadedServer
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageChops
 from board import D0, D1
 from adafruit_ssd1306 import SSD1306_I2C
 
@@ -41,8 +41,9 @@ from launcher_module.core_paths import PNAME_OLED, TMP_LAUNCHER_PATH, \
                                        CRT_NETPLAY_FILE, RETROPIE_RUNCOMMAND_LOG, \
                                        CRT_OLED_FILE, CRT_OLED_PORT
 from launcher_module.utils import check_process, set_procname, module_loaded
-from launcher_module.file_helpers import md5_file, ini_get, ini_set, touch_file, \
-                                         remove_line, add_line
+from launcher_module.file_helpers import ini_get, ini_set, touch_file, \
+                                         remove_line, add_line, file_watcher
+from launcher_module.net_info import NETINFO
 from module_cable.cable_utils import i2c_detect
 
 __VERSION__ = '0.1'
@@ -57,14 +58,99 @@ FONT_PATH1 = "./assets/fonts"
 FONT_TYPE1 = os.path.join(FONT_PATH1, "Ubuntu-BoldItalic.ttf")
 FONT_TYPE2 = os.path.join(FONT_PATH2, "DejaVuSans.ttf")
 
+class OLED_FrameDiff(object):
+    """
+    Send to the SSD1306 only the pages (8 pixel rows) that changed since
+    last frame. Display is addressed with column/page commands so a clock
+    tick only costs the page where it's drawn instead of full 1KB buffer.
+    """
+    SET_COL_ADDR = 0x21
+    SET_PAGE_ADDR = 0x22
+    STATS_TIME = 60 # seconds between bytes/s logs
+
+    def __init__(self, p_oDisplay):
+        self.m_oDisplay = p_oDisplay
+        self.m_iWidth = p_oDisplay.width
+        self.m_iPages = p_oDisplay.height // 8
+        # some driver versions reserve first byte of buffer for control byte
+        self.m_iOffset = len(p_oDisplay.buffer) - self.m_iPages * self.m_iWidth
+        self.m_bLast = None
+        self.m_iBytes = 0
+        self.m_iStatsTime = time.time()
+
+    def invalidate(self):
+        """ Force full refresh on next frame """
+        self.m_bLast = None
+
+    def blank(self):
+        """ Panel content is known to be empty """
+        self.m_bLast = bytes(self.m_iPages * self.m_iWidth)
+
+    def dirty_pages(self, p_bFrame):
+        if self.m_bLast is None: return list(range(self.m_iPages))
+        p_lPages = []
+        for page in range(self.m_iPages):
+            start = page * self.m_iWidth
+            end = start + self.m_iWidth
+            if p_bFrame[start:end] != self.m_bLast[start:end]:
+                p_lPages.append(page)
+        return p_lPages
+
+    def show(self, p_oImage):
+        """ Return number of bytes sent to display """
+        self.m_oDisplay.image(p_oImage)
+        p_bFrame = bytes(self.m_oDisplay.buffer[self.m_iOffset:])
+        p_lPages = self.dirty_pages(p_bFrame)
+        p_iBytes = 0
+        # group consecutive dirty pages in a single window
+        for first, last in self._page_ranges(p_lPages):
+            p_iBytes += self._send(p_bFrame, first, last)
+        self.m_bLast = p_bFrame
+        self._stats(p_iBytes)
+        return p_iBytes
+
+    def _page_ranges(self, p_lPages):
+        p_lRanges = []
+        for page in p_lPages:
+            if p_lRanges and p_lRanges[-1][1] == page - 1:
+                p_lRanges[-1][1] = page
+            else: p_lRanges.append([page, page])
+        return p_lRanges
+
+    def _send(self, p_bFrame, p_iFirst, p_iLast):
+        for cmd in (self.SET_COL_ADDR, 0, self.m_iWidth - 1,
+                    self.SET_PAGE_ADDR, p_iFirst, p_iLast):
+            self.m_oDisplay.write_cmd(cmd)
+        p_bData = bytearray([0x40]) # control byte, data stream follows
+        p_bData += p_bFrame[p_iFirst * self.m_iWidth:(p_iLast + 1) * self.m_iWidth]
+        with self.m_oDisplay.i2c_device:
+            self.m_oDisplay.i2c_device.write(p_bData)
+        return len(p_bData) + 12 # 6 commands of 2 bytes each
+
+    def _stats(self, p_iBytes):
+        self.m_iBytes += p_iBytes
+        p_iElapsed = time.time() - self.m_iStatsTime
+        if p_iElapsed >= self.STATS_TIME:
+            logging.debug("DEBUG: OLED i2c traffic %i bytes/s" % \
+                          int(self.m_iBytes / p_iElapsed))
+            self.m_iBytes = 0
+            self.m_iStatsTime = time.time()
+
 class OLED_Display(object):
+    CPU_ANGLE_MAX = 155 # gauge arc length in degrees
+    CPU_ANGLE_STR = 135 # gauge arc start in degrees
+    MEM_BAR_MAX = 68    # memory bar length in pixels
+    MEM_ARROW = [[1, 1, 1, 1], [0, 2, 2, 2],
+                 [-1, 3, 3, 3], [-2, 4, 4, 4],
+                 [-3, 5, 5, 5]]
+
     m_oDisplay = None
     m_iDspWidth = 0
     m_iDspHeight = 0
     m_oOutput = None
     m_oDraw = None
-
-    m_sHash_Prev = ""
+    m_oFrame = None
+    m_oCfgWatch = None
 
     m_sGM_Game = ""
     m_sGM_System = ""
@@ -94,7 +180,9 @@ class OLED_Display(object):
             self.m_iDspHeight = self.m_oDisplay.height
             self.m_oOutput = Image.new("1", (self.m_iDspWidth, self.m_iDspHeight), color=0)
             self.m_oDraw = ImageDraw.Draw(self.m_oOutput)
+            self.m_oFrame = OLED_FrameDiff(self.m_oDisplay)
             self.get_config()
+            self.watch_config()
             self.get_assets()
             self.clear_screen()
         else:
@@ -119,32 +207,133 @@ class OLED_Display(object):
         self.m_oImage4 = Image.open("./assets/bg/info_mem.pbm").convert("1")
         self.m_oImage5 = Image.open("./assets/bg/gameinit.pbm").convert("1")
         self.m_oImage6 = Image.open("./assets/bg/gameover.pbm").convert("1")
+        self.prepare_gauges()
+
+    def prepare_gauges(self):
+        """
+        Compose once static base of CPU and MEM screens and a layer with
+        its mask for every possible value of the gauges, so a frame is
+        only a base paste, a layer paste and the dynamic text.
+        """
+        self.m_oCPUBase = self.m_oImage3.copy()
+        p_oDraw = ImageDraw.Draw(self.m_oCPUBase)
+        self._draw_cpu_scale(p_oDraw)
+        p_oDraw.text((19, 21), "USAGE", font=self.m_oFont11, fill=255)
+        self.m_lCPULayers = [self._gauge_layer(self._draw_cpu_usage, i)
+                             for i in range(0, 101)]
+
+        self.m_oMEMBase = self.m_oImage4.copy()
+        p_oDraw = ImageDraw.Draw(self.m_oMEMBase)
+        p_oDraw.text((0, 30), "MB", font=self.m_oFont10, fill=255)
+        p_oDraw.text((0, 40), "USED", font=self.m_oFont10, fill=255)
+        p_oDraw.text((112, 30), "MB", font=self.m_oFont10, fill=255)
+        p_oDraw.text((103, 40), "FREE", font=self.m_oFont10, fill=255)
+        self.m_lMEMLayers = [self._gauge_layer(self._draw_mem_bar, i)
+                             for i in range(0, self.MEM_BAR_MAX + 1)]
+
+    def _gauge_layer(self, p_oDrawFn, p_iValue):
+        """
+        Draw dynamic elements on a black and on a white canvas. Pixels
+        with same color in both were painted and go to the mask, the rest
+        must keep what the base image has. Layer is cropped to its mask.
+        """
+        p_lCanvas = []
+        for color in (0, 1):
+            img = Image.new("1", (self.m_iDspWidth, self.m_iDspHeight), color=color)
+            p_oDrawFn(ImageDraw.Draw(img), p_iValue, color)
+            p_lCanvas.append(img)
+        mask = ImageChops.logical_xor(p_lCanvas[0], p_lCanvas[1])
+        mask = ImageChops.invert(mask.convert("L"))
+        box = mask.getbbox()
+        if not box: return None
+        return (p_lCanvas[0].crop(box), mask.crop(box), box[:2])
+
+    def _paste_layer(self, p_lLayer):
+        if p_lLayer:
+            self.m_oOutput.paste(p_lLayer[0], p_lLayer[2], p_lLayer[1])
+
+    def _draw_cpu_scale(self, p_oDraw):
+        """ Draw total scale for CPU usage graphics """
+        for i in range(0, 108, 8):
+            scale = i * 0.01
+            p_oDraw.pieslice((0, 0, 74, 74),
+                             start=self.CPU_ANGLE_STR + (self.CPU_ANGLE_MAX * scale),
+                             end=self.CPU_ANGLE_STR + (self.CPU_ANGLE_MAX * scale),
+                             outline=1, fill=0, width=1)
+        """ Hide part of scale for CPU usage graphics to get points """
+        p_oDraw.pieslice((1, 1, 73, 73), start=self.CPU_ANGLE_STR - 5,
+                         end=self.CPU_ANGLE_STR + self.CPU_ANGLE_MAX + 25,
+                         outline=1, fill=0, width=0)
+        """ Hide part of pointer line for current CPU usage """
+        self._draw_cpu_inner(p_oDraw, 1, 0)
+
+    def _draw_cpu_inner(self, p_oDraw, p_iOutline, p_iFill):
+        p_oDraw.pieslice((14, 14, 60, 60), start=self.CPU_ANGLE_STR - 5,
+                         end=self.CPU_ANGLE_STR + self.CPU_ANGLE_MAX + 5,
+                         outline=p_iOutline, fill=p_iFill, width=0)
+
+    def _draw_cpu_usage(self, p_oDraw, p_iCPU, p_iBG):
+        p_fAngle = self.CPU_ANGLE_STR + (self.CPU_ANGLE_MAX / 100 * p_iCPU)
+        """ Dynamic CPU usage arc from 0% to current utilization """
+        p_oDraw.arc((0, 0, 74, 74), start=self.CPU_ANGLE_STR, end=p_fAngle,
+                    fill=1, width=12)
+        """ Pointer line for current CPU usage at end of arc """
+        p_oDraw.pieslice((0, 0, 74, 74), start=p_fAngle + 5, end=p_fAngle + 5,
+                         outline=1, fill=0, width=1)
+        """ Inner part of gauge is hidden by base image, keep it unpainted """
+        self._draw_cpu_inner(p_oDraw, p_iBG, p_iBG)
+
+    def _draw_mem_bar(self, p_oDraw, p_iBar, p_iBG):
+        p_oDraw.rectangle((30, 22, 30 + p_iBar, 34), outline=0, fill=1)
+        """ Draw used memory bar pointer """
+        X_ARROW = 29 + p_iBar
+        Y_ARROW = 41
+        for line in self.MEM_ARROW:
+            p_oDraw.line((X_ARROW + line[0], Y_ARROW + line[1],
+                          X_ARROW + line[2], Y_ARROW + line[3]), fill=1)
 
     def get_config(self):
         if not os.path.exists(CRT_OLED_FILE): touch_file(CRT_OLED_FILE)
-        p_sHash = md5_file(CRT_OLED_FILE)
-        if p_sHash != self.m_sHash_Prev:
-            logging.info("INFO: getting configuration from file")
-            for screen in self.m_lOLEDScrns:
-                for item in screen:
-                    if 'scr_' in item:
-                        value = ini_get(CRT_OLED_FILE, item)
-                        if value == False:
-                            value = 0
-                            remove_line(CRT_OLED_FILE, item)
-                            add_line(CRT_OLED_FILE, "%s = 0" % item)
-                        else: value = int(value)
-                        if value > 0: 
-                            screen[item] = True
-                            screen['time'] = value * 60
-                        elif value <= 0: 
-                            screen[item] = False
-                            screen['time'] = 0
-            self.m_sHash_Prev = md5_file(CRT_OLED_FILE)
+        logging.info("INFO: getting configuration from file")
+        p_bRepaired = False
+        for screen in self.m_lOLEDScrns:
+            for item in screen:
+                if 'scr_' in item:
+                    value = ini_get(CRT_OLED_FILE, item)
+                    if value == False:
+                        value = 0
+                        remove_line(CRT_OLED_FILE, item)
+                        add_line(CRT_OLED_FILE, "%s = 0" % item)
+                        p_bRepaired = True
+                    else: value = int(value)
+                    if value > 0: 
+                        screen[item] = True
+                        screen['time'] = value * 60
+                    elif value <= 0: 
+                        screen[item] = False
+                        screen['time'] = 0
+        # drop the events of our own repair, no need to reload again
+        if p_bRepaired and self.m_oCfgWatch: self.m_oCfgWatch.changed()
+
+    def watch_config(self):
+        """ Reload configuration only when display.cfg changes """
+        self.m_oCfgWatch = file_watcher([CRT_OLED_FILE])
+        t = threading.Thread(target=self._dmn_config)
+        t.setDaemon(True)
+        t.start()
+
+    def _dmn_config(self):
+        while not STOP_SERVICE:
+            if self.m_oCfgWatch.wait(1):
+                try: self.get_config()
+                except Exception as e:
+                    logging.info("ERROR: %s" % e)
+        self.m_oCfgWatch.close()
 
     def clear_screen(self):
         self.m_oDisplay.fill(0)
         self.m_oDisplay.show()
+        self.m_oFrame.blank()
 
     def detect(self):
         """ OLED display detection in i2c bus 0, address 3C """
@@ -167,7 +356,6 @@ class OLED_Display(object):
         global INFO_IMG
         p_bPrevScrMain = False
         while not STOP_SERVICE:
-            self.get_config()
             if not p_bPrevScrMain and not INFO_IMG:
                 self.clear_screen()
                 self.screen_splash_image(self.m_oImage1, 2)
@@ -194,8 +382,8 @@ class OLED_Display(object):
         sys.exit(0)
 
     def draw(self):
-        self.m_oDisplay.image(self.m_oOutput)
-        self.m_oDisplay.show()
+        """ Only changed pages are sent, nothing if frame is the same """
+        self.m_oFrame.show(self.m_oOutput)
 
     def screen_splash_image(self, p_sImage, p_iTime = 3):
         global STOP_SCREEN
@@ -208,18 +396,6 @@ class OLED_Display(object):
             if time.time() - p_iStart >= p_iTime: break
         logging.info("INFO: stopping splash screen")
 
-    def get_ip_address(self, p_sIFname):
-        if p_sIFname == "public":
-            addr = os.popen('wget -qO- http://ipecho.net/plain --timeout=0.8 --tries=1 ; echo').readlines(-1)[0].strip()
-            if addr: return addr
-            else: return None
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        try:
-            addr = socket.inet_ntoa(fcntl.ioctl(s.fileno(),
-                   0x8915, # SIOCGIFADDR
-                   struct.pack('256s', p_sIFname[:15].encode('utf-8')))[20:24])
-        except: return None
-
     def ingame_get_info(self):
         self.m_sNetplay = "NETPLAY: DISABLED"
         self.m_sPublic = "LOCAL PLAYING"
@@ -261,9 +437,10 @@ class OLED_Display(object):
                         self.m_sNetplay = "NETPLAY: CLIENT MODE"
                         self.m_sPublic = chr(8594) + " " + p_sNetRemo + ":" + p_sNetPort
                     elif p_sNetMode == "H" or  p_sNetMode == "h":
-                        p_sIP = self.get_ip_address("public")
-                        if not p_sIP: p_sIP = self.get_ip_address("eth0")
-                        if not p_sIP: p_sIP = self.get_ip_address("wlan0")
+                        """ Public IP is resolved on background, never waits """
+                        p_sIP = NETINFO.public_ip()
+                        if not p_sIP: p_sIP = NETINFO.local_ip("eth0")
+                        if not p_sIP: p_sIP = NETINFO.local_ip("wlan0")
                         if not p_sIP: p_sIP = "NOT CONNECTED"
                         self.m_sNetplay = "NETPLAY: HOST MODE"
                         if p_sIP == "NOT CONNECTED": self.m_sPublic = "NO NETWORK AVAILABLE"
@@ -373,7 +550,9 @@ class OLED_Display(object):
             self.m_oDraw.text((X_POS + 60, Y_POS + 39), p_iGameTime, 
                                font=self.m_oFont10, fill=1)
             self.draw()
-            time.sleep(p_iRefreshTime)
+            """ Without title scroll only playing time changes, once per second """
+            if p_iScroll != 0: time.sleep(p_iRefreshTime)
+            else: time.sleep(1 - (time.time() - self.m_iGM_StartTime) % 1)
             if time.time() - p_iTime >= p_iShow: break
         if not STOP_SCREEN:
             STOP_SCREEN = True
@@ -386,9 +565,6 @@ class OLED_Display(object):
     def screen_cpu_use(self, p_iShow = 30, p_iInfoUpdate = 0.3):
         X_POS = 0
         Y_POS = 0
-        p_iAngleMax = 155
-        p_iAngleStr = 135
-        p_iAngle = p_iAngleMax / 100
         p_iTime = time.time()
 
         while not STOP_SCREEN and not STOP_SERVICE:
@@ -416,40 +592,11 @@ class OLED_Display(object):
             p_sCPUVolt = subprocess.check_output(p_sCMD, shell=True).decode("utf-8")
             p_sCPUVolt = p_sCPUVolt.strip().split("=")[1]
             
-            self.m_oOutput.paste(self.m_oImage3, (0, 0))
-            
-            """ Draw total scale for CPU usage graphics """
-            for i in range(0, 108, 8):
-                scale = i * 0.01
-                self.m_oDraw.pieslice((X_POS + 0, Y_POS + 0, X_POS + 74, Y_POS + 74), 
-                                       start=p_iAngleStr + (p_iAngleMax * scale), 
-                                       end=p_iAngleStr + (p_iAngleMax * scale), 
-                                       outline=1, fill=0, width=1)
-            
-            """ Hide part of scale for CPU usage graphics to get points """
-            self.m_oDraw.pieslice((X_POS + 1, Y_POS + 1, X_POS + 73, Y_POS + 73), 
-                                   start=p_iAngleStr - 5, end=p_iAngleStr + p_iAngleMax + 25, 
-                                   outline=1, fill=0, width=0)
-
-            """ Dynamic CPU usage arc from 0% to current utilization """
-            self.m_oDraw.arc((X_POS + 0, Y_POS + 0, X_POS + 74, Y_POS + 74), 
-                              start=p_iAngleStr, end=p_iAngleStr + (p_iAngle * p_fCPU), 
-                              fill=1, width=12)
-
-            """ Pointer line for current CPU usage at end of arc """
-            self.m_oDraw.pieslice((X_POS + 0, Y_POS + 0, X_POS + 74, Y_POS + 74), 
-                                   start=p_iAngleStr + (p_iAngle * p_fCPU) + 5, 
-                                   end=p_iAngleStr + (p_iAngle * p_fCPU) + 5, 
-                                   outline=1, fill=0, width=1)
-
-            """ Hide part of pointer line for current CPU usage """
-            self.m_oDraw.pieslice((X_POS + 14, Y_POS + 14, X_POS + 60, Y_POS + 60), 
-                                   start=p_iAngleStr - 5, end=p_iAngleStr + p_iAngleMax + 5, 
-                                   outline=1, fill=0, width=0)
+            p_iCPU = min(100, max(0, int(round(p_fCPU))))
+            self.m_oOutput.paste(self.m_oCPUBase, (0, 0))
+            self._paste_layer(self.m_lCPULayers[p_iCPU])
 
             if p_fCPU > 99: p_fCPU = 99 # max percetange shown is 99%
-            self.m_oDraw.text((X_POS + 19, Y_POS + 21), "USAGE", 
-                               font=self.m_oFont11, fill=255)
             self.m_oDraw.text((X_POS + 18, Y_POS + 29), str(int(p_fCPU)).zfill(2) + "%", 
                                font=self.m_oFont14, fill=255)
             self.m_oDraw.text((X_POS + 65, Y_POS + 43), p_sCPUTemp, 
@@ -469,10 +616,6 @@ class OLED_Display(object):
     def screen_mem_use(self, p_iShow = 30, p_iInfoUpdate = 0.3):
         X_POS = 0
         Y_POS = 0
-        p_iBarMax = 68
-        p_lArrow = [[1, 1, 1, 1], [0, 2, 2, 2],
-                    [-1, 3, 3, 3], [-2, 4, 4, 4],
-                    [-3, 5, 5, 5]]
         p_iTime = time.time()
 
         while not STOP_SCREEN and not STOP_SERVICE:
@@ -490,31 +633,21 @@ class OLED_Display(object):
             p_sMemFreePerc = int(((int(p_sMemAvail) - int(p_sMemUsed)) * 100) / (int(p_sMemAvail)))
             p_sMemFreePerc = str(p_sMemFreePerc) + "%"
             """ Calculate percentage of used RAM of available for bar """
-            p_sMemUsedBar = int((int(p_sMemUsed) * p_iBarMax) / int(p_sMemAvail))
+            p_sMemUsedBar = int((int(p_sMemUsed) * self.MEM_BAR_MAX) / int(p_sMemAvail))
             """ Get RAM core voltage """
             p_sCMD = "vcgencmd measure_volts sdram_c"
             VOLT = subprocess.check_output(p_sCMD, shell=True).decode("utf-8")
             VOLT = VOLT.strip().split("=")[1]
             
-            self.m_oOutput.paste(self.m_oImage4, (0, 0))
+            p_sMemUsedBar = min(self.MEM_BAR_MAX, max(0, p_sMemUsedBar))
+            self.m_oOutput.paste(self.m_oMEMBase, (0, 0))
             self.m_oDraw.text((X_POS + 14, Y_POS + 2), VOLT, font=self.m_oFont10, fill=255)
             self.m_oDraw.text((X_POS + 0, Y_POS + 15), p_sMemUsed, font=self.m_oFont1, fill=255)
-            self.m_oDraw.text((X_POS + 0, Y_POS + 30), "MB", font=self.m_oFont10, fill=255)
-            self.m_oDraw.text((X_POS + 0, Y_POS + 40), "USED", font=self.m_oFont10, fill=255)
             self.m_oDraw.text((X_POS + 103, Y_POS + 15), p_sMemAvail, font=self.m_oFont1, fill=255)
-            self.m_oDraw.text((X_POS + 112, Y_POS + 30), "MB", font=self.m_oFont10, fill=255)
-            self.m_oDraw.text((X_POS + 103, Y_POS + 40), "FREE", font=self.m_oFont10, fill=255)
             self.m_oDraw.text((X_POS + 2, Y_POS + 54), p_sMemGPU, font=self.m_oFont10, fill=255)
             self.m_oDraw.text((X_POS + 93, Y_POS + 49), p_sMemFreePerc, font=self.m_oFont3, fill=255)
-            self.m_oDraw.rectangle((30, 22, 30 + p_sMemUsedBar, 34), outline=0, fill=1) # clean info
-
-            """ Draw used memory bar pointer """
-            for line in p_lArrow:
-                X_ARROW = 29 + p_sMemUsedBar
-                Y_ARROW = 41
-                self.m_oDraw.line((X_ARROW + line[0], Y_ARROW + line[1],
-                                   X_ARROW + line[2], Y_ARROW + line[3]),
-                                   fill=1)
+            # bar goes over the text, as it overlaps the used/avail figures
+            self._paste_layer(self.m_lMEMLayers[p_sMemUsedBar])
             self.draw()
             time.sleep(p_iInfoUpdate)
             if time.time() - p_iTime >= p_iShow: break
@@ -0,0 +1,206 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_es_rotation.py.
+
+ES rotation on a fixture tree: end state and number of file actions
+for every side. Run from ScreenUtilityFiles/bin with:
+    python3 -m unittest discover tests
+
+https://github.com/krahsdevil/crt-for-retropie/
+
+Copyright (C)  2018/2020 -krahs- - https://github.com/krahsdevil/
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 2 of the License, or (at your option) any
+later version.
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import os, sys, shutil, tempfile, unittest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(SCRIPT_DIR + "/../../../GeneralModule"))
+sys.path.insert(0, os.path.abspath(SCRIPT_DIR + "/../module_config"))
+sys.path.insert(0, os.path.abspath(SCRIPT_DIR + "/.."))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import es_rotation as er
+
+SYSTEMS = ("psx", "fba", "mame-advmame")
+
+class es_rotation_test(unittest.TestCase):
+    def setUp(self):
+        self.m_sRoot = tempfile.mkdtemp()
+        self.m_dPaths = {}
+        self._fixture()
+        self.m_dSaved = {k: getattr(er, k) for k in self.m_dPaths}
+        self.m_oGetSide = er.get_side
+        for key, value in self.m_dPaths.items(): setattr(er, key, value)
+        er.get_side = self._side
+        self.m_oROT = er.frontend_rotation()
+
+    def tearDown(self):
+        for key, value in self.m_dSaved.items(): setattr(er, key, value)
+        er.get_side = self.m_oGetSide
+        del er.THEME_LIST[:]
+        shutil.rmtree(self.m_sRoot)
+
+    def _file(self, p_sPath, p_sText = "x"):
+        p_sPath = os.path.join(self.m_sRoot, p_sPath)
+        os.makedirs(os.path.dirname(p_sPath), exist_ok = True)
+        with open(p_sPath, "w") as f: f.write(p_sText)
+        return p_sPath
+
+    def _fixture(self):
+        R = self.m_sRoot
+        for system in SYSTEMS + ("deleted",):
+            for tail in (0, 1, 3):
+                self._file("res/rot/%s/launching_%i.png" % (system, tail),
+                           "%s%i" % (system, tail))
+        self._file("cfg/psx/launching.png", "user")
+        self._file("cfg/mame-advmame/launching.png", "user")
+        self._file("cfg/fba/dis_launching.png", "user")
+        os.makedirs(os.path.join(R, "cfg/deleted"))
+        for theme in ("UniFlyered", "UniFlyered-Dark"):
+            self._file("res/themes/%s/theme.xml" % theme)
+        for video in ("H", "V1", "V3"):
+            self._file("res/splash_screen/CRT-Retropie-Load_%s.mp4" % video, video)
+        self._file("etc/themes/carbon/theme.xml")
+        self._file("splash/CRT-Retropie-Load.mp4", "H")
+        es = "cfg/all/emulationstation"
+        self._file(es + "/es_settings.cfg", '<?xml version="1.0"?>\n' \
+                   '<bool name="EnableSounds" value="true" />\n' \
+                   '<string name="ThemeSet" value="carbon" />\n')
+        self._file("crt/utility.cfg", 'h_theme = "carbon"\nv_theme = "VA"\n')
+        p = lambda path: os.path.join(R, path)
+        self.m_dPaths = {
+            'ES_CFG_PATH': p(es),
+            'ES_CFG_FILE': p(es + "/es_settings.cfg"),
+            'ES_THEMES_SEC_PATH': p(es + "/themes"),
+            'ESSYSTEMS_TEMP_FILE': p(es + "/es_systems.cfg"),
+            'ES_THEMES_PRI_PATH': p("etc/themes"),
+            'ESTHEMES_DIS_PATH': p("etc/disabled.themes"),
+            'CRT_ES_RES_PATH': p("res"),
+            'CRT_LNCH_IMG_ROT_PATH': p("res/rot"),
+            'ESSYSTEMS_VERT_FILE': self._file("res/configs/vertical_es_systems.cfg"),
+            'RETROPIE_CFG_PATH': p("cfg"),
+            'CRT_UTILITY_FILE': p("crt/utility.cfg"),
+            'ROTMODES_TATE1_FILE': p("res/configs/es-tate1"),
+            'ROTMODES_TATE3_FILE': p("res/configs/es-tate3"),
+            'INTRO_VID_DEF_FILE': p("splash/CRT-Retropie-Load.mp4"),
+            'INTRO_VID0_FILE': p("res/splash_screen/CRT-Retropie-Load_H.mp4"),
+            'INTRO_VID1_FILE': p("res/splash_screen/CRT-Retropie-Load_V1.mp4"),
+            'INTRO_VID3_FILE': p("res/splash_screen/CRT-Retropie-Load_V3.mp4")}
+
+    def _side(self):
+        if os.path.exists(self.m_dPaths['ROTMODES_TATE1_FILE']): return 1
+        if os.path.exists(self.m_dPaths['ROTMODES_TATE3_FILE']): return 3
+        return 0
+
+    def _read(self, p_sKey, p_sPath = ""):
+        p_sFile = os.path.join(self.m_dPaths[p_sKey], p_sPath) \
+                  if p_sPath else self.m_dPaths[p_sKey]
+        with open(p_sFile, "r") as f:
+            return f.read()
+
+    def _theme(self):
+        return er.esconfig_get(self._read('ES_CFG_FILE'), "ThemeSet")
+
+    def _snapshot(self):
+        files = {}
+        for path, dirs, names in os.walk(self.m_sRoot):
+            for name in dirs + names:
+                item = os.path.join(path, name)
+                if os.path.islink(item): files[item] = "->" + os.readlink(item)
+                elif os.path.isfile(item):
+                    with open(item, "r") as f: files[item] = f.read()
+                else: files[item] = None
+        return files
+
+    def _rotate(self, p_iToMode, p_iActions):
+        self.assertEqual(self.m_oROT.plan(p_iToMode).actions(), p_iActions)
+        self.assertTrue(self.m_oROT.rotate(p_iToMode))
+        self.assertEqual(self.m_oROT.plan(p_iToMode).actions(), 0)
+        for item in self._snapshot():
+            self.assertFalse(item.endswith((".crt_bak", ".crt_new")), item)
+
+    def _check_side(self, p_iSide, p_sTail, p_sVideo):
+        self.assertEqual(self._side(), p_iSide)
+        self.assertEqual(self._read('INTRO_VID_DEF_FILE'), p_sVideo)
+        self.assertEqual(self._read('RETROPIE_CFG_PATH', "psx/launching.png"),
+                         "psx" + p_sTail)
+        self.assertEqual(self._read('RETROPIE_CFG_PATH', "fba/dis_launching.png"),
+                         "fba" + p_sTail)
+        self.assertEqual(os.listdir(os.path.join(self.m_dPaths['RETROPIE_CFG_PATH'],
+                                                 "deleted")), [])
+        vertical = p_iSide != 0
+        self.assertEqual(os.path.islink(self.m_dPaths['ESSYSTEMS_TEMP_FILE']), vertical)
+        self.assertEqual(os.path.isdir(self.m_dPaths['ES_THEMES_PRI_PATH']), not vertical)
+        self.assertEqual(os.path.isdir(self.m_dPaths['ESTHEMES_DIS_PATH']), vertical)
+        themes = sorted(os.listdir(self.m_dPaths['ES_THEMES_SEC_PATH']))
+        self.assertEqual(themes, ["UniFlyered", "UniFlyered-Dark"] if vertical else [])
+
+    def test_rotation_cycle(self):
+        # mkdir, es_systems, themes dir, 2 themes, intro, 3 images,
+        # es_settings, utility.cfg not needed, trigger
+        self._rotate(90, 11)
+        self._check_side(1, "1", "V1")
+        self.assertEqual(self._theme(), "VA")
+        # intro, 3 images, 2 triggers
+        self._rotate(-90, 6)
+        self._check_side(3, "3", "V3")
+        self.assertEqual(self._theme(), "VA")
+        # es_systems, themes dir, 2 themes, intro, 3 images,
+        # es_settings, trigger
+        self._rotate(0, 10)
+        self._check_side(0, "0", "H")
+        self.assertEqual(self._theme(), "carbon")
+        self._rotate(0, 0)
+
+    def test_user_theme_is_kept(self):
+        self._rotate(90, 11)
+        text = er.esconfig_set(self._read('ES_CFG_FILE'), "ThemeSet", "VUSER")
+        with open(self.m_dPaths['ES_CFG_FILE'], "w") as f: f.write(text)
+        # same as before plus utility.cfg, es_settings is already right
+        self._rotate(-90, 7)
+        self.assertEqual(self._theme(), "VUSER")
+        self.assertIn('v_theme = "VUSER"', self._read('CRT_UTILITY_FILE'))
+        self._rotate(0, 10)
+        self.assertEqual(self._theme(), "carbon")
+        # vertical themes folder already exists
+        self._rotate(90, 10)
+        self.assertEqual(self._theme(), "VUSER")
+
+    def test_same_side_changed_theme(self):
+        # fixture intro and images are plain files: intro, 3 images
+        self._rotate(0, 4)
+        text = er.esconfig_set(self._read('ES_CFG_FILE'), "ThemeSet", "HUSER")
+        with open(self.m_dPaths['ES_CFG_FILE'], "w") as f: f.write(text)
+        # only utility.cfg saves the new theme, ES keeps it
+        self._rotate(0, 1)
+        self.assertEqual(self._theme(), "HUSER")
+        self.assertIn('h_theme = "HUSER"', self._read('CRT_UTILITY_FILE'))
+
+    def test_rollback(self):
+        before = self._snapshot()
+        symlink = er._symlink
+        calls = []
+        def failing(p_sTarget, p_sPath):
+            calls.append(p_sPath)
+            if len(calls) == 4: raise OSError("fixture failure")
+            symlink(p_sTarget, p_sPath)
+        er._symlink = failing
+        try: self.assertFalse(self.m_oROT.rotate(90))
+        finally: er._symlink = symlink
+        self.assertEqual(self._snapshot(), before)
+
+if __name__ == '__main__':
+    unittest.main()